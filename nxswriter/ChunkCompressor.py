@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+""" Provides compression of data chunks compatible with HDF5 filters """
+
+import struct
+import zlib
+
+import numpy
+
+try:
+    import lz4.block
+    #: (:obj:`bool`) True if lz4 is installed
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+try:
+    import bitshuffle
+    #: (:obj:`bool`) True if bitshuffle is installed
+    BITSHUFFLE_AVAILABLE = True
+except ImportError:
+    BITSHUFFLE_AVAILABLE = False
+
+
+class ChunkCompressor(object):
+
+    """ Compressor of data chunks
+
+    :brief: It applies the filter pipeline of an HDF5 dataset
+            to a chunk outside the HDF5 library, i.e. with codecs
+            releasing the GIL, so the chunks can be compressed
+            in parallel threads and written directly
+    """
+
+    #: (:obj:`int`) HDF5 deflate filter id
+    DEFLATE = 1
+    #: (:obj:`int`) HDF5 shuffle filter id
+    SHUFFLE = 2
+    #: (:obj:`int`) HDF5 LZ4 filter id
+    LZ4 = 32004
+    #: (:obj:`int`) HDF5 bitshuffle filter id
+    BITSHUFFLE = 32008
+
+    def __init__(self, filters):
+        """ constructor
+
+        :param filters: filter pipeline, i.e. [(filter_id, options), ...]
+        :type filters: :obj:`list` <(:obj:`int`, :obj:`tuple`)>
+        """
+        #: (:obj:`list` <(:obj:`int`, :obj:`tuple`)>) filter pipeline
+        self.filters = [(int(fid), tuple(opts or ())) for fid, opts in filters]
+
+    def isValid(self):
+        """ checks if all filters of the pipeline are supported
+
+        :returns: True if the chunks can be compressed
+        :rtype: :obj:`bool`
+        """
+        if not self.filters:
+            return False
+        for fid, opts in self.filters:
+            if fid in [self.DEFLATE, self.SHUFFLE]:
+                continue
+            if fid == self.LZ4 and LZ4_AVAILABLE:
+                continue
+            if fid == self.BITSHUFFLE and BITSHUFFLE_AVAILABLE \
+               and self.__bslz4(opts):
+                continue
+            return False
+        return True
+
+    @classmethod
+    def stores(cls, filters, filterid):
+        """ checks if chunks compressed by the given filter
+            can be written directly into the filter pipeline
+
+        :brief: Compressed chunks of decoders use the default options,
+                i.e. bitshuffle chunks are compressed with LZ4
+        :param filters: filter pipeline, i.e. [(filter_id, options), ...]
+        :type filters: :obj:`list` <(:obj:`int`, :obj:`tuple`)>
+        :param filterid: HDF5 filter id of the compressed chunk
+        :type filterid: :obj:`int`
+        :returns: True if the chunks can be written directly
+        :rtype: :obj:`bool`
+        """
+        if len(filters) != 1:
+            return False
+        fid, opts = filters[0]
+        if fid != filterid:
+            return False
+        if fid == cls.BITSHUFFLE:
+            return cls.__bslz4(opts)
+        return True
+
+    @classmethod
+    def __bslz4(cls, opts):
+        """ checks if bitshuffle filter options use LZ4 compression
+
+        :param opts: filter options,
+            i.e. (version, version, itemsize, block size, compression)
+        :type opts: :obj:`tuple` <:obj:`int`>
+        :returns: True for bitshuffle with LZ4 compression
+        :rtype: :obj:`bool`
+        """
+        return len(opts) > 4 and opts[4] == 2
+
+    def compress(self, array):
+        """ compresses the chunk
+
+        :param array: chunk data
+        :type array: :class:`numpy.ndarray`
+        :returns: compressed chunk
+        :rtype: :obj:`bytes`
+        """
+        array = numpy.ascontiguousarray(array)
+        itemsize = array.dtype.itemsize
+        data = array
+        for fid, opts in self.filters:
+            if fid == self.SHUFFLE:
+                data = self.__shuffle(data, itemsize)
+            elif fid == self.DEFLATE:
+                data = zlib.compress(
+                    self.__bytes(data), opts[0] if opts else 6)
+            elif fid == self.LZ4:
+                data = self.__lz4(self.__bytes(data), opts)
+            elif fid == self.BITSHUFFLE:
+                data = self.__bitshuffle(data, itemsize, opts)
+        return self.__bytes(data)
+
+    @classmethod
+    def __bytes(cls, data):
+        """ provides bytes of the data
+
+        :param data: data
+        :type data: :obj:`bytes` or :class:`numpy.ndarray`
+        :returns: data bytes
+        :rtype: :obj:`bytes`
+        """
+        if isinstance(data, numpy.ndarray):
+            return data.tobytes()
+        return data
+
+    @classmethod
+    def __array(cls, data, itemsize):
+        """ provides array view of the data
+
+        :param data: data
+        :type data: :obj:`bytes` or :class:`numpy.ndarray`
+        :param itemsize: size of data items
+        :type itemsize: :obj:`int`
+        :returns: array of unsigned items
+        :rtype: :class:`numpy.ndarray`
+        """
+        if isinstance(data, numpy.ndarray):
+            return data.reshape(-1).view('uint%s' % (itemsize * 8))
+        return numpy.frombuffer(data, dtype='uint%s' % (itemsize * 8))
+
+    @classmethod
+    def __shuffle(cls, data, itemsize):
+        """ applies the HDF5 byte shuffle
+
+        :param data: data
+        :type data: :obj:`bytes` or :class:`numpy.ndarray`
+        :param itemsize: size of data items
+        :type itemsize: :obj:`int`
+        :returns: shuffled data
+        :rtype: :obj:`bytes` or :class:`numpy.ndarray`
+        """
+        if itemsize == 1:
+            return data
+        buf = cls.__array(data, itemsize).view('uint8')
+        return numpy.ascontiguousarray(buf.reshape(-1, itemsize).T)
+
+    @classmethod
+    def __lz4(cls, data, opts):
+        """ compresses data as the HDF5 LZ4 filter
+
+        :param data: data
+        :type data: :obj:`bytes`
+        :param opts: filter options, i.e. (block size,)
+        :type opts: :obj:`tuple` <:obj:`int`>
+        :returns: compressed data
+        :rtype: :obj:`bytes`
+        """
+        total = len(data)
+        bsize = opts[0] if opts and opts[0] else (1 << 30)
+        bsize = min(bsize, total) or 1
+        blocks = [struct.pack('>QI', total, bsize)]
+        for start in range(0, total, bsize):
+            block = data[start:start + bsize]
+            cblock = lz4.block.compress(block, store_size=False)
+            if len(cblock) >= len(block):
+                cblock = block
+            blocks.append(struct.pack('>I', len(cblock)))
+            blocks.append(cblock)
+        return b"".join(blocks)
+
+    @classmethod
+    def __bitshuffle(cls, data, itemsize, opts):
+        """ compresses data as the HDF5 bitshuffle filter with LZ4
+
+        :param data: data
+        :type data: :obj:`bytes` or :class:`numpy.ndarray`
+        :param itemsize: size of data items
+        :type itemsize: :obj:`int`
+        :param opts: filter options,
+            i.e. (version, version, itemsize, block size, compression)
+        :type opts: :obj:`tuple` <:obj:`int`>
+        :returns: compressed data
+        :rtype: :obj:`bytes`
+        """
+        arr = cls.__array(data, itemsize)
+        bsize = opts[3] if len(opts) > 3 and opts[3] else \
+            max(128, (8192 // itemsize) // 8 * 8)
+        return struct.pack('>QI', arr.nbytes, bsize * itemsize) + \
+            bitshuffle.compress_lz4(arr, bsize).tobytes()
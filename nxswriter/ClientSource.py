@@ -20,8 +20,6 @@
 """ Definitions of CLIENT datasource """
 
 import sys
-import xml.etree.ElementTree as et
-from lxml.etree import XMLParser
 from .DataSources import DataSource
 from .Errors import DataSourceSetupError
 
@@ -60,7 +58,7 @@ class ClientSource(DataSource):
         """
         if sys.version_info > (3,):
             xml = bytes(xml, "UTF-8")
-        root = et.fromstring(xml, parser=XMLParser(collect_ids=False))
+        root = self._parse(xml)
         rec = root.find("record")
         if rec is not None:
             self.name = rec.get("name")
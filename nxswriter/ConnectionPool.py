@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+""" Provides a pool of open database connections """
+
+import threading
+import time
+
+from .Errors import DataSourceError
+
+
+class ConnectionPool(object):
+
+    """ Pool of database connections
+
+    :brief: It keeps idle connections for reuse, i.e.
+            {connection key: [(connection, release time), ...]}.
+            When maxopen connections are open acquire() closes
+            the oldest idle connection of another key or waits
+            until a connection is given back
+    """
+
+    def __init__(self, maxsize=4, maxidle=300., maxopen=16, timeout=60.):
+        """ constructor
+
+        :param maxsize: maximal number of idle connections per key
+        :type maxsize: :obj:`int`
+        :param maxidle: maximal idle time of connections in seconds
+        :type maxidle: :obj:`float`
+        :param maxopen: maximal number of open connections
+        :type maxopen: :obj:`int`
+        :param timeout: maximal time of waiting for a connection
+                        in seconds, None for no limit
+        :type timeout: :obj:`float`
+        """
+        #: (:obj:`int`) maximal number of idle connections per key
+        self.maxsize = maxsize
+        #: (:obj:`float`) maximal idle time of connections in seconds
+        self.maxidle = maxidle
+        #: (:obj:`int`) maximal number of open connections
+        self.maxopen = maxopen
+        #: (:obj:`float`) maximal time of waiting for a connection in seconds
+        self.timeout = timeout
+        #: (:class:`threading.Condition`) pool lock
+        self.__lock = threading.Condition(threading.Lock())
+        #: (:obj:`dict` <:obj:`tuple`, :obj:`list` <(any, :obj:`float`)>>) \
+        #:     idle connections with their release times
+        self.__idle = {}
+        #: (:obj:`int`) number of open connections, i.e. idle and acquired
+        self.__opened = 0
+
+    def acquire(self, key, connect):
+        """ provides an open connection
+
+        :brief: It reuses a healthy idle connection or opens a new one
+        :param key: connection key, i.e. connection parameters
+        :type key: :obj:`tuple`
+        :param connect: function opening a new connection
+        :type connect: :obj:`instancemethod`
+        :returns: open database connection
+        :rtype: any
+        :raises: :exc:`nxswriter.Errors.DataSourceError` if no connection
+                 is given back within the timeout
+        """
+        deadline = None if self.timeout is None \
+            else time.time() + self.timeout
+        while True:
+            expired = []
+            try:
+                with self.__lock:
+                    expired.extend(self.__evict())
+                    db = self.__reserve(key, expired, deadline)
+            finally:
+                for old in expired:
+                    self.__close(old)
+            if db is None:
+                try:
+                    return connect()
+                except Exception:
+                    self.__closed(1)
+                    raise
+            if self.__isAlive(db):
+                return db
+            self.discard(db)
+
+    def release(self, key, db):
+        """ gives the connection back to the pool
+
+        :brief: The open transaction is finished so the next
+                query sees the current state of the database
+        :param key: connection key, i.e. connection parameters
+        :type key: :obj:`tuple`
+        :param db: open database connection
+        :type db: any
+        """
+        try:
+            db.rollback()
+        except Exception:
+            self.discard(db)
+            return
+        with self.__lock:
+            idle = self.__idle.setdefault(key, [])
+            if len(idle) < self.maxsize:
+                idle.append((db, time.time()))
+                self.__lock.notify_all()
+                db = None
+        if db is not None:
+            self.discard(db)
+
+    def discard(self, db):
+        """ closes the broken connection
+
+        :param db: database connection
+        :type db: any
+        """
+        self.__close(db)
+        self.__closed(1)
+
+    def clear(self):
+        """ closes all idle connections
+        """
+        with self.__lock:
+            idle = self.__idle
+            self.__idle = {}
+            self.__opened -= sum(len(conns) for conns in idle.values())
+            self.__lock.notify_all()
+        for conns in idle.values():
+            for db, _ in conns:
+                self.__close(db)
+
+    def size(self, key=None):
+        """ provides a number of idle connections
+
+        :param key: connection key, i.e. connection parameters
+        :type key: :obj:`tuple`
+        :returns: number of idle connections for the key or in total
+        :rtype: :obj:`int`
+        """
+        with self.__lock:
+            if key is not None:
+                return len(self.__idle.get(key, []))
+            return sum(len(conns) for conns in self.__idle.values())
+
+    def opened(self):
+        """ provides a number of open connections
+
+        :returns: number of idle and acquired connections
+        :rtype: :obj:`int`
+        """
+        with self.__lock:
+            return self.__opened
+
+    def __reserve(self, key, expired, deadline):
+        """ takes an idle connection or reserves a new one
+
+        :brief: It has to be called with the pool lock acquired.
+                It waits while maxopen connections are open and
+                none of them is idle
+        :param key: connection key, i.e. connection parameters
+        :type key: :obj:`tuple`
+        :param expired: idle connections of other keys to be closed
+        :type expired: :obj:`list` <any>
+        :param deadline: time limit of waiting or None
+        :type deadline: :obj:`float`
+        :returns: idle connection or None if a new one can be opened
+        :rtype: any
+        :raises: :exc:`nxswriter.Errors.DataSourceError` if no connection
+                 is given back before the deadline
+        """
+        while True:
+            idle = self.__idle.get(key)
+            if idle:
+                return idle.pop()[0]
+            if not self.maxopen or self.__opened < self.maxopen:
+                self.__opened += 1
+                return None
+            oldest = None
+            for ky, conns in self.__idle.items():
+                if conns and (oldest is None or
+                              conns[0][1] < self.__idle[oldest][0][1]):
+                    oldest = ky
+            if oldest is not None:
+                expired.append(self.__idle[oldest].pop(0)[0])
+                self.__opened -= 1
+                continue
+            wait = None
+            if deadline is not None:
+                wait = deadline - time.time()
+                if wait <= 0:
+                    raise DataSourceError(
+                        "No database connection released within %s s, "
+                        "%s connections open" % (self.timeout, self.__opened))
+            self.__lock.wait(wait)
+
+    def __closed(self, count):
+        """ updates the number of open connections
+
+        :param count: number of closed connections
+        :type count: :obj:`int`
+        """
+        with self.__lock:
+            self.__opened = max(self.__opened - count, 0)
+            self.__lock.notify_all()
+
+    def __evict(self):
+        """ removes connections idle for too long
+
+        :brief: It has to be called with the pool lock acquired
+        :returns: removed connections
+        :rtype: :obj:`list` <any>
+        """
+        expired = []
+        if self.maxidle is None or self.maxidle < 0:
+            return expired
+        limit = time.time() - self.maxidle
+        for key in list(self.__idle.keys()):
+            conns = self.__idle[key]
+            expired.extend(db for db, tm in conns if tm < limit)
+            conns[:] = [(db, tm) for db, tm in conns if tm >= limit]
+            if not conns:
+                self.__idle.pop(key)
+        self.__opened -= len(expired)
+        return expired
+
+    @classmethod
+    def __isAlive(cls, db):
+        """ checks if the connection is still open
+
+        :param db: database connection
+        :type db: any
+        :returns: True if the connection can be used
+        :rtype: :obj:`bool`
+        """
+        try:
+            if getattr(db, "closed", False):
+                return False
+            if hasattr(db, "ping"):
+                db.ping()
+            return True
+        except Exception:
+            return False
+
+    @classmethod
+    def __close(cls, db):
+        """ closes the connection
+
+        :param db: database connection
+        :type db: any
+        """
+        try:
+            db.close()
+        except Exception:
+            pass
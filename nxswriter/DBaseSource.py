@@ -19,12 +19,15 @@
 
 """ Definitions of DB datasource """
 
-import xml.etree.ElementTree as et
-from lxml.etree import XMLParser
 import sys
+import threading
+import time
+
+import numpy
 
 from .Types import NTP
 
+from .ConnectionPool import ConnectionPool
 from .DataSources import DataSource
 from .Errors import (PackageError, DataSourceSetupError)
 
@@ -61,11 +64,105 @@ except ImportError:
     # sys.stdout.flush()
 
 
+class ResultCache(object):
+
+    """ Cache of database query results with time-to-live
+    """
+
+    def __init__(self, maxsize=256):
+        """ constructor
+
+        :param maxsize: maximal number of cached results
+        :type maxsize: :obj:`int`
+        """
+        #: (:obj:`int`) maximal number of cached results
+        self.maxsize = maxsize
+        #: (:class:`threading.Lock`) cache lock
+        self.__lock = threading.Lock()
+        #: (:obj:`dict` <:obj:`tuple`, (:obj:`dict`, :obj:`float`)>) \
+        #:     cached results with their expiry times
+        self.__results = {}
+
+    def get(self, key):
+        """ provides the cached result
+
+        :param key: result key, i.e. connection parameters and query
+        :type key: :obj:`tuple`
+        :returns: dictionary with collected data or None if expired
+        :rtype: :obj:`dict` <:obj:`str`, any>
+        """
+        with self.__lock:
+            item = self.__results.get(key)
+            if item is None:
+                return None
+            if item[1] > time.time():
+                return self.__share(item[0])
+            self.__results.pop(key)
+            return None
+
+    def set(self, key, data, ttl):
+        """ caches the result
+
+        :param key: result key, i.e. connection parameters and query
+        :type key: :obj:`tuple`
+        :param data: dictionary with collected data
+        :type data: :obj:`dict` <:obj:`str`, any>
+        :param ttl: time-to-live of the result in seconds
+        :type ttl: :obj:`float`
+        :returns: dictionary with collected data
+        :rtype: :obj:`dict` <:obj:`str`, any>
+        """
+        if isinstance(data.get("value"), numpy.ndarray):
+            data["value"].flags.writeable = False
+        now = time.time()
+        with self.__lock:
+            if key not in self.__results and \
+               len(self.__results) >= self.maxsize:
+                for rkey in [rkey for rkey, item in self.__results.items()
+                             if item[1] <= now]:
+                    self.__results.pop(rkey)
+                if len(self.__results) >= self.maxsize:
+                    self.__results.pop(
+                        min(self.__results.keys(),
+                            key=lambda rkey: self.__results[rkey][1]))
+            self.__results[key] = (data, now + ttl)
+        return self.__share(data)
+
+    def clear(self):
+        """ removes all cached results
+        """
+        with self.__lock:
+            self.__results = {}
+
+    @classmethod
+    def __share(cls, data):
+        """ provides a copy of the result for a datasource
+
+        :brief: numpy arrays are shared as read-only, lists are copied
+        :param data: dictionary with collected data
+        :type data: :obj:`dict` <:obj:`str`, any>
+        :returns: dictionary with collected data
+        :rtype: :obj:`dict` <:obj:`str`, any>
+        """
+        data = dict(data)
+        if isinstance(data["value"], list):
+            data["value"] = [list(el) if isinstance(el, list) else el
+                             for el in data["value"]]
+        return data
+
+
 class DBaseSource(DataSource):
 
     """ DataBase data source
     """
 
+    #: (:class:`nxswriter.ConnectionPool.ConnectionPool`) \
+    #:     pool of database connections shared by all DB datasources
+    connections = ConnectionPool()
+    #: (:class:`nxswriter.DBaseSource.ResultCache`) \
+    #:     query results shared by all DB datasources
+    results = ResultCache()
+
     def __init__(self, streams=None, name=None):
         """ constructor
 
@@ -98,12 +195,27 @@ class DBaseSource(DataSource):
         self.mycnf = '/etc/my.cnf'
         #: (:obj:`str`) record format, i.e. `SCALAR`, `SPECTRUM`, `IMAGE`
         self.format = None
+        #: (:obj:`float`) time-to-live of cached query results in seconds
+        self.ttl = None
+
+        #: (:class:`nxswriter.DataSourcePool.DataSourcePool`) datasource pool
+        self.__pool = None
+        #: (:obj:`tuple`) canonical datasource key
+        self.__key = None
 
         #: (:obj:`dict` <:obj:`str`, :obj:`instancemethod`>) map
         self.__dbConnect = {"MYSQL": self.__connectMYSQL,
                             "PGSQL": self.__connectPGSQL,
                             "ORACLE": self.__connectORACLE}
 
+    def identity(self):
+        """ provides identity of the datasource
+
+        :returns: canonical datasource key or None
+        :rtype: :obj:`tuple`
+        """
+        return self.__key
+
     def __str__(self):
         """ self-description
 
@@ -123,11 +235,24 @@ class DBaseSource(DataSource):
         """
         if sys.version_info > (3,):
             xml = bytes(xml, "UTF-8")
-        root = et.fromstring(xml, parser=XMLParser(collect_ids=False))
+        root = self._parse(xml)
         query = root.find("query")
         if query is not None:
             self.format = query.get("format")
             self.query = self._getText(query)
+            ttl = query.get("ttl")
+            if ttl:
+                try:
+                    self.ttl = float(ttl)
+                except ValueError:
+                    if self._streams:
+                        self._streams.error(
+                            "DBaseSource::setup() - "
+                            "Wrong time-to-live of query results: %s" % xml,
+                            std=False)
+
+                    raise DataSourceSetupError(
+                        "Wrong time-to-live of query results: %s" % xml)
 
         if not self.format or not self.query:
             if self._streams:
@@ -152,6 +277,17 @@ class DBaseSource(DataSource):
             self.hostname = db.get("hostname")
             self.port = db.get("port")
             self.dsn = self._getText(db)
+        self.__key = ("DB", self.dbtype, self.dbname, self.hostname,
+                      self.port, self.user, self.mode, self.mycnf, self.dsn,
+                      self.format, self.query)
+
+    def setDataSources(self, pool):
+        """ sets the datasources
+
+        :param pool: datasource pool
+        :type pool: :class:`nxswriter.DataSourcePool.DataSourcePool`
+        """
+        self.__pool = pool
 
     def __connectMYSQL(self):
         """ connects to MYSQL database
@@ -227,16 +363,24 @@ class DBaseSource(DataSource):
     def getData(self):
         """ provides access to the data
 
+        :brief: Data of datasources with the same setup are read
+                once per step via the datasource pool
         :returns: dictionary with collected data
         :rtype: :obj:`dict` <:obj:`str`, any>
         """
+        if self.__key is not None and hasattr(self.__pool, "getData"):
+            return self.__pool.getData(self.__key, self.__fetchData)
+        return self.__fetchData()
 
-        db = None
+    def __fetchData(self):
+        """ reads data from the database
+
+        :returns: dictionary with collected data
+        :rtype: :obj:`dict` <:obj:`str`, any>
+        """
 
-        if self.dbtype in self.__dbConnect.keys() \
-                and self.dbtype in DB_AVAILABLE:
-            db = self.__dbConnect[self.dbtype]()
-        else:
+        if self.dbtype not in self.__dbConnect.keys() \
+                or self.dbtype not in DB_AVAILABLE:
             if self._streams:
                 self._streams.error(
                     "DBaseSource::getData() - "
@@ -246,8 +390,51 @@ class DBaseSource(DataSource):
             raise PackageError(
                 "Support for %s database not available" % self.dbtype)
 
-        if db:
-            cursor = db.cursor()
+        key = (self.dbtype, self.dbname, self.hostname, self.port,
+               self.user, self.passwd, self.mode, self.mycnf, self.dsn)
+        rkey = key + (self.format, self.query)
+        if self.ttl:
+            dh = self.results.get(rkey)
+            if dh is not None:
+                return dh
+        db = self.connections.acquire(key, self.__dbConnect[self.dbtype])
+        try:
+            dh = self.__query(db)
+        except Exception:
+            self.connections.discard(db)
+            raise
+        self.connections.release(key, db)
+        if self.ttl:
+            dh = self.results.set(rkey, dh, self.ttl)
+        return dh
+
+    @classmethod
+    def __toArray(cls, rows):
+        """ converts numeric query rows into numpy array in one pass
+
+        :param rows: query rows
+        :type rows: :obj:`list` <:obj:`tuple`>
+        :returns: 2d numpy array or None if columns are not numeric
+        :rtype: :class:`numpy.ndarray`
+        """
+        try:
+            arr = numpy.array(rows)
+        except Exception:
+            return None
+        if arr.ndim != 2 or not arr.size or arr.dtype.kind not in 'biuf':
+            return None
+        return arr
+
+    def __query(self, db):
+        """ executes the query
+
+        :param db: open database object
+        :type db: any
+        :returns: dictionary with collected data
+        :rtype: :obj:`dict` <:obj:`str`, any>
+        """
+        cursor = db.cursor()
+        try:
             cursor.execute(self.query)
             if not self.format or self.format == 'SCALAR':
                 #  data = copy.deepcopy(cursor.fetchone())
@@ -259,22 +446,34 @@ class DBaseSource(DataSource):
             elif self.format == 'SPECTRUM':
                 data = cursor.fetchall()
                 # data = copy.deepcopy(cursor.fetchall())
-                if len(data[0]) == 1:
+                arr = self.__toArray(data[:1] if len(data[0]) > 1 else data)
+                if arr is not None:
+                    ldata = arr.reshape(-1)
+                    tp = arr.dtype.name
+                elif len(data[0]) == 1:
                     ldata = list(el[0] for el in data)
+                    tp = type(ldata[0]).__name__
                 else:
                     ldata = list(el for el in data[0])
+                    tp = type(ldata[0]).__name__
                 dh = {"rank": "SPECTRUM",
                       "value": ldata,
-                      "tangoDType": (NTP.pTt[type(ldata[0]).__name__]),
+                      "tangoDType": NTP.pTt[tp],
                       "shape": [len(ldata), 0]}
             else:
                 data = cursor.fetchall()
                 # data = copy.deepcopy(cursor.fetchall())
-                ldata = list(list(el) for el in data)
+                arr = self.__toArray(data)
+                if arr is not None:
+                    ldata = arr
+                    tp = arr.dtype.name
+                else:
+                    ldata = list(list(el) for el in data)
+                    tp = type(ldata[0][0]).__name__
                 dh = {"rank": "IMAGE",
                       "value": ldata,
-                      "tangoDType": NTP.pTt[type(ldata[0][0]).__name__],
+                      "tangoDType": NTP.pTt[tp],
                       "shape": [len(ldata), len(ldata[0])]}
+        finally:
             cursor.close()
-            db.close()
         return dh
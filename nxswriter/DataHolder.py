@@ -22,7 +22,7 @@
 import numpy
 import sys
 
-from .Types import NTP, nptype
+from .Types import NTP, Converters, nptype
 
 
 if sys.version_info > (3,):
@@ -58,8 +58,14 @@ class DataHolder(object):
 
         #: (:obj:`str`) data format, i.e. SCALAR, SPECTRUM, IMAGE, VERTEX
         self.format = rank
+        #: (:obj:`object`) decoder of the compressed value to be decoded
+        self.__decoder = None
         #: (any) data value
-        self.value = value
+        self.__value = value
+        #: (:obj:`memoryview`) compressed data chunk of DevEncoded variables
+        self.chunk = None
+        #: (:obj:`int`) HDF5 filter id of the compressed data chunk
+        self.filterid = None
         #: (:obj:`str`)  tango data type
         self.tangoDType = tangoDType
         #: (:obj:`list` <:obj:`int`>) data shape
@@ -71,6 +77,9 @@ class DataHolder(object):
 
         #: (:class:`StreamSet` or :class:`tango.LatestDeviceImpl`) stream set
         self._streams = streams
+        #: (:obj:`dict` <:obj:`str`, (any, any)>) \
+        #:    cast results, i.e. {dtype: (value, result)}
+        self.__casts = {}
         if str(self.tangoDType) == 'DevEncoded':
             self.__setupEncoded()
 
@@ -81,12 +90,21 @@ class DataHolder(object):
         if self.encoding and self.decoders and \
                 self.decoders.hasDecoder(self.encoding):
             decoder = self.decoders.get(self.encoding)
+            compressed = hasattr(decoder, "chunk")
+            if compressed:
+                decoder = self.decoders.create(self.encoding)
             decoder.load(self.value)
             self.shape = decoder.shape()
             if self.shape:
-                self.value = decoder.decode()
-                rank = NTP().arrayRank(self.value)
-                if rank > 2:
+                if compressed:
+                    self.chunk = decoder.chunk()
+                    self.filterid = decoder.filterid
+                    self.__decoder = decoder
+                    rank = len(self.shape)
+                else:
+                    self.value = decoder.decode()
+                    rank = NTP().arrayRank(self.value)
+                if rank > 3:
                     if self._streams:
                         self._streams.error(
                             "DataHolder::__setupEncoded() - "
@@ -102,7 +120,7 @@ class DataHolder(object):
 
                 self.tangoDType = NTP.pTt[tp]
 
-        if self.value is None:
+        if self.__decoder is None and self.value is None:
             if self._streams:
                 self._streams.error(
                     "DataHolder::__setupEncoded() - "
@@ -121,15 +139,86 @@ class DataHolder(object):
 
             raise ValueError("Encoding or Shape not defined")
 
+    def __getValue(self):
+        """ provides the data value
+
+        :brief: The compressed DevEncoded value is decoded on demand.
+                Decoded DevEncoded arrays are read-only views of
+                the encoded buffer, so consumers modifying data in place
+                have to copy them first
+        :returns: data value
+        :rtype: any
+        """
+        if self.__decoder is not None:
+            self.__value = self.__decoder.decode()
+            self.__decoder = None
+        return self.__value
+
+    def __setValue(self, value):
+        """ sets the data value
+
+        :param value: data value
+        :type value: any
+        """
+        self.__decoder = None
+        self.__value = value
+
+    #: (any) data value
+    value = property(__getValue, __setValue, doc='data value')
+
     def cast(self, dtype):
         """ casts the data into given type
 
+        :brief: The result is cached for every dtype while the value is kept.
+                It may be the value itself, e.g. a read-only decoded array
         :param dtype: given type of data
         :type dtype: :obj:`str`
         :returns: numpy array of defined type or list
                   for strings or value for SCALAR
         :rtype: :class:`numpy.ndarray`
 
+        """
+        try:
+            cached = self.__casts.get(dtype)
+        except TypeError:
+            cached = None
+        if cached is not None and cached[0] is self.value:
+            return cached[1]
+        result = self.__cast(dtype)
+        try:
+            self.__casts[dtype] = (self.value, result)
+        except TypeError:
+            pass
+        return result
+
+    def buffer(self, dtype):
+        """ provides aligned C-contiguous array of the given type
+
+        :brief: It does not copy the data if they are already
+                aligned and contiguous
+        :param dtype: given type of data
+        :type dtype: :obj:`str`
+        :returns: numpy array of defined type
+        :rtype: :class:`numpy.ndarray`
+        """
+        arr = self.cast(dtype)
+        if not isinstance(arr, numpy.ndarray):
+            return numpy.ascontiguousarray(arr)
+        if arr.flags.c_contiguous and arr.flags.aligned \
+           and arr.dtype.isnative:
+            return arr
+        return numpy.require(
+            arr, dtype=arr.dtype.newbyteorder('='),
+            requirements=['C', 'A'])
+
+    def __cast(self, dtype):
+        """ casts the data into given type without caching
+
+        :param dtype: given type of data
+        :type dtype: :obj:`str`
+        :returns: numpy array of defined type or list
+                  for strings or value for SCALAR
+        :rtype: :class:`numpy.ndarray`
         """
         if str(self.format).split('.')[-1] == "SCALAR":
             if dtype in NTP.pTt.keys() \
@@ -150,18 +239,16 @@ class DataHolder(object):
             if dtype in NTP.pTt.keys() \
                     and NTP.pTt[dtype] == str(self.tangoDType) \
                     and (dtype not in ['str', 'string', 'bytes']):
-                if type(self.value).__name__ == 'ndarray' and \
+                if isinstance(self.value, numpy.ndarray) and \
                         self.value.dtype.name == dtype:
                     return self.value
                 else:
-                    return numpy.array(self.value, dtype=dtype)
+                    return numpy.asarray(self.value, dtype=dtype)
             elif dtype == "bool":
-                return numpy.array(
-                    NTP().createArray(self.value, NTP.convert[dtype]),
-                    dtype=dtype)
+                return Converters.toBoolArray(self.value)
             else:
                 try:
-                    return numpy.array(self.value, dtype=nptype(dtype))
+                    return numpy.asarray(self.value, dtype=nptype(dtype))
                 except Exception:
                     return numpy.array(
                         NTP().createArray(self.value, NTP.convert[dtype]),
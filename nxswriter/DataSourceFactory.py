@@ -105,6 +105,9 @@ class DataSourceFactory(Element):
             self.last.source.setJSON(globalJSON)
         if hasattr(self.last.source, "setDataSources"):
             self.last.source.setDataSources(self.__dsPool)
+        if hasattr(self.__dsPool, "register"):
+            self.last.source = self.__dsPool.register(
+                self.last.source, self.last)
         if self.last and hasattr(self.last, "tagAttributes"):
             self.last.tagAttributes["nexdatas_source"] = ("NX_CHAR", jxml)
 
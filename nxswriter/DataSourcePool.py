@@ -19,8 +19,17 @@
 
 """ pool with datasource evaluation classes """
 
+import copy
 import threading
 import sys
+import weakref
+
+import numpy
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
 
 from . import TangoSource
 from . import DBaseSource
@@ -28,11 +37,69 @@ from . import ClientSource
 from . import PyEvalSource
 
 
+class BatchDataSource(object):
+
+    """ Proxy of user datasources with a batch data provider
+
+    :brief: Datasource classes may define a class-level
+            ``fetch_many(sources)`` (or a coroutine
+            ``fetch_many_async(sources)``) which returns data of all
+            the given sources, i.e. a list of dictionaries or exceptions
+            in the order of the sources. The proxy reads its data
+            from one batch call per record and the datasource class.
+    """
+
+    def __init__(self, source, pool):
+        """ constructor
+
+        :param source: user datasource
+        :type source: :class:`nxswriter.DataSources.DataSource`
+        :param pool: datasource pool
+        :type pool: :class:`nxswriter.DataSourcePool.DataSourcePool`
+        """
+        #: (:class:`nxswriter.DataSources.DataSource`) user datasource
+        self.source = source
+        #: (:class:`nxswriter.DataSourcePool.DataSourcePool`) datasource pool
+        self.__pool = pool
+
+    def __str__(self):
+        """ self-description
+
+        :returns: self-describing string
+        :rtype: :obj:`str`
+        """
+        return str(self.source)
+
+    def __getattr__(self, name):
+        """ provides attributes of the user datasource
+
+        :param name: attribute name
+        :type name: :obj:`str`
+        :returns: attribute value
+        :rtype: any
+        """
+        return getattr(self.source, name)
+
+    def getData(self):
+        """ data provider
+
+        :returns: dictionary with collected data
+        :rtype: {'rank': :obj:`str`, 'value': any, 'tangoDType': :obj:`str`, \
+        :        'shape': :obj:`list` <int>, 'encoding': :obj:`str`, \
+        :        'decoders': :obj:`str`}
+        """
+        return self.__pool.getBatchData(self.source)
+
+
 class DataSourcePool(object):
 
     """ DataSource pool
     """
 
+    #: (:obj:`dict` <:obj:`str`, :obj:`int`>) record modes of strategies,
+    #:    i.e. INIT: -1; STEP: 1; FINAL: -2
+    modes = {"INIT": -1, "STEP": 1, "FINAL": -2}
+
     def __init__(self, configJSON=None):
         """ constructor
 
@@ -50,7 +117,27 @@ class DataSourcePool(object):
         #:       global variables for specific datasources
         self.common = {}
         #: (:obj:`int`) step counter: INIT: -1; STEP: 1,2,3...; FINAL: -2;
-        self.counter = 0
+        self.__counter = 0
+        #: (:obj:`dict` <:obj:`tuple`, :obj:`dict` <:obj:`str`, any>>) \
+        #:       data read in the current step, i.e. {datasource key: data}
+        self.__memo = {}
+        #: (:obj:`dict` <:obj:`tuple`, :class:`threading.Lock`>) \
+        #:       locks of datasource keys
+        self.__memolocks = {}
+        #: (:obj:`dict` <:obj:`type`, :class:`weakref.WeakKeyDictionary`>) \
+        #:       registered datasources with batch data providers and
+        #:       references to their elements, i.e. {class: {source: ref}}
+        self.__batches = {}
+        #: (:obj:`dict` <(:obj:`type`, :obj:`int`), \
+        #:       :class:`weakref.WeakSet`>) \
+        #:       datasources read in INIT, STEP or FINAL records
+        self.__requested = {}
+        #: (:obj:`dict` <:obj:`type`, :obj:`dict` <:obj:`int`, any>>) \
+        #:       batch data of the current record, i.e. {class: {id: data}}
+        self.__batchdata = {}
+        #: (:obj:`dict` <:obj:`type`, :class:`threading.Lock`>) \
+        #:       locks of datasource classes with batch data providers
+        self.__batchlocks = {}
         #: (:obj:`bool`) can fail switch
         self.canfail = False
         #: (:class:`nxswriter.FileWriter.FTGroup`) H5 file handle
@@ -58,6 +145,188 @@ class DataSourcePool(object):
         #: (:class:`threading.Lock`) pool lock
         self.lock = threading.Lock()
 
+    def __getCounter(self):
+        """ provides the step counter
+
+        :returns: step counter
+        :rtype: :obj:`int`
+        """
+        return self.__counter
+
+    def __setCounter(self, counter):
+        """ sets the step counter
+
+        :brief: It clears data read in the previous step
+        :param counter: step counter
+        :type counter: :obj:`int`
+        """
+        if counter != self.__counter:
+            self.__memo = {}
+            self.__batchdata = {}
+        self.__counter = counter
+
+    #: (:obj:`int`) step counter: INIT: -1; STEP: 1,2,3...; FINAL: -2;
+    counter = property(__getCounter, __setCounter,
+                       doc='step counter: INIT: -1; STEP: 1,2,3...; FINAL: -2')
+
+    def getData(self, key, fetch):
+        """ provides datasource data read once per step
+
+        :brief: In STEP mode data of datasources with the same key are
+                read only once and shared. Numpy arrays are shared as
+                read-only views, so arrays owned by datasources stay
+                writeable, and lists are copied for every consumer.
+        :param key: canonical datasource key
+        :type key: :obj:`tuple`
+        :param fetch: function reading the datasource data
+        :type fetch: :obj:`instancemethod`
+        :returns: dictionary with collected data
+        :rtype: {'rank': :obj:`str`, 'value': any, 'tangoDType': :obj:`str`, \
+        :        'shape': :obj:`list` <int>, 'encoding': :obj:`str`, \
+        :        'decoders': :obj:`str`}
+        """
+        if self.__counter < 1:
+            return fetch()
+        with self.lock:
+            keylock = self.__memolocks.setdefault(key, threading.Lock())
+        with keylock:
+            memo = self.__memo
+            if key in memo:
+                data = memo[key]
+            else:
+                data = fetch()
+                if isinstance(data, dict) and \
+                   isinstance(data.get("value"), numpy.ndarray):
+                    data = dict(data)
+                    data["value"] = data["value"].view()
+                    data["value"].flags.writeable = False
+                memo[key] = data
+        if isinstance(data, dict) and isinstance(data.get("value"), list):
+            data = dict(data)
+            data["value"] = copy.deepcopy(data["value"])
+        return data
+
+    def register(self, source, element=None):
+        """ registers the datasource with a batch data provider
+
+        :param source: datasource
+        :type source: :class:`nxswriter.DataSources.DataSource`
+        :param element: element of the datasource with its strategy
+        :type element: :class:`nxswriter.Element.Element`
+        :returns: batch proxy of the datasource or the datasource itself
+                  if its class does not provide batch data
+        :rtype: :class:`BatchDataSource` or \
+                :class:`nxswriter.DataSources.DataSource`
+        """
+        cls = type(source)
+        if not hasattr(cls, "fetch_many") and \
+           not (asyncio and hasattr(cls, "fetch_many_async")):
+            return source
+        with self.lock:
+            self.__batches.setdefault(
+                cls, weakref.WeakKeyDictionary())[source] = \
+                weakref.ref(element) if element is not None else None
+        return BatchDataSource(source, self)
+
+    def __registered(self, cls, mode):
+        """ provides registered datasources read in the given mode
+
+        :brief: It has to be called with the pool lock acquired.
+                Datasources registered without elements are read
+                in all modes
+        :param cls: datasource class
+        :type cls: :obj:`type`
+        :param mode: record mode, i.e. INIT: -1; STEP: 1; FINAL: -2
+        :type mode: :obj:`int`
+        :returns: registered datasources
+        :rtype: :obj:`list` <:class:`nxswriter.DataSources.DataSource`>
+        """
+        return [
+            source for source, ref in list(
+                self.__batches.get(cls, {}).items())
+            if ref is None or self.modes.get(
+                getattr(ref(), "strategy", None)) == mode]
+
+    def getBatchData(self, source):
+        """ provides data of the registered datasource
+
+        :brief: The first request in a record calls the batch provider for
+                datasources of the class read in the previous record of
+                the same mode, i.e. INIT, STEP or FINAL, or for the
+                registered datasources of the class with the strategy of
+                the mode if there is no such record. Other datasources
+                are fetched separately.
+        :param source: datasource
+        :type source: :class:`nxswriter.DataSources.DataSource`
+        :returns: dictionary with collected data
+        :rtype: {'rank': :obj:`str`, 'value': any, 'tangoDType': :obj:`str`, \
+        :        'shape': :obj:`list` <int>, 'encoding': :obj:`str`, \
+        :        'decoders': :obj:`str`}
+        """
+        cls = type(source)
+        counter = self.__counter
+        if not counter:
+            data = self.__fetchMany(cls, [source])[0]
+        else:
+            mode = min(counter, 1)
+            with self.lock:
+                batchlock = self.__batchlocks.setdefault(
+                    cls, threading.Lock())
+                requested = self.__requested.setdefault(
+                    (cls, mode), weakref.WeakSet())
+                registered = None if requested \
+                    else self.__registered(cls, mode)
+            with batchlock:
+                results = self.__batchdata.get(cls)
+                if results is None:
+                    sources = list(requested or registered or [])
+                    if source not in sources:
+                        sources.append(source)
+                    results = dict(zip(
+                        [id(src) for src in sources],
+                        self.__fetchMany(cls, sources)))
+                    self.__batchdata[cls] = results
+                requested.add(source)
+                if id(source) in results:
+                    data = results.pop(id(source))
+                else:
+                    data = self.__fetchMany(cls, [source])[0]
+        if isinstance(data, Exception):
+            raise data
+        return data
+
+    @classmethod
+    def __fetchMany(cls, dsclass, sources):
+        """ calls the batch data provider
+
+        :param dsclass: datasource class
+        :type dsclass: :obj:`type`
+        :param sources: datasources
+        :type sources: :obj:`list` <:class:`nxswriter.DataSources.DataSource`>
+        :returns: data or exceptions of the datasources
+        :rtype: :obj:`list` <:obj:`dict` <:obj:`str`, any> or \
+                :class:`Exception`>
+        """
+        try:
+            if asyncio and hasattr(dsclass, "fetch_many_async"):
+                loop = asyncio.new_event_loop()
+                try:
+                    results = loop.run_until_complete(
+                        dsclass.fetch_many_async(sources))
+                finally:
+                    loop.close()
+            else:
+                results = dsclass.fetch_many(sources)
+            results = list(results)
+            if len(results) != len(sources):
+                raise ValueError(
+                    "DataSourcePool::getBatchData() - "
+                    "%s.fetch_many() returned %s results for %s sources"
+                    % (dsclass.__name__, len(results), len(sources)))
+        except Exception as e:
+            results = [e] * len(sources)
+        return results
+
     def appendUserDataSources(self, configJSON):
         """ loads user datasources
 
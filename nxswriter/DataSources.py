@@ -21,7 +21,10 @@
 
 from .Types import NTP
 import xml.etree.ElementTree as et
+from lxml.etree import XMLParser
+import collections
 import sys
+import threading
 
 
 def _tostr(text):
@@ -40,6 +43,96 @@ def _tostr(text):
         return str(text)
 
 
+class XMLNodeCache(object):
+
+    """ LRU cache of parsed datasource xml
+    """
+
+    def __init__(self, maxsize=4096):
+        """ constructor
+
+        :param maxsize: maximal number of cached nodes
+        :type maxsize: :obj:`int`
+        """
+        #: (:obj:`int`) maximal number of cached nodes
+        self.maxsize = maxsize
+        #: (:class:`collections.OrderedDict` \
+        #:     <:obj:`bytes`, :class:`lxml.etree._Element`>) cached nodes
+        self.__nodes = collections.OrderedDict()
+        #: (:class:`threading.Lock`) cache lock
+        self.__lock = threading.Lock()
+        #: (:class:`threading.local`) nodes attached in the current thread
+        self.__local = threading.local()
+
+    def attach(self, nodes):
+        """ attaches nodes of the current thread
+
+        :brief: Attached nodes are used instead of the LRU cache,
+                e.g. by the entry plan replayed in the thread
+        :param nodes: nodes to attach, i.e. {xml: node}, or None
+        :type nodes: :obj:`dict` <:obj:`bytes`, \
+                     :class:`lxml.etree._Element`>
+        :returns: previously attached nodes
+        :rtype: :obj:`dict` <:obj:`bytes`, :class:`lxml.etree._Element`>
+        """
+        previous = getattr(self.__local, "nodes", None)
+        self.__local.nodes = nodes
+        return previous
+
+    def get(self, xml):
+        """ provides the parsed xml
+
+        :brief: Cached nodes are shared so they have to be used read-only
+        :param xml: xml string
+        :type xml: :obj:`str`
+        :returns: root node
+        :rtype: :class:`lxml.etree._Element`
+        """
+        if not isinstance(xml, bytes):
+            xml = xml.encode('utf-8')
+        nodes = getattr(self.__local, "nodes", None)
+        if nodes is not None:
+            node = nodes.get(xml)
+            if node is None:
+                node = et.fromstring(xml, parser=XMLParser(collect_ids=False))
+                nodes[xml] = node
+            return node
+        with self.__lock:
+            node = self.__nodes.pop(xml, None)
+            if node is not None:
+                self.__nodes[xml] = node
+                return node
+        node = et.fromstring(xml, parser=XMLParser(collect_ids=False))
+        self.set(xml, node)
+        return node
+
+    def set(self, xml, node):
+        """ caches the parsed xml
+
+        :param xml: xml string
+        :type xml: :obj:`str`
+        :param node: root node
+        :type node: :class:`lxml.etree._Element`
+        """
+        if not isinstance(xml, bytes):
+            xml = xml.encode('utf-8')
+        with self.__lock:
+            self.__nodes.pop(xml, None)
+            self.__nodes[xml] = node
+            while len(self.__nodes) > max(self.maxsize, 0):
+                self.__nodes.popitem(last=False)
+
+    def clear(self):
+        """ removes all cached nodes
+        """
+        with self.__lock:
+            self.__nodes.clear()
+
+
+#: (:class:`XMLNodeCache`) parsed datasource xml
+XMLNODES = XMLNodeCache()
+
+
 class DataSource(object):
 
     """ Data source
@@ -82,6 +175,16 @@ class DataSource(object):
         """
         return True
 
+    def identity(self):
+        """ provides identity of the datasource
+
+        :brief: Shapes of datasources with an identity are cached
+                between entries
+        :returns: canonical datasource key or None
+        :rtype: :obj:`tuple`
+        """
+        return None
+
     def __str__(self):
         """ self-description
 
@@ -90,6 +193,17 @@ class DataSource(object):
         """
         return "unknown DataSource"
 
+    @classmethod
+    def _parse(cls, xml):
+        """ provides parsed xml of datasource parameters
+
+        :param xml:  datasource parameters
+        :type xml: :obj:`str`
+        :returns: read-only root node
+        :rtype: :class:`lxml.etree._Element`
+        """
+        return XMLNODES.get(xml)
+
     @classmethod
     def _toxml(cls, node):
         """ provides xml content of the whole node
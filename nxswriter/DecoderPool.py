@@ -22,11 +22,58 @@
 import struct
 import numpy
 import sys
+import threading
+import zlib
+
+from .Errors import PackageError
+
+try:
+    import lz4.block
+    #: (:obj:`bool`) True if lz4 is installed
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+try:
+    import bitshuffle
+    #: (:obj:`bool`) True if bitshuffle is installed
+    BITSHUFFLE_AVAILABLE = True
+except ImportError:
+    BITSHUFFLE_AVAILABLE = False
 
 if sys.version_info > (3,):
     unicode = str
 
 
+def _frombuffer(data, dtype, offset, endianness, shape):
+    """ creates numpy array from the image buffer without copying
+
+    :brief: The array is read-only since it may share memory with
+            the encoded buffer and it is kept by the decoder
+    :param data: encoded buffer with header and image data
+    :type data: :obj:`bytes`
+    :param dtype: image data type
+    :type dtype: :obj:`str`
+    :param offset: header size
+    :type offset: :obj:`int`
+    :param endianness: image endianness, i.e. 0 - little, 1 - big
+    :type endianness: :obj:`int`
+    :param shape: image shape
+    :type shape: :obj:`list` <:obj:`int` >
+    :returns: read-only image array backed by the buffer
+              or its byteswapped copy for a non-native byte order
+    :rtype: :class:`numpy.ndarray`
+    """
+    dt = numpy.dtype(dtype).newbyteorder('>' if endianness else '<')
+    value = numpy.frombuffer(
+        data, dtype=dt, count=(len(data) - offset) // dt.itemsize,
+        offset=offset).reshape(shape)
+    if not dt.isnative:
+        value = value.astype(dt.newbyteorder('='))
+    value.flags.writeable = False
+    return value
+
+
 class UTF8decoder(object):
 
     """ UTF8 decoder
@@ -141,16 +188,15 @@ class UINT32decoder(object):
             return
         if len(self.__data[1]) % 4:
             raise ValueError("Wrong encoded UINT32 data length")
-        if not self.__value:
+        if self.__value is None:
             if isinstance(self.__data[1], str):
                 data = bytearray()
                 data.extend(list(map(ord, self.__data[1])))
             else:
                 data = self.__data[1]
-            # res = struct.unpack('I' * (len(data) // 4), data)
-            self.__value = numpy.array(
-                struct.unpack('I' * (len(data) // 4), data),
-                dtype=self.dtype).reshape(len(data) // 4)
+            self.__value = numpy.frombuffer(
+                data, dtype=self.dtype, count=len(data) // 4)
+            self.__value.flags.writeable = False
         return self.__value
 
 
@@ -179,12 +225,6 @@ class DATAARRAYdecoder(object):
         self.__headerFormat = '<IHHIIHHHHHHHHIIIIIIII'
         #: (:obj:`dict` <:obj:`str`, :obj:`any` > ) header data
         self.__header = {}
-        #: (:obj:`dict` <:obj:`int`, :obj:`str` > ) format modes
-        self.__formatID = {
-            0: 'B', 1: 'H', 2: 'I', 3: 'Q',
-            4: 'b', 5: 'h', 6: 'i', 7: 'q',
-            8: 'f', 9: 'd'
-        }
         #: (:obj:`dict` <:obj:`int`, :obj:`str` > ) dtype modes
         self.__dtypeID = {
             0: 'uint8', 1: 'uint16', 2: 'uint32', 3: 'uint64',
@@ -252,6 +292,16 @@ class DATAARRAYdecoder(object):
                 [self.__header['steps'][i]
                  for i in range(self.__header['dim'])]))
 
+    def endianness(self):
+        """ provides the data endianness
+
+        :returns: the data endianness if data was loaded,
+                  i.e. 0 - little, 1 - big
+        :rtype: :obj:`int`
+        """
+        if self.__header:
+            return self.__header['endianness']
+
     def decode(self):
         """ provides the decoded data
 
@@ -261,22 +311,171 @@ class DATAARRAYdecoder(object):
         if not self.__header or not self.__data:
             return
         if self.__value is None:
-            image = self.__data[1][struct.calcsize(self.__headerFormat):]
-            dformat = self.__formatID[self.__header['imageMode']]
-            fSize = struct.calcsize(dformat)
-            self.__value = numpy.array(
-                struct.unpack(dformat * (len(image) // fSize), image),
-                dtype=self.dtype).reshape(self.shape())
-            fendian = self.__header['endianness']
-            lendian = ord(struct.pack('=H', 1).decode()[-1])
-            if fendian != lendian:
-                try:
-                    self.__value.byteswap(inplace=False)
-                except TypeError:
-                    self.__value = self.__value.byteswap()
+            self.__value = self._decodeImage(
+                self._image(), self.__header['endianness'])
 
         return self.__value
 
+    def _image(self):
+        """ provides the image data placed after the header
+
+        :returns: the image data if data was loaded
+        :rtype: :obj:`memoryview`
+        """
+        if self.__data:
+            return memoryview(self.__data[1])[
+                struct.calcsize(self.__headerFormat):]
+
+    def _decodeImage(self, image, endianness):
+        """ decodes the image data
+
+        :param image: image data
+        :type image: :obj:`memoryview`
+        :param endianness: image endianness, i.e. 0 - little, 1 - big
+        :type endianness: :obj:`int`
+        :returns: the decoded data
+        :rtype: :class:`numpy.ndarray`
+        """
+        return _frombuffer(image, self.dtype, 0, endianness, self.shape())
+
+
+class ZLIBDATAARRAYdecoder(DATAARRAYdecoder):
+
+    """ DATA ARRAY decoder for images compressed with zlib
+
+    :brief: The image data is a zlib stream, i.e. a chunk of
+            the HDF5 deflate filter
+    """
+
+    #: (:obj:`int`) HDF5 filter id of the compressed image
+    filterid = 1
+
+    def __init__(self):
+        """ constructor
+
+        :brief: It clears the local variables
+        """
+        DATAARRAYdecoder.__init__(self)
+        #: (:obj:`str`) decoder name
+        self.name = "ZLIB_DATA_ARRAY"
+
+    def chunk(self):
+        """ provides the compressed image
+
+        :returns: the compressed image if data was loaded
+                  and its endianness is native
+        :rtype: :obj:`memoryview`
+        """
+        if self.endianness() == (1 if sys.byteorder == 'big' else 0):
+            return self._image()
+
+    def _decodeImage(self, image, endianness):
+        """ decodes the image data
+
+        :param image: image data
+        :type image: :obj:`memoryview`
+        :param endianness: image endianness, i.e. 0 - little, 1 - big
+        :type endianness: :obj:`int`
+        :returns: the decoded data
+        :rtype: :class:`numpy.ndarray`
+        """
+        return _frombuffer(
+            zlib.decompress(image), self.dtype, 0, endianness, self.shape())
+
+
+class LZ4DATAARRAYdecoder(ZLIBDATAARRAYdecoder):
+
+    """ DATA ARRAY decoder for images compressed with LZ4
+
+    :brief: The image data is a chunk of the HDF5 LZ4 filter, i.e.
+            the uncompressed size, the block size and blocks
+            prefixed by their compressed sizes
+    """
+
+    #: (:obj:`int`) HDF5 filter id of the compressed image
+    filterid = 32004
+
+    def __init__(self):
+        """ constructor
+
+        :brief: It clears the local variables
+        """
+        ZLIBDATAARRAYdecoder.__init__(self)
+        #: (:obj:`str`) decoder name
+        self.name = "LZ4_DATA_ARRAY"
+
+    def _decodeImage(self, image, endianness):
+        """ decodes the image data
+
+        :param image: image data
+        :type image: :obj:`memoryview`
+        :param endianness: image endianness, i.e. 0 - little, 1 - big
+        :type endianness: :obj:`int`
+        :returns: the decoded data
+        :rtype: :class:`numpy.ndarray`
+        """
+        if not LZ4_AVAILABLE:
+            raise PackageError("Support for LZ4 compression not available")
+        total, bsize = struct.unpack('>QI', image[:12])
+        buf = numpy.empty(total, dtype='uint8')
+        pos = 12
+        start = 0
+        while start < total:
+            csize = struct.unpack('>I', image[pos:pos + 4])[0]
+            size = min(bsize, total - start)
+            block = image[pos + 4:pos + 4 + csize]
+            if csize != size:
+                block = lz4.block.decompress(block, uncompressed_size=size)
+            buf[start:start + size] = numpy.frombuffer(block, dtype='uint8')
+            pos += 4 + csize
+            start += size
+        return _frombuffer(buf, self.dtype, 0, endianness, self.shape())
+
+
+class BSLZ4DATAARRAYdecoder(ZLIBDATAARRAYdecoder):
+
+    """ DATA ARRAY decoder for images compressed with bitshuffle and LZ4
+
+    :brief: The image data is a chunk of the HDF5 bitshuffle filter, i.e.
+            the uncompressed size, the block size in bytes and
+            the bitshuffled LZ4 blocks
+    """
+
+    #: (:obj:`int`) HDF5 filter id of the compressed image
+    filterid = 32008
+
+    def __init__(self):
+        """ constructor
+
+        :brief: It clears the local variables
+        """
+        ZLIBDATAARRAYdecoder.__init__(self)
+        #: (:obj:`str`) decoder name
+        self.name = "BSLZ4_DATA_ARRAY"
+
+    def _decodeImage(self, image, endianness):
+        """ decodes the image data
+
+        :param image: image data
+        :type image: :obj:`memoryview`
+        :param endianness: image endianness, i.e. 0 - little, 1 - big
+        :type endianness: :obj:`int`
+        :returns: the decoded data
+        :rtype: :class:`numpy.ndarray`
+        """
+        if not BITSHUFFLE_AVAILABLE:
+            raise PackageError(
+                "Support for bitshuffle compression not available")
+        _, bsize = struct.unpack('>QI', image[:12])
+        dt = numpy.dtype(self.dtype).newbyteorder('>' if endianness else '<')
+        value = bitshuffle.decompress_lz4(
+            numpy.frombuffer(image, dtype='uint8', offset=12),
+            tuple(self.shape()), dt, bsize // dt.itemsize)
+        if not dt.isnative:
+            value = value.astype(dt.newbyteorder('='))
+        value.flags.writeable = False
+        return value
+
 
 class VDEOdecoder(object):
 
@@ -303,8 +502,6 @@ class VDEOdecoder(object):
         self.__headerFormat = '!IHHqiiHHHH'
         #: (:obj:`dict` <:obj:`str`, :obj:`any` > ) header data
         self.__header = {}
-        #: (:obj:`dict` <:obj:`int`, :obj:`str` > ) format modes
-        self.__formatID = {0: 'B', 1: 'H', 2: 'I', 3: 'Q'}
         #: (:obj:`dict` <:obj:`int`, :obj:`str` > ) dtype modes
         self.__dtypeID = {0: 'uint8', 1: 'uint16', 2: 'uint32', 3: 'uint64'}
 
@@ -356,27 +553,21 @@ class VDEOdecoder(object):
         """
         if not self.__header or not self.__data:
             return
-        if not self.__value:
-            image = self.__data[1][struct.calcsize(self.__headerFormat):]
-            dformat = self.__formatID[self.__header['imageMode']]
-            fSize = struct.calcsize(dformat)
-            self.__value = numpy.array(
-                struct.unpack(dformat * (len(image) // fSize), image),
-                dtype=self.dtype).reshape(self.__header['height'],
-                                          self.__header['width'])
-            fendian = self.__header['endianness']
-            lendian = ord(struct.pack('=H', 1).decode()[-1])
-            if fendian != lendian:
-                try:
-                    self.__value.byteswap(inplace=False)
-                except TypeError:
-                    self.__value = self.__value.byteswap()
+        if self.__value is None:
+            self.__value = _frombuffer(
+                self.__data[1], self.dtype,
+                struct.calcsize(self.__headerFormat),
+                self.__header['endianness'],
+                [self.__header['height'], self.__header['width']])
         return self.__value
 
 
 class DecoderPool(object):
 
     """ Decoder pool
+
+    :brief: Decoders keep the loaded data in their state so every thread
+            obtains its own decoder instances
     """
 
     def __init__(self, configJSON=None):
@@ -391,9 +582,15 @@ class DecoderPool(object):
             "LIMA_VIDEO_IMAGE": VDEOdecoder,
             "VIDEO_IMAGE": VDEOdecoder,
             "DATA_ARRAY": DATAARRAYdecoder,
+            "ZLIB_DATA_ARRAY": ZLIBDATAARRAYdecoder,
+            "LZ4_DATA_ARRAY": LZ4DATAARRAYdecoder,
+            "BSLZ4_DATA_ARRAY": BSLZ4DATAARRAYdecoder,
             "UTF8": UTF8decoder,
             "UINT32": UINT32decoder}
+        #: (:obj:`dict` <:obj:`str`, :obj:`type`>) registered decoder classes
         self.__pool = {}
+        #: (:class:`threading.local`) thread local decoder instances
+        self.__local = threading.local()
 
         self.__createDecoders()
         self.appendUserDecoders(configJSON)
@@ -421,10 +618,21 @@ class DecoderPool(object):
     def __createDecoders(self):
         """ creates know decoders
 
-        :brief: It calls constructor of know decoders
+        :brief: It registers classes of know decoders
         """
         for dk in self.__knowDecoders.keys():
-            self.__pool[dk] = self.__knowDecoders[dk]()
+            self.__pool[dk] = self.__knowDecoders[dk]
+
+    def __instances(self):
+        """ provides decoder instances of the current thread
+
+        :returns: decoder instances of the current thread
+        :rtype: :obj:`dict` <:obj:`str`, :obj:`object`>
+        """
+        instances = getattr(self.__local, "instances", None)
+        if instances is None:
+            instances = self.__local.instances = {}
+        return instances
 
     def hasDecoder(self, decoder):
         """ checks it the decoder is registered
@@ -437,15 +645,32 @@ class DecoderPool(object):
         return True if decoder in self.__pool.keys() else False
 
     def get(self, decoder):
-        """ checks it the decoder is registered
+        """ provides the decoder instance of the current thread
 
         :param decoder: the given decoder
         :type decoder: :obj:`str`
-        :returns: True if it the decoder is registered
+        :returns: decoder instance if it the decoder is registered
+        :rtype: :obj:`object`
+        """
+        dclass = self.__pool.get(decoder)
+        if dclass is not None:
+            instances = self.__instances()
+            instance = instances.get(decoder)
+            if type(instance) is not dclass:
+                instance = instances[decoder] = dclass()
+            return instance
+
+    def create(self, decoder):
+        """ creates a new decoder instance
+
+        :param decoder: the given decoder
+        :type decoder: :obj:`str`
+        :returns: new decoder instance if it the decoder is registered
         :rtype: :obj:`object`
         """
-        if decoder in self.__pool.keys():
-            return self.__pool[decoder]
+        dclass = self.__pool.get(decoder)
+        if dclass is not None:
+            return dclass()
 
     def pop(self, name):
         """ adds additional decoder
@@ -454,21 +679,20 @@ class DecoderPool(object):
         :type name: :obj:`str`
         """
         self.__pool.pop(name, None)
+        self.__instances().pop(name, None)
 
     def append(self, decoder, name):
         """ adds additional decoder
 
         :param name: name of the adding decoder
         :type name: :obj:`str`
-        :param decoder: instance of the adding decoder
-        :type decoder: :obj:`object`
+        :param decoder: class of the adding decoder
+        :type decoder: :obj:`type`
         :returns: name of decoder
         :rtype: :obj:`str`
         """
 
         instance = decoder()
-        self.__pool[name] = instance
-
         if not hasattr(instance, "load") or not hasattr(instance, "name") \
                 or not hasattr(instance, "shape") \
                 or not hasattr(instance, "decode") \
@@ -476,4 +700,6 @@ class DecoderPool(object):
                 or not hasattr(instance, "format"):
             self.pop(name)
             return
+        self.__pool[name] = decoder
+        self.__instances()[name] = instance
         return name
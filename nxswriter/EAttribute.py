@@ -125,6 +125,7 @@ class EAttribute(FElement):
                                 "Attribute::run() - %s " % message[0])
                         self.error = message
                     else:
+                        self._checkShape(dh)
                         vl = dh.cast(self.h5Object.dtype)
                         if hasattr(vl, "shape") and \
                                 hasattr(self.h5Object, "shape") and \
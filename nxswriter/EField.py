@@ -23,6 +23,7 @@ import sys
 
 import numpy
 
+from .ChunkCompressor import ChunkCompressor
 from .DataHolder import DataHolder
 from .FElement import FElementWithAttr
 from .Types import NTP
@@ -37,7 +38,7 @@ class EField(FElementWithAttr):
     """
 
     def __init__(self, attrs, last, streams=None,
-                 reloadmode=False):
+                 reloadmode=False, template=False):
         """ constructor
 
         :param attrs: dictionary of the tag attributes
@@ -48,9 +49,11 @@ class EField(FElementWithAttr):
         :type streams: :class:`StreamSet` or :class:`tango.LatestDeviceImpl`
         :param reloadmode: reload mode
         :type reloadmode: :obj:`bool`
+        :param template: if the field is opened from a cloned entry template
+        :type template: :obj:`bool`
         """
         FElementWithAttr.__init__(self, "field", attrs, last, streams=streams,
-                                  reloadmode=reloadmode)
+                                  reloadmode=reloadmode, template=template)
         #: (:obj:`str`) rank of the field
         self.rank = "0"
         #: (:obj:`dict` <:obj:`str`, :obj:`str`>) \
@@ -79,10 +82,21 @@ class EField(FElementWithAttr):
         self.rate = 2
         #: (:obj:`bool`) compression shuffle
         self.shuffle = True
+        #: (:obj:`bool`) compress chunks in the element thread
+        #:    before writing them directly
+        self.precompress = False
         #: (:obj:`bool`) grew flag
         self.__grew = True
+        #: (:obj:`int`) number of frames stored in the last step
+        self.frames = 0
         #: (:obj:`str`) data format
         self.__format = ''
+        #: ((:obj:`int`, :obj:`list` <:obj:`int`>)) \
+        #:     filter pipeline and chunk shape for direct chunk writing
+        self.__directchunk = None
+        #: (:class:`nxswriter.ChunkCompressor.ChunkCompressor`) \
+        #:     compressor of chunks written directly
+        self.__compressor = None
 
     def __isgrowing(self):
         """ checks if it is growing in extra dimension
@@ -150,9 +164,16 @@ class EField(FElementWithAttr):
         :rtype: :class:`nxswriter.FileWriter.FTField`
         """
 
+        if self._template:
+            tname = name.encode() if sys.version_info < (3,) else name
+            f = self._lastObject().open(tname)
+            if self.__isCloned(f, shape):
+                return f
+            # the cloned field shape depends on data: recreate the field
+            del self._lastObject().h5object[tname]
+            self._template = False
         if self._reloadmode:
-            names = [kd.name for kd in self._lastObject()]
-            if name in names:
+            if name in self.last._childNames():
                 if sys.version_info < (3,):
                     name = name.encode()
                 f = self._lastObject().open(name)
@@ -176,7 +197,7 @@ class EField(FElementWithAttr):
             datafilters.append(datafilter)
         if self.filters:
             mindex = max(self.filters.keys())
-            for ind in range(mindex):
+            for ind in range(mindex + 1):
                 if ind in self.filters:
                     (filter_id, fname, cd_values, availability) = \
                         self.filters[ind]
@@ -248,8 +269,49 @@ class EField(FElementWithAttr):
             raise XMLSettingSyntaxError(
                 "The field '%s' of '%s' type cannot be created: %s" %
                 (name, dtype, message))
+        self.last._addChildName(name)
         return f
 
+    def __isCloned(self, field, shape):
+        """ checks if the cloned field has the shape of the created one
+
+        :param field: field cloned from the entry template
+        :type field: :class:`nxswriter.FileWriter.FTField`
+        :param shape: object shape
+        :type shape: :obj:`list` <:obj:`int` >
+        :returns: if the cloned field can be used
+        :rtype: :obj:`bool`
+        """
+        if not shape:
+            return True
+        chunk = [s if s > 0 else 1 for s in shape]
+        if self.canfail:
+            fshape = list(shape)
+        else:
+            fshape = [1 if s > 0 else 0 for s in shape]
+        chunks = field.h5object.chunks
+        return list(field.shape) == fshape and list(chunks or []) == chunk
+
+    def __findDirectChunk(self):
+        """ provides settings for writing compressed chunks directly
+
+        :returns: (filter pipeline, chunk shape) or None
+                  if the chunks cannot be written directly
+        :rtype: (:obj:`list` <(:obj:`int`, :obj:`tuple`)>, \
+                 :obj:`list` <:obj:`int`>)
+        """
+        if not hasattr(self.h5Object, "write_chunk"):
+            return
+        try:
+            h5object = self.h5Object.h5object
+            plist = h5object.id.get_create_plist()
+            filters = [tuple(plist.get_filter(i)[0:3:2])
+                       for i in range(plist.get_nfilters())]
+            if filters and h5object.chunks:
+                return filters, list(h5object.chunks)
+        except Exception:
+            return
+
     def __setAttributes(self):
         """ creates attributes
 
@@ -319,6 +381,19 @@ class EField(FElementWithAttr):
         shape = self.__getShape()
         #: stored H5 file object (defined in base class)
         self.h5Object = self.__createObject(tp, nm, shape)
+        self.__directchunk = self.__findDirectChunk()
+        self.__compressor = None
+        if self.precompress and self.__directchunk and \
+           self.h5Object.dtype not in ["string", b"string", "unicode"]:
+            compressor = ChunkCompressor(self.__directchunk[0])
+            if compressor.isValid():
+                self.__compressor = compressor
+        if self._template:
+            # attributes and static values are cloned
+            self._createAttributes()
+            if self.source and self.source.isValid():
+                return self.strategy, self.trigger
+            return
         # create attributes
         self.__setAttributes()
 
@@ -502,6 +577,49 @@ class EField(FElementWithAttr):
             raise XMLSettingSyntaxError(
                 "Vertex growing data with grows>1 not supported")
 
+    def __writeGrowingChunk(self, holder):
+        """ writes growing compressed data directly into the chunk
+
+        :brief: It bypasses the HDF5 filter pipeline when the holder
+                provides a whole frame compressed with the field filter
+                or when the frame is compressed by the field compressor
+        :param holder: data holder
+        :type holder: :class:`nxswriter.DataHolder.DataHolder`
+        :returns: True if the chunk was written
+        :rtype: :obj:`bool`
+        """
+        if not self.__directchunk or self.grows != 1:
+            return False
+        filters, chunk = self.__directchunk
+        shape = list(self.h5Object.shape)
+        if holder.chunk is not None \
+           and ChunkCompressor.stores(filters, holder.filterid) \
+           and chunk == [1] + list(holder.shape) \
+           and shape[1:] == list(holder.shape) \
+           and NTP.pTt.get(self.h5Object.dtype) == holder.tangoDType:
+            self.h5Object.write_chunk(
+                holder.chunk, [shape[0] - 1] + [0] * len(holder.shape))
+            return True
+        if self.__compressor is None:
+            return False
+        arr = holder.buffer(self.h5Object.dtype)
+        if chunk == [1] + list(arr.shape):
+            frames = [arr]
+        elif chunk[0] == 1 and chunk[1:] == list(arr.shape[1:]):
+            frames = arr
+        else:
+            return False
+        if shape[1:] != chunk[1:]:
+            return False
+        if len(frames) > 1:
+            self.h5Object.grow(0, len(frames) - 1)
+        start = self.h5Object.shape[0] - len(frames)
+        for i, frame in enumerate(frames):
+            self.h5Object.write_chunk(
+                memoryview(self.__compressor.compress(frame)),
+                [start + i] + [0] * frame.ndim)
+        return True
+
     def __writeGrowingData(self, holder):
         """ writes growing data
 
@@ -561,7 +679,9 @@ class EField(FElementWithAttr):
                     elif not h5shape[i]:
                         self.h5Object.grow(i, 1)
                     j += 1
-                elif self.__extraD and len(shape) > j and shape[j] > 1:
+                elif self.__extraD and len(shape) > j and \
+                        (shape[j] > 1 or len(shape) > 2):
+                    # shape with stacked frames
                     if len(shape) == len(h5shape) and shape[-1] != 0:
                         j += 1
 
@@ -571,6 +691,7 @@ class EField(FElementWithAttr):
         :brief: During its thread run it fetches the data from the source
         """
         self.__grew = False
+        self.frames = 0
         try:
             if self.source:
                 dt = self.source.getData()
@@ -586,6 +707,7 @@ class EField(FElementWithAttr):
                     message = self.setMessage("H5 Object not created")
                     self.error = message
                 else:
+                    self._checkShape(dh)
                     if not self.__extraD:
                         self.__growshape(dh.shape)
                         self.__writeData(dh)
@@ -594,7 +716,15 @@ class EField(FElementWithAttr):
                            and (self.h5Object.shape[self.grows - 1] == 1 or
                                 self.canfail):
                             self.__growshape(dh.shape)
-                        self.__writeGrowingData(dh)
+                        last = self.h5Object.shape[self.grows - 1]
+                        if not self.__writeGrowingChunk(dh):
+                            self.__writeGrowingData(dh)
+                        self.frames = \
+                            self.h5Object.shape[self.grows - 1] - last + 1
+                        if self.frames > 1 and self._streams:
+                            self._streams.debug(
+                                "EField::run() - %s frames of %s stored" % (
+                                    self.frames, self._tagAttrs.get("name")))
         except Exception:
             info = sys.exc_info()
             import traceback
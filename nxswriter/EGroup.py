@@ -31,7 +31,7 @@ class EGroup(FElementWithAttr):
     """
 
     def __init__(self, attrs, last, streams=None,
-                 reloadmode=False):
+                 reloadmode=False, template=False):
         """ constructor
 
         :param attrs: dictionary of the tag attributes
@@ -42,9 +42,11 @@ class EGroup(FElementWithAttr):
         :type streams: :class:`StreamSet` or :class:`tango.LatestDeviceImpl`
         :param reloadmode: reload mode
         :type reloadmode: :obj:`bool`
+        :param template: if the group is opened from a cloned entry template
+        :type template: :obj:`bool`
         """
         FElementWithAttr.__init__(self, "group", attrs, last, streams=streams,
-                                  reloadmode=reloadmode)
+                                  reloadmode=reloadmode, template=template)
         if self._lastObject() is not None:
             if ("type" in attrs.keys()) and ("name" in attrs.keys()):
                 if sys.version_info > (3,):
@@ -63,9 +65,11 @@ class EGroup(FElementWithAttr):
                         std=False)
 
                 raise XMLSettingSyntaxError("The group type not defined")
+            if self._template:
+                self.h5Object = self._lastObject().open(gname)
+                return
             if self._reloadmode:
-                names = [kd.name for kd in self._lastObject()]
-                if gname in names:
+                if gname in self.last._childNames():
                     if sys.version_info < (3,):
                         gname = gname.encode()
                     self.h5Object = self._lastObject().open(gname)
@@ -79,6 +83,7 @@ class EGroup(FElementWithAttr):
                 else:
                     self.h5Object = self._lastObject().create_group(
                         gname, attrs["type"].encode())
+                self.last._addChildName(gname)
             except Exception as e:
                 if sys.version_info < (3,):
                     atype = attrs["type"]
@@ -131,6 +131,7 @@ class ELink(FElement):
                         self.__target,
                         self._lastObject(),
                         name)
+                    self.last._addChildName(name)
                 except Exception:
                     if self._streams:
                         self._streams.error(
@@ -187,7 +188,12 @@ class ELink(FElement):
         :returns: directory defined by group names
         :rtype: :obj: `str`
         """
+        # resolved directories are memorized in the tree root
         sp = str(text).split("/")
+        path = "/".join(sp[:-1])
+        res = groupTypes.paths.get(path)
+        if res is not None:
+            return res + "/" + sp[-1]
         res = ""
         ch = groupTypes
         valid = True if ch.name == "root" else False
@@ -225,6 +231,7 @@ class ELink(FElement):
                         raise XMLSettingSyntaxError(
                             "Link creation problem: %s cannot be found"
                             % str(res + "/" + sgr[0]))
+        groupTypes.paths[path] = res
         res = res + "/" + sp[-1]
 
         return res
@@ -79,6 +79,9 @@ class EStrategy(Element):
             if "shuffle" in attrs.keys() and hasattr(self.last, "shuffle"):
                 self.last.shuffle = False \
                     if attrs["shuffle"].upper() == "FALSE" else True
+        if "precompress" in attrs.keys() and hasattr(self.last, "precompress"):
+            self.last.precompress = True \
+                if attrs["precompress"].upper() == "TRUE" else False
 
     def store(self, xml=None, globalJSON=None):
         """ stores the tag content
@@ -0,0 +1,448 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+""" Compiled entry plans of XML configuration strings """
+
+from xml.parsers import expat
+from xml.sax import SAXParseException
+from xml.sax.xmlreader import AttributesImpl, Locator
+
+import collections
+import hashlib
+import threading
+
+from .DataSources import XMLNODES
+from .FetchNameHandler import FetchNameHandler
+
+
+#: (:obj:`list` <:obj:`str`>) tags with inner xml as its input
+INNER_TAGS = ['datasource', 'doc']
+
+
+class EntryPlan(object):
+
+    """ Compiled XML configuration
+
+    :brief: It keeps SAX events of the configuration, i.e.
+            ("start", name, attrs, inner), ("chars", content) and
+            ("end", name), where inner is (inner xml, end index)
+            of the outermost datasource and doc tags
+    """
+
+    def __init__(self, events, streams=None):
+        """ constructor
+
+        :param events: SAX events of the configuration
+        :type events: :obj:`list` <:obj:`tuple`>
+        :param streams: tango-like steamset class
+        :type streams: :class:`StreamSet` or :class:`tango.LatestDeviceImpl`
+        """
+        #: (:obj:`list` <:obj:`tuple`>) SAX events of the configuration
+        self.events = events
+        #: (:obj:`dict` <:obj:`bytes`, :class:`lxml.etree._Element`>) \
+        #:     parsed datasource nodes of the plan, i.e. {inner xml: node}
+        self.nodes = {}
+        #: (:class:`StreamSet` or :class:`tango.LatestDeviceImpl`) stream set
+        self._streams = streams
+        #: (:class:`nxswriter.FetchNameHandler.TNObject`) \
+        #:     tree of TNObjects with group names and types
+        self.__groupTypes = None
+        #: (:class:`threading.Lock`) plan lock
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def fromXML(cls, xml, streams=None):
+        """ compiles the XML configuration
+
+        :param xml: xml configuration string
+        :type xml: :obj:`str`
+        :param streams: tango-like steamset class
+        :type streams: :class:`StreamSet` or :class:`tango.LatestDeviceImpl`
+        :returns: entry plan
+        :rtype: :class:`EntryPlan`
+        """
+        loader = EntryPlanLoader(streams)
+        loader.load(xml)
+        plan = cls(loader.events, streams)
+        plan.__groupTypes = loader.groupTypes
+        return plan
+
+    def __getGroupTypes(self):
+        """ provides tree of group names and types
+
+        :returns: tree of TNObjects with group names and types
+        :rtype: :class:`nxswriter.FetchNameHandler.TNObject`
+        """
+        with self.__lock:
+            if self.__groupTypes is None:
+                fetcher = FetchNameHandler(streams=self._streams)
+                EntryPlanReader(self, inner=False).parse(fetcher)
+                self.__groupTypes = fetcher.groupTypes
+        return self.__groupTypes
+
+    #: (:class:`nxswriter.FetchNameHandler.TNObject`) \
+    #:     tree of TNObjects with group names and types
+    groupTypes = property(__getGroupTypes,
+                          doc='tree of TNObjects with group names and types')
+
+
+class ErrorLocator(Locator):
+
+    """ locator of the xml syntax error
+    """
+
+    def __init__(self, line, column):
+        """ constructor
+
+        :param line: line number of the error
+        :type line: :obj:`int`
+        :param column: column number of the error
+        :type column: :obj:`int`
+        """
+        Locator.__init__(self)
+        #: (:obj:`int`) line number of the error
+        self.__line = line
+        #: (:obj:`int`) column number of the error
+        self.__column = column
+
+    def getLineNumber(self):
+        """ provides line number of the error
+
+        :returns: line number
+        :rtype: :obj:`int`
+        """
+        return self.__line
+
+    def getColumnNumber(self):
+        """ provides column number of the error
+
+        :returns: column number
+        :rtype: :obj:`int`
+        """
+        return self.__column
+
+
+class EntryPlanLoader(object):
+
+    """ Single-pass loader of XML configuration
+
+    :brief: It parses the configuration once with expat building
+            the plan events, the inner xml of datasource and doc tags
+            and the tree of group names and types
+    """
+
+    def __init__(self, streams=None):
+        """ constructor
+
+        :param streams: tango-like steamset class
+        :type streams: :class:`StreamSet` or :class:`tango.LatestDeviceImpl`
+        """
+        #: (:obj:`list` <:obj:`tuple`>) SAX events of the configuration
+        self.events = []
+        #: (:class:`nxswriter.FetchNameHandler.FetchNameHandler`) \
+        #:     group name fetcher
+        self.__fetcher = FetchNameHandler(streams=streams)
+        #: (:obj:`list` <:obj:`int`>) start event indices of open tags
+        self.__starts = []
+        #: (:obj:`int`) start event index of the outermost inner tag
+        self.__inner = None
+
+    def __getGroupTypes(self):
+        """ provides tree of group names and types
+
+        :returns: tree of TNObjects with group names and types
+        :rtype: :class:`nxswriter.FetchNameHandler.TNObject`
+        """
+        return self.__fetcher.groupTypes
+
+    #: (:class:`nxswriter.FetchNameHandler.TNObject`) \
+    #:     tree of TNObjects with group names and types
+    groupTypes = property(__getGroupTypes,
+                          doc='tree of TNObjects with group names and types')
+
+    def load(self, xml):
+        """ loads the XML configuration
+
+        :brief: Syntax errors are reported as
+                :exc:`xml.sax.SAXParseException` like for the SAX parser
+        :param xml: xml configuration string
+        :type xml: :obj:`str`
+        """
+        if not isinstance(xml, bytes):
+            xml = xml.encode('utf-8')
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = self.__startElement
+        parser.EndElementHandler = self.__endElement
+        parser.CharacterDataHandler = self.__characters
+        self.__fetcher.startDocument()
+        try:
+            parser.Parse(xml, True)
+        except expat.ExpatError as e:
+            raise SAXParseException(
+                str(e), e, ErrorLocator(e.lineno, e.offset))
+        self.__fetcher.endDocument()
+
+    def __startElement(self, name, attrs):
+        """ adds the start event
+
+        :param name: tag name
+        :type name: :obj:`str`
+        :param attrs: tag attributes
+        :type attrs: :obj:`dict` <:obj:`str`, :obj:`str`>
+        """
+        index = len(self.events)
+        self.__starts.append(index)
+        if self.__inner is None and name in INNER_TAGS:
+            self.__inner = index
+        self.events.append(("start", name, attrs, None))
+        self.__fetcher.startElement(name, attrs)
+
+    def __endElement(self, name):
+        """ adds the end event
+
+        :param name: tag name
+        :type name: :obj:`str`
+        """
+        start = self.__starts.pop()
+        self.events.append(("end", name))
+        self.__fetcher.endElement(name)
+        if start == self.__inner:
+            self.__inner = None
+            attrs = self.events[start][2]
+            xml = (self.__openTag(name, attrs),
+                   "".join(self.__content(start + 1, len(self.events) - 1)),
+                   "</%s>" % name)
+            self.events[start] = (
+                "start", name, attrs, (xml, len(self.events) - 1))
+
+    def __characters(self, content):
+        """ adds text content
+
+        :param content: text content
+        :type content: :obj:`str`
+        """
+        if self.events[-1][0] == "chars":
+            self.events[-1] = ("chars", self.events[-1][1] + content)
+        else:
+            self.events.append(("chars", content))
+        self.__fetcher.characters(content)
+
+    @classmethod
+    def __replace(cls, string):
+        """ replaces characters not allowed in xml string
+
+        :param string: text
+        :type string: :obj:`str`
+        :returns: converted text with special characters
+        :rtype: :obj:`str`
+        """
+        return string.replace("&", "&amp;").\
+            replace("<", "&lt;").replace(">", "&gt;")
+
+    @classmethod
+    def __openTag(cls, name, attrs):
+        """ creates opening tag
+
+        :param name: tag name
+        :type name: :obj:`str`
+        :param attrs: tag attributes
+        :type attrs: :obj:`dict` <:obj:`str`, :obj:`str`>
+        :returns: opening tag
+        :rtype: :obj:`str`
+        """
+        return "<%s%s>" % (name, "".join(
+            " %s=\"%s\"" % (
+                key, cls.__replace(value).replace("\"", "&quot;").
+                replace("'", "&apos;"))
+            for key, value in attrs.items()))
+
+    def __content(self, start, end):
+        """ provides xml content of events in the InnerXMLHandler format
+
+        :param start: index of the first event
+        :type start: :obj:`int`
+        :param end: index after the last event
+        :type end: :obj:`int`
+        :returns: xml chunks
+        :rtype: :obj:`list` <:obj:`str`>
+        """
+        chunks = []
+        for event in self.events[start:end]:
+            if event[0] == "start":
+                chunks.append(self.__openTag(event[1], event[2]))
+            elif event[0] == "chars":
+                chunks.append(self.__replace(event[1]))
+            else:
+                chunks.append("</%s>" % event[1])
+        return chunks
+
+
+class EntryPlanReader(object):
+
+    """ Reader replaying entry plan to SAX handlers
+    """
+
+    def __init__(self, plan, inner=True):
+        """ constructor
+
+        :param plan: entry plan
+        :type plan: :class:`EntryPlan`
+        :param inner: if precompiled inner xml can be passed
+        :type inner: :obj:`bool`
+        """
+        #: (:class:`EntryPlan`) entry plan
+        self.__plan = plan
+        #: (:obj:`bool`) if precompiled inner xml can be passed
+        self.__inner = inner
+        #: (:class:`xml.sax.handler.ContentHandler`) content handler
+        self.__handler = None
+
+    def setContentHandler(self, handler):
+        """ sets the content handler
+
+        :param handler: content handler
+        :type handler: :class:`xml.sax.handler.ContentHandler`
+        """
+        self.__handler = handler
+
+    def getContentHandler(self):
+        """ provides the content handler
+
+        :returns: content handler
+        :rtype: :class:`xml.sax.handler.ContentHandler`
+        """
+        return self.__handler
+
+    def parse(self, handler=None):
+        """ replays the entry plan
+
+        :brief: Inner xml handlers set by the content handler get
+                the precompiled inner xml instead of the tag events.
+                Datasources set up during the replay keep their parsed
+                xml in the plan
+        :param handler: content handler
+        :type handler: :class:`xml.sax.handler.ContentHandler`
+        """
+        if handler is not None:
+            self.__handler = handler
+        nodes = XMLNODES.attach(self.__plan.nodes)
+        try:
+            self.__replay()
+        finally:
+            XMLNODES.attach(nodes)
+
+    def __replay(self):
+        """ replays the entry plan events
+        """
+        events = self.__plan.events
+        self.__handler.startDocument()
+        index = 0
+        size = len(events)
+        while index < size:
+            event = events[index]
+            handler = self.__handler
+            if event[0] == "start":
+                handler.startElement(event[1], AttributesImpl(event[2]))
+                if self.__inner and event[3] is not None \
+                   and self.__handler is not handler:
+                    self.__handler.xml = event[3][0]
+                    self.__handler = handler
+                    index = event[3][1]
+            elif event[0] == "chars":
+                handler.characters(event[1])
+            else:
+                handler.endElement(event[1])
+            index += 1
+        self.__handler.endDocument()
+
+
+class EntryPlanCache(object):
+
+    """ LRU cache of entry plans
+
+    :brief: Replaying a cached plan skips loading the XML configuration
+            and keeps parsed datasources, but every element is still
+            created by NexusXMLHandler, so it saves only about 10%
+            of openEntry for configurations with thousands of fields
+    """
+
+    def __init__(self, maxsize=32):
+        """ constructor
+
+        :param maxsize: maximal number of cached plans
+        :type maxsize: :obj:`int`
+        """
+        #: (:obj:`int`) maximal number of cached plans
+        self.maxsize = maxsize
+        #: (:class:`collections.OrderedDict` \
+        #:     <:obj:`str`, :class:`EntryPlan`>) cached plans
+        self.__plans = collections.OrderedDict()
+        #: (:class:`threading.Lock`) cache lock
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def key(cls, xml):
+        """ provides the plan key
+
+        :param xml: xml configuration string
+        :type xml: :obj:`str`
+        :returns: sha1 hash of the xml configuration
+        :rtype: :obj:`str`
+        """
+        if not isinstance(xml, bytes):
+            xml = xml.encode('utf-8')
+        return hashlib.sha1(xml).hexdigest()
+
+    def get(self, xml, streams=None):
+        """ provides the compiled entry plan
+
+        :param xml: xml configuration string
+        :type xml: :obj:`str`
+        :param streams: tango-like steamset class
+        :type streams: :class:`StreamSet` or :class:`tango.LatestDeviceImpl`
+        :returns: entry plan
+        :rtype: :class:`EntryPlan`
+        """
+        key = self.key(xml)
+        with self.__lock:
+            plan = self.__plans.pop(key, None)
+            if plan is not None:
+                self.__plans[key] = plan
+                return plan
+        plan = EntryPlan.fromXML(xml, streams)
+        with self.__lock:
+            self.__plans[key] = plan
+            while len(self.__plans) > max(self.maxsize, 0):
+                self.__plans.popitem(last=False)
+        return plan
+
+    def clear(self):
+        """ removes all plans from memory
+        """
+        with self.__lock:
+            self.__plans.clear()
+
+    def __len__(self):
+        """ provides number of cached plans
+
+        :returns: number of cached plans
+        :rtype: :obj:`int`
+        """
+        return len(self.__plans)
@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+""" Provides a cache of HDF5 entry skeletons cloned into new entries """
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from .DataSources import DataSource
+
+try:
+    import h5py
+    #: (:obj:`bool`) True if h5py is installed
+    H5PY_AVAILABLE = True
+except ImportError:
+    H5PY_AVAILABLE = False
+
+
+class TemplateSourcePool(object):
+
+    """ Datasource pool used for building templates
+
+    :brief: It creates placeholder datasources which do not fetch any data
+    """
+
+    def __init__(self, canfail=False):
+        """ constructor
+
+        :param canfail: canfail flag of the writer
+        :type canfail: :obj:`bool`
+        """
+        #: (:obj:`bool`) canfail flag of the writer
+        self.canfail = canfail
+
+    def hasDataSource(self, datasource):
+        """ checks if the datasource is registered
+
+        :param datasource: datasource type
+        :type datasource: :obj:`str`
+        :returns: True for all datasource types
+        :rtype: :obj:`bool`
+        """
+        return True
+
+    def get(self, datasource):
+        """ provides the datasource class
+
+        :param datasource: datasource type
+        :type datasource: :obj:`str`
+        :returns: placeholder datasource class
+        :rtype: :class:`nxswriter.DataSources.DataSource`
+        """
+        return DataSource
+
+
+class EntryTemplateCache(object):
+
+    """ Cache of entry skeletons stored in HDF5 template files
+
+    :brief: Templates are keyed by compiled XML settings without names
+            of their top groups. The cache is used only when
+            its directory is set.
+    """
+
+    #: (:obj:`str`) root attribute with names of the template top groups
+    namesattr = "nexdatas_template_names"
+
+    def __init__(self, directory=None):
+        """ constructor
+
+        :param directory: directory with template files
+        :type directory: :obj:`str`
+        """
+        #: (:obj:`str`) directory with template files
+        self.directory = directory
+        #: (:class:`threading.Lock`) cache lock
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def accepts(cls, target):
+        """ checks if the skeleton can be cloned into the target
+
+        :param target: underlying object of the parent group
+        :type target: any
+        :returns: if the target is an h5py group
+        :rtype: :obj:`bool`
+        """
+        return H5PY_AVAILABLE and isinstance(target, h5py.Group)
+
+    @classmethod
+    def names(cls, plan):
+        """ provides names of the top groups
+
+        :param plan: compiled xml settings
+        :type plan: :class:`nxswriter.EntryPlan.EntryPlan`
+        :returns: names of the top groups
+        :rtype: :obj:`list` <:obj:`str`>
+        """
+        names = []
+        depth = 0
+        for ev in plan.events:
+            if ev[0] == "start":
+                depth += 1
+                if depth == 2 and ev[1] == "group":
+                    names.append(
+                        ev[2].get("name") or ev[2].get("type", "")[2:])
+            elif ev[0] == "end":
+                depth -= 1
+        return names
+
+    @classmethod
+    def static(cls, plan):
+        """ checks if the skeleton does not depend on data
+
+        :brief: Shapes of fields and attributes with datasources and
+                without dimension lengths as well as lengths of dim tags
+                with datasources are read from data
+        :param plan: compiled xml settings
+        :type plan: :class:`nxswriter.EntryPlan.EntryPlan`
+        :returns: if the skeleton can be stored in a template
+        :rtype: :obj:`bool`
+        """
+        tags = []
+        objects = []
+        for ev in plan.events:
+            if ev[0] == "start":
+                parent = tags[-1] if tags else None
+                tags.append(ev[1])
+                if ev[1] in ["field", "attribute"]:
+                    objects.append({"rank": 0, "dims": set(),
+                                    "source": False})
+                elif not objects:
+                    continue
+                elif ev[1] == "dimensions":
+                    try:
+                        objects[-1]["rank"] = int(ev[2].get("rank", 0))
+                    except ValueError:
+                        return False
+                elif ev[1] == "dim" and "value" in ev[2]:
+                    objects[-1]["dims"].add(ev[2].get("index"))
+                elif ev[1] == "datasource":
+                    if parent == "dim":
+                        return False
+                    if parent in ["field", "attribute"]:
+                        objects[-1]["source"] = True
+            elif ev[0] == "end":
+                tags.pop()
+                if ev[1] in ["field", "attribute"]:
+                    obj = objects.pop()
+                    if obj["source"] and obj["rank"] > 0 and \
+                       len(obj["dims"]) < obj["rank"]:
+                        return False
+        return True
+
+    @classmethod
+    def key(cls, plan, extra=()):
+        """ provides the template key
+
+        :brief: Names of the top groups and links, which are not stored
+                in templates, are skipped
+        :param plan: compiled xml settings
+        :type plan: :class:`nxswriter.EntryPlan.EntryPlan`
+        :param extra: other parameters of the skeleton creation
+        :type extra: :obj:`tuple`
+        :returns: sha1 hash of the template content
+        :rtype: :obj:`str`
+        """
+        items = [repr(tuple(extra))]
+        depth = 0
+        link = 0
+        for ev in plan.events:
+            if ev[0] == "start":
+                depth += 1
+                if link or ev[1] == "link":
+                    link += 1
+                    continue
+                attrs = dict(ev[2])
+                if depth == 2 and ev[1] == "group":
+                    attrs.pop("name", None)
+                items.append(repr((
+                    ev[1], sorted(attrs.items()),
+                    tuple(ev[3][0]) if ev[3] is not None else None)))
+            elif ev[0] == "end":
+                depth -= 1
+                if link:
+                    link -= 1
+                    continue
+                items.append(repr(ev[1]))
+            elif not link:
+                items.append(repr(ev[1]))
+        return hashlib.sha1(
+            "\n".join(items).encode('utf-8')).hexdigest()
+
+    def get(self, plan, build, extra=()):
+        """ provides the template file, it builds the missing one
+
+        :param plan: compiled xml settings
+        :type plan: :class:`nxswriter.EntryPlan.EntryPlan`
+        :param build: function creating the skeleton in the given file
+        :type build: :obj:`instancemethod` or :obj:`function`
+        :param extra: other parameters of the skeleton creation
+        :type extra: :obj:`tuple`
+        :returns: template file name or None
+        :rtype: :obj:`str`
+        """
+        if not self.directory or not H5PY_AVAILABLE:
+            return None
+        fname = os.path.join(
+            self.directory, "%s.h5" % self.key(plan, extra))
+        with self.__lock:
+            if os.path.isfile(fname):
+                return fname
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            fd, tmpname = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            os.close(fd)
+            try:
+                build(tmpname)
+                with h5py.File(tmpname, "r+") as fl:
+                    fl.attrs[self.namesattr] = json.dumps(self.names(plan))
+                os.rename(tmpname, fname)
+            finally:
+                if os.path.isfile(tmpname):
+                    os.remove(tmpname)
+        return fname
+
+    @classmethod
+    def copy(cls, filename, names, target):
+        """ copies the template skeleton into the target group
+
+        :param filename: template file name
+        :type filename: :obj:`str`
+        :param names: new names of the template top groups
+        :type names: :obj:`list` <:obj:`str`>
+        :param target: h5py target group
+        :type target: :class:`h5py.Group`
+        :returns: names of the copied objects
+        :rtype: :obj:`list` <:obj:`str`>
+        """
+        copied = []
+        with h5py.File(filename, "r") as fl:
+            tnames = json.loads(fl.attrs[cls.namesattr])
+            tmap = dict(zip(tnames, names))
+            for name in fl.keys():
+                copied.append(tmap.get(name, name))
+                fl.copy(fl[name], target, name=copied[-1])
+        return copied
+
+    def clear(self):
+        """ removes all template files
+        """
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        with self.__lock:
+            for name in os.listdir(self.directory):
+                if name.endswith(".h5"):
+                    os.remove(os.path.join(self.directory, name))
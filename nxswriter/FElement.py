@@ -26,6 +26,7 @@ from .DataHolder import DataHolder
 from .Element import Element
 from .Types import NTP
 from .Errors import (XMLSettingSyntaxError)
+from .ShapeCache import SHAPES
 
 
 class FElement(Element):
@@ -61,6 +62,37 @@ class FElement(Element):
         self.canfail = False
         #: (:obj:`bool`) scalar type
         self._scalar = False
+        #: (:obj:`list` <:obj:`tuple`>) identities of datasources
+        #:     with cached shapes or dimensions of the object
+        self._shapeKeys = []
+        #: (:obj:`list` <:obj:`int`>) data shape expected from the cache
+        self._cachedShape = None
+        #: (:obj:`tuple` <:class:`nxswriter.FileWriter.FTObject`, \
+        #:     :obj:`set` <:obj:`str`>>) H5 object with its child names
+        self.__childNames = None
+
+    def _childNames(self):
+        """ provides names of the H5 object children
+
+        :brief: The names are read once per H5 object and updated
+                by the element classes creating its children
+        :returns: child names
+        :rtype: :obj:`set` <:obj:`str`>
+        """
+        if self.__childNames is None \
+           or self.__childNames[0] is not self.h5Object:
+            self.__childNames = (self.h5Object, set(self.h5Object.names()))
+        return self.__childNames[1]
+
+    def _addChildName(self, name):
+        """ adds the name of a created child to the child names
+
+        :param name: child name
+        :type name: :obj:`str`
+        """
+        if self.__childNames is not None \
+           and self.__childNames[0] is self.h5Object:
+            self.__childNames[1].add(name)
 
     def run(self):
         """ runner
@@ -189,6 +221,8 @@ class FElement(Element):
                     raise XMLSettingSyntaxError(
                         "Too small dimension number")
 
+                if self._shapeKeys:
+                    self._cachedShape = list(shape)
                 if extraD:
                     shape.insert(exDim - 1, 0)
             except Exception:
@@ -198,10 +232,12 @@ class FElement(Element):
                     val = ("".join(self.content)).strip().encode("utf8")
                 found = False
                 if checkData and self.source and self.source.isValid():
-                    data = self.source.getData()
-                    if isinstance(data, dict):
-                        dh = DataHolder(streams=self._streams, **data)
-                        shape = self._reshape(dh.shape, rank, extends,
+                    dshape = self.__sourceShape()
+                    if dshape is not None:
+                        if self._shapeKeys:
+                            self._cachedShape = self._reshape(
+                                dshape, rank, False, False, 0)
+                        shape = self._reshape(dshape, rank, extends,
                                               extraD, exDim)
                         if shape is not None:
                             found = True
@@ -226,6 +262,51 @@ class FElement(Element):
             self._scalar = True
         return shape
 
+    def __sourceShape(self):
+        """ provides shape of the datasource data
+
+        :brief: Shapes of datasources with an identity are taken from
+                the shape cache and stored there after a live read
+        :returns: data shape or None
+        :rtype: :obj:`list` <:obj:`int` >
+        """
+        identity = self.source.identity() \
+            if hasattr(self.source, "identity") else None
+        if identity is not None:
+            shape = SHAPES.get(identity)
+            if shape is not None:
+                self._shapeKeys.append(identity)
+                return shape
+        data = self.source.getData()
+        if not isinstance(data, dict):
+            return None
+        dh = DataHolder(streams=self._streams, **data)
+        if identity is not None and dh.shape is not None:
+            self._shapeKeys.append(identity)
+            SHAPES.set(identity, [int(s) for s in dh.shape])
+        return dh.shape
+
+    def _checkShape(self, holder):
+        """ invalidates cached shapes which do not match the data
+
+        :param holder: data holder
+        :type holder: :class:`nxswriter.DataHolder.DataHolder`
+        """
+        if self._cachedShape is None or holder.shape is None:
+            return
+        if self._reshape(holder.shape, 0, False, False, 0) \
+                != self._cachedShape:
+            for identity in self._shapeKeys:
+                SHAPES.discard(identity)
+            if self._streams:
+                self._streams.debug(
+                    "FElement::_checkShape() - cached shape %s of %s "
+                    "does not match data shape %s" % (
+                        self._cachedShape, self._tagAttrs.get("name"),
+                        list(holder.shape)))
+            self._shapeKeys = []
+            self._cachedShape = None
+
     def setMessage(self, exceptionMessage=None):
         """ creates the error message
 
@@ -257,7 +338,7 @@ class FElementWithAttr(FElement):
     """
 
     def __init__(self, name, attrs, last, h5object=None, streams=None,
-                 reloadmode=False):
+                 reloadmode=False, template=False):
         """ constructor
 
         :param name: tag name
@@ -272,6 +353,8 @@ class FElementWithAttr(FElement):
         :type streams: :class:`StreamSet` or :class:`tango.LatestDeviceImpl`
         :param reloadmode: reload mode
         :type reloadmode: :obj:`bool`
+        :param template: if the object is opened from a cloned entry template
+        :type template: :obj:`bool`
         """
 
         FElement.__init__(self, name, attrs, last, h5object, streams=streams)
@@ -284,6 +367,9 @@ class FElementWithAttr(FElement):
         self.__h5Instances = {}
         #: (:obj:`bool`) reload mode
         self._reloadmode = reloadmode
+        #: (:obj:`bool`) the object is opened from a cloned entry template
+        #:     with all its attributes already written
+        self._template = template
 
     def _setValue(self, rank, val):
         """ creates DataHolder with given rank and value
@@ -327,20 +413,22 @@ class FElementWithAttr(FElement):
         :brief: It creates attributes instances which have been
                 stored in tagAttributes dictionary
         """
+        h5attrs = None
         for key in self.tagAttributes.keys():
             if key not in ["name", "type"]:
                 if sys.version_info > (3,):
                     ekey = key
                 else:
                     ekey = key.encode()
+                if self._template:
+                    self.__h5Instances[ekey] = self.h5Object.attributes[ekey]
+                    continue
                 if self._reloadmode:
-                    fat = None
-                    for at in self.h5Object.attributes:
-                        if at.name == key:
-                            self.__h5Instances[ekey] = fat = at
-                            break
-                    if fat:
-                        fat = None
+                    if h5attrs is None:
+                        h5attrs = dict(
+                            (at.name, at) for at in self.h5Object.attributes)
+                    if key in h5attrs:
+                        self.__h5Instances[ekey] = h5attrs[key]
                         continue
 
                 if len(self.tagAttributes[key]) < 3:
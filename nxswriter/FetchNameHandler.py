@@ -46,16 +46,94 @@ class TNObject(object):
         :type parent: :class:`nxswriter.Element.Element`
         """
         #: (:obj:`str`) object name
-        self.name = name
+        self.__name = name
         #: (:obj:`str`) object Nexus type
-        self.nxtype = nxtype
+        self.__nxtype = nxtype
         #:  (:class:`nxswriter.Element.Element`) object parent
         self.parent = weakref.ref(parent) if parent else lambda: None
         #: (:obj`:list` <:class:`nxswriter.Element.Element`>) object children
         self.children = []
+        #: (:obj:`tuple` <:obj:`int`, :obj:`dict`, :obj:`dict`>) \
+        #:    number of indexed children with first children
+        #:    by name and by nxtype
+        self.__index = None
+        #: (:obj:`dict` <:obj:`str`, :obj:`str`>) \
+        #:    memo of resolved paths, i.e. {path: resolved path}
+        self.paths = {}
 
         if hasattr(self.parent(), "children"):
             self.parent().children.append(self)
+            self.parent()._reindex()
+
+    def __getName(self):
+        """ get method for name attribute
+
+        :returns: object name
+        :rtype: :obj:`str`
+        """
+        return self.__name
+
+    def __setName(self, name):
+        """ set method for name attribute
+
+        :param name: object name
+        :type name: :obj:`str`
+        """
+        self.__name = name
+        if self.parent() is not None:
+            self.parent()._reindex()
+
+    #: (:obj:`str`) object name
+    name = property(__getName, __setName, doc='object name')
+
+    def __getNXType(self):
+        """ get method for nxtype attribute
+
+        :returns: object Nexus type
+        :rtype: :obj:`str`
+        """
+        return self.__nxtype
+
+    def __setNXType(self, nxtype):
+        """ set method for nxtype attribute
+
+        :param nxtype: object Nexus type
+        :type nxtype: :obj:`str`
+        """
+        self.__nxtype = nxtype
+        if self.parent() is not None:
+            self.parent()._reindex()
+
+    #: (:obj:`str`) object Nexus type
+    nxtype = property(__getNXType, __setNXType, doc='object Nexus type')
+
+    def _reindex(self):
+        """ drops the child index and the path memo of the whole tree
+
+        :brief: It is called when a child is added or renamed
+        """
+        self.__index = None
+        obj = self
+        while obj is not None:
+            obj.paths.clear()
+            obj = obj.parent()
+
+    def __indexes(self):
+        """ provides the child indexes
+
+        :brief: The first child wins for repeated names and types
+                as for the linear search
+        :returns: children by name and children by nxtype
+        :rtype: (:obj:`dict`, :obj:`dict`)
+        """
+        if self.__index is None or self.__index[0] != len(self.children):
+            names = {}
+            types = {}
+            for ch in self.children:
+                names.setdefault(ch.name, ch)
+                types.setdefault(ch.nxtype, ch)
+            self.__index = (len(self.children), names, types)
+        return self.__index[1:]
 
     def child(self, name='', nxtype=''):
         """ get child by name or nxtype
@@ -68,19 +146,9 @@ class TNObject(object):
         :rtype: :class:`nxswriter.Element.Element`
         """
         if name:
-            found = None
-            for ch in self.children:
-                if ch.name == name.strip():
-                    found = ch
-                    break
-            return found
+            return self.__indexes()[0].get(name.strip())
         elif nxtype:
-            found = None
-            for ch in self.children:
-                if ch.nxtype == nxtype:
-                    found = ch
-                    break
-            return found
+            return self.__indexes()[1].get(nxtype)
         else:
             if len(self.children) > 0:
                 return self.children[0]
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+""" Provides policies of flushing files after records """
+
+import time
+
+
+class FlushPolicy(object):
+
+    """ Policy deciding which records are flushed
+
+    :brief: The policy is set by writer url parameters, i.e.
+            h5py?flush=step&flushsteps=10&flushtime=5.
+            Its modes are:
+            'step' - every `flushsteps` records or after `flushtime` seconds,
+            'trigger' - records with triggers,
+            'swmr' - every record of files opened in the SWMR mode,
+            'entry' - only on opening and closing entries
+    """
+
+    #: (:obj:`list` <:obj:`str`>) policy modes
+    modes = ["step", "trigger", "swmr", "entry"]
+
+    #: (:obj:`list` <:obj:`str`>) writer url parameters of the policy
+    keys = ["flush", "flushsteps", "flushtime"]
+
+    def __init__(self, mode="step", steps=1, seconds=0, swmr=False):
+        """ constructor
+
+        :param mode: policy mode
+        :type mode: :obj:`str`
+        :param steps: number of records between flushes in the step mode
+        :type steps: :obj:`int`
+        :param seconds: maximal time between flushes in the step mode
+        :type seconds: :obj:`float`
+        :param swmr: if the file is opened in the SWMR mode
+        :type swmr: :obj:`bool`
+        """
+        if mode not in self.modes:
+            raise ValueError(
+                "FlushPolicy::__init__() - Unknown flush mode: %s" % mode)
+        #: (:obj:`str`) policy mode
+        self.mode = mode
+        #: (:obj:`int`) number of records between flushes in the step mode
+        self.steps = int(steps)
+        #: (:obj:`float`) maximal time between flushes in the step mode
+        self.seconds = float(seconds)
+        #: (:obj:`bool`) if the file is opened in the SWMR mode
+        self.swmr = bool(swmr)
+        #: (:obj:`int`) number of records after the last flush
+        self.__records = 0
+        #: (:obj:`float`) time of the last flush
+        self.__last = time.time()
+        #: (:obj:`int`) number of flushes
+        self.count = 0
+        #: (:obj:`float`) time spent on flushing in seconds
+        self.time = 0.0
+
+    @classmethod
+    def fromParams(cls, pars):
+        """ creates the policy from writer url parameters
+
+        :brief: The policy parameters are removed from the dictionary
+        :param pars: writer url parameters
+        :type pars: :obj:`dict` < :obj:`str`, any>
+        :returns: flush policy
+        :rtype: :class:`FlushPolicy`
+        """
+        mode, steps, seconds = [pars.pop(key, None) for key in cls.keys]
+        return cls(mode or "step",
+                   1 if steps in [None, ""] else steps,
+                   seconds or 0,
+                   pars.get("swmr", False))
+
+    def reset(self):
+        """ resets record counters and the flush time
+        """
+        self.__records = 0
+        self.__last = time.time()
+        self.count = 0
+        self.time = 0.0
+
+    def record(self, triggers=None):
+        """ counts the record and checks if it has to be flushed
+
+        :param triggers: triggers of the record
+        :type triggers: :obj:`list` <:obj:`str`>
+        :returns: if the record has to be flushed
+        :rtype: :obj:`bool`
+        """
+        self.__records += 1
+        if self.mode == "step":
+            return (self.steps > 0 and self.__records >= self.steps) or \
+                (self.seconds > 0 and
+                 time.time() - self.__last >= self.seconds)
+        if self.mode == "trigger":
+            return bool(triggers)
+        if self.mode == "swmr":
+            return self.swmr
+        return False
+
+    def flush(self, *files):
+        """ flushes files and measures the flush time
+
+        :param files: files to flush
+        :type files: :obj:`list` <:class:`nxswriter.FileWriter.FTFile`>
+        :returns: flush time in seconds
+        :rtype: :obj:`float`
+        """
+        st = time.time()
+        for fl in files:
+            if fl is not None and hasattr(fl, "flush"):
+                fl.flush()
+        self.__last = time.time()
+        self.__records = 0
+        dt = self.__last - st
+        self.count += 1
+        self.time += dt
+        return dt
@@ -22,6 +22,7 @@
 from .Element import Element
 from .FElement import FElement
 from .DataHolder import DataHolder
+from .ShapeCache import SHAPES
 
 
 class EFile(FElement):
@@ -165,12 +166,35 @@ class EDim(Element):
         :     :obj:`dict` <:obj:`str`, :obj:`dict` <:obj:`str`, any>>
         """
         if self.__index is not None and self.source:
+            identity = self.source.identity() \
+                if hasattr(self.source, "identity") else None
+            if identity is not None:
+                identity = ("dim",) + tuple(identity)
+                length = SHAPES.get(identity)
+                if length is not None:
+                    self.__setLength(length, identity)
+                    return
             dt = self.source.getData()
             if dt and isinstance(dt, dict):
                 dh = DataHolder(streams=self._streams, **dt)
                 if dh:
-                    self._beforeLast().lengths[self.__index] = str(
-                        dh.cast("string"))
+                    length = str(dh.cast("string"))
+                    if identity is not None:
+                        SHAPES.set(identity, length)
+                    self.__setLength(length, identity)
+
+    def __setLength(self, length, identity=None):
+        """ sets the dimension length of the field
+
+        :param length: dimension length
+        :type length: :obj:`str`
+        :param identity: identity of the cached length
+        :type identity: :obj:`tuple`
+        """
+        field = self._beforeLast()
+        field.lengths[self.__index] = length
+        if identity is not None and hasattr(field, "_shapeKeys"):
+            field._shapeKeys.append(identity)
 
 
 class EFilter(Element):
@@ -56,8 +56,8 @@ class InnerXMLHandler(sax.ContentHandler):
         self.__preXML = self.__openTag(name, attrs, eol=False)
         #: (:obj:`str`) last tag
         self.__postXML = "</%s>" % name
-        #: (:obj:`str`) tag content
-        self.__contentXML = ""
+        #: (:obj:`list` <:obj:`str`>) chunks of tag content
+        self.__contentXML = []
 
     @classmethod
     def __replace(cls, string):
@@ -112,7 +112,7 @@ class InnerXMLHandler(sax.ContentHandler):
         :type attrs: :obj:`dict` <:obj:`str`, :obj:`str`>
         """
         self.__depth += 1
-        self.__contentXML += self.__openTag(name, attrs)
+        self.__contentXML.append(self.__openTag(name, attrs))
 
     def characters(self, content):
         """ adds the tag content
@@ -120,7 +120,7 @@ class InnerXMLHandler(sax.ContentHandler):
         :param content: partial content of the tag
         :type content: :obj:`str`
         """
-        self.__contentXML += self.__replace(content)
+        self.__contentXML.append(self.__replace(content))
 
     def endElement(self, name):
         """ parses an closing tag
@@ -130,7 +130,8 @@ class InnerXMLHandler(sax.ContentHandler):
         """
         self.__depth -= 1
         if self.__depth == 0:
-            self.xml = (self.__preXML, self.__contentXML, self.__postXML)
+            self.xml = (self.__preXML, "".join(self.__contentXML),
+                        self.__postXML)
             self.__xmlReader().setContentHandler(self.__contentHandler())
         else:
-            self.__contentXML += "</%s>" % name
+            self.__contentXML.append("</%s>" % name)
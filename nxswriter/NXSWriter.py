@@ -206,6 +206,8 @@ class NXSDataWriter(tango.LatestDeviceImpl):
         self.get_device_properties(self.get_device_class())
         self.tdw.defaultCanFail = bool(self.DefaultCanFail)
         self.tdw.addingLogs = bool(self.AddingLogs)
+        self.tdw.shapes.directory = self.ShapeCacheDirectory or None
+        self.tdw.templates.directory = self.EntryTemplateDirectory or None
 
     def set_state(self, state):
         """set_state method
@@ -262,6 +264,15 @@ class NXSDataWriter(tango.LatestDeviceImpl):
         self.debug_stream("In read_CurrentFileId()")
         attr.set_value(self.tdw.currentfileid)
 
+    def read_FlushTime(self, attr):
+        """ Read FlushTime
+
+        :param attr: attribute object
+        :type attr: :class:`tango.Attribute`
+        """
+        self.debug_stream("In read_FlushTime()")
+        attr.set_value(self.tdw.flushtime)
+
     def read_XMLSettings(self, attr):
         """ Read XMLSettings attribute
 
@@ -508,6 +519,150 @@ class NXSDataWriter(tango.LatestDeviceImpl):
             return False
         return True
 
+    def read_BytesPerFile(self, attr):
+        """ Read BytesPerFile attribute
+
+        :param attr: attribute object
+        :type attr: :class:`tango.Attribute`
+        """
+        self.debug_stream("In read_BytesPerFile()")
+
+        attr.set_value(self.tdw.bytesperfile)
+
+    def write_BytesPerFile(self, attr):
+        """ Write BytesPerFile attribute
+
+        :param attr: attribute object
+        :type attr: :class:`tango.Attribute`
+        """
+        self.debug_stream("In write_BytesPerFile()")
+        if self.is_BytesPerFile_write_allowed():
+            self.tdw.bytesperfile = attr.get_write_value()
+        else:
+            self.warn_stream(
+                "To change the file size limit please close the file.")
+            raise Exception(
+                "To change the file size limit please close the file.")
+
+    def is_BytesPerFile_write_allowed(self):
+        """ BytesPerFile attribute Write State Machine
+
+        :returns: True if the operation allowed
+        :rtype: :obj:`bool`
+        """
+        if self.get_state() in [tango.DevState.OFF,
+                                tango.DevState.EXTRACT,
+                                tango.DevState.OPEN,
+                                tango.DevState.RUNNING]:
+            return False
+        return True
+
+    def is_BytesPerFile_allowed(self, _):
+        """BytesPerFile attribute State Machine
+
+        :returns: True if the operation allowed
+        :rtype: :obj:`bool`
+        """
+        if self.get_state() in [tango.DevState.OFF]:
+            return False
+        return True
+
+    def read_SecondsPerFile(self, attr):
+        """ Read SecondsPerFile attribute
+
+        :param attr: attribute object
+        :type attr: :class:`tango.Attribute`
+        """
+        self.debug_stream("In read_SecondsPerFile()")
+
+        attr.set_value(self.tdw.secondsperfile)
+
+    def write_SecondsPerFile(self, attr):
+        """ Write SecondsPerFile attribute
+
+        :param attr: attribute object
+        :type attr: :class:`tango.Attribute`
+        """
+        self.debug_stream("In write_SecondsPerFile()")
+        if self.is_SecondsPerFile_write_allowed():
+            self.tdw.secondsperfile = attr.get_write_value()
+        else:
+            self.warn_stream(
+                "To change the file time limit please close the file.")
+            raise Exception(
+                "To change the file time limit please close the file.")
+
+    def is_SecondsPerFile_write_allowed(self):
+        """ SecondsPerFile attribute Write State Machine
+
+        :returns: True if the operation allowed
+        :rtype: :obj:`bool`
+        """
+        if self.get_state() in [tango.DevState.OFF,
+                                tango.DevState.EXTRACT,
+                                tango.DevState.OPEN,
+                                tango.DevState.RUNNING]:
+            return False
+        return True
+
+    def is_SecondsPerFile_allowed(self, _):
+        """SecondsPerFile attribute State Machine
+
+        :returns: True if the operation allowed
+        :rtype: :obj:`bool`
+        """
+        if self.get_state() in [tango.DevState.OFF]:
+            return False
+        return True
+
+    def read_VirtualMaster(self, attr):
+        """ Read VirtualMaster attribute
+
+        :param attr: attribute object
+        :type attr: :class:`tango.Attribute`
+        """
+        self.debug_stream("In read_VirtualMaster()")
+
+        attr.set_value(self.tdw.virtualmaster)
+
+    def write_VirtualMaster(self, attr):
+        """ Write VirtualMaster attribute
+
+        :param attr: attribute object
+        :type attr: :class:`tango.Attribute`
+        """
+        self.debug_stream("In write_VirtualMaster()")
+        if self.is_VirtualMaster_write_allowed():
+            self.tdw.virtualmaster = bool(attr.get_write_value())
+        else:
+            self.warn_stream(
+                "To change the virtual master mode please close the file.")
+            raise Exception(
+                "To change the virtual master mode please close the file.")
+
+    def is_VirtualMaster_write_allowed(self):
+        """ VirtualMaster attribute Write State Machine
+
+        :returns: True if the operation allowed
+        :rtype: :obj:`bool`
+        """
+        if self.get_state() in [tango.DevState.OFF,
+                                tango.DevState.EXTRACT,
+                                tango.DevState.OPEN,
+                                tango.DevState.RUNNING]:
+            return False
+        return True
+
+    def is_VirtualMaster_allowed(self, _):
+        """VirtualMaster attribute State Machine
+
+        :returns: True if the operation allowed
+        :rtype: :obj:`bool`
+        """
+        if self.get_state() in [tango.DevState.OFF]:
+            return False
+        return True
+
     def read_Errors(self, attr):
         """ Read Errors attribute
 
@@ -867,6 +1022,14 @@ class NXSDataWriterClass(tango.DeviceClass):
         [tango.DevString,
          "metadata output",
          [""]],
+        'ShapeCacheDirectory':
+        [tango.DevString,
+         "directory with persistent shapes discovered from datasources",
+         [""]],
+        'EntryTemplateDirectory':
+        [tango.DevString,
+         "directory with HDF5 entry skeletons cloned into new entries",
+         [""]],
     }
 
     #: (:obj:`dict` <:obj:`str`, \
@@ -964,6 +1127,15 @@ class NXSDataWriterClass(tango.DeviceClass):
              'label': "Current file id",
              'description': "current file id",
         }],
+        'FlushTime':
+        [[tango.DevDouble,
+          tango.SCALAR,
+          tango.READ],
+         {
+             'label': "Flush time",
+             'description': "time spent on flushing the current entry "
+             "in seconds",
+        }],
         'StepsPerFile':
         [[tango.DevLong,
           tango.SCALAR,
@@ -973,6 +1145,35 @@ class NXSDataWriterClass(tango.DeviceClass):
              'description': "Number of steps per file",
              'Memorized': "true"
         }],
+        'BytesPerFile':
+        [[tango.DevLong64,
+          tango.SCALAR,
+          tango.READ_WRITE],
+         {
+             'label': "Bytes per file",
+             'description': "Maximal size of split files in bytes",
+             'Memorized': "true"
+        }],
+        'SecondsPerFile':
+        [[tango.DevDouble,
+          tango.SCALAR,
+          tango.READ_WRITE],
+         {
+             'label': "Seconds per file",
+             'description': "Maximal writing time of split files "
+             "in seconds",
+             'Memorized': "true"
+        }],
+        'VirtualMaster':
+        [[tango.DevBoolean,
+          tango.SCALAR,
+          tango.READ_WRITE],
+         {
+             'label': "Virtual master file",
+             'description': "Split files contain only STEP fields "
+             "exposed by virtual datasets of the master file",
+             'Memorized': "true"
+        }],
     }
 
     def __init__(self, name):
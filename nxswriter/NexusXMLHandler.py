@@ -47,7 +47,8 @@ class NexusXMLHandler(sax.ContentHandler):
 
     def __init__(self, fileElement, datasources=None, decoders=None,
                  groupTypes=None, parser=None, globalJSON=None,
-                 streams=None, reloadmode=False):
+                 streams=None, reloadmode=False, template=False,
+                 links=None):
         """ constructor
 
         :brief: It constructs parser and defines the H5 output file
@@ -68,6 +69,11 @@ class NexusXMLHandler(sax.ContentHandler):
         :type streams: :class:`StreamSet` or :class:`tango.LatestDeviceImpl`
         :param reloadmode: reload mode
         :type reloadmode: :obj: `bool`
+        :param template: if groups and fields are opened from
+                         a cloned entry template
+        :type template: :obj: `bool`
+        :param links: if links are created, by default if not in reload mode
+        :type links: :obj: `bool`
         """
         sax.ContentHandler.__init__(self)
         #: (:class:`nxswriter.TNObject`) map of NXclass : name
@@ -112,6 +118,10 @@ class NexusXMLHandler(sax.ContentHandler):
 
         #: (:obj:`bool`) reload mode
         self.__reloadmode = reloadmode
+        #: (:obj:`bool`) groups and fields opened from a cloned entry template
+        self.__template = template
+        #: (:obj:`bool`) if links are created
+        self.__links = (not reloadmode) if links is None else links
 
         #: (:obj:`dict` <:obj:`str`, :obj:`type` > ) \
         #: map of tag names to related classes
@@ -222,13 +232,14 @@ class NexusXMLHandler(sax.ContentHandler):
                 self.__parser().setContentHandler(self.__innerHandler)
                 self.__inner = True
             elif name in self.withAttr:
+                kwargs = {"template": True} if self.__template else {}
                 self.__stack.append(
                     self.elementClass[name](
                         attrs, self.__last(),
                         streams=StreamSet(
                             weakref.ref(self._streams)
                             if self._streams else None),
-                        reloadmode=self.__reloadmode))
+                        reloadmode=self.__reloadmode, **kwargs))
             elif name in self.elementClass:
                 self.__stack.append(
                     self.elementClass[name](
@@ -279,7 +290,7 @@ class NexusXMLHandler(sax.ContentHandler):
                 if res:
                     self.__addToPool(res, self.__last())
             if hasattr(self.__last(), "createLink") and \
-               callable(self.__last().createLink) and not self.__reloadmode:
+               callable(self.__last().createLink) and self.__links:
                 self.__last().createLink(self.__groupTypes)
             self.__stack.pop()
         elif name not in self.transparentTags:
@@ -21,15 +21,136 @@
 
 import threading
 import copy
+import hashlib
+import re
 import sys
-import xml.etree.ElementTree as et
-from lxml.etree import XMLParser
+
+import numpy
+
+if sys.version_info > (3,):
+    import queue as Queue
+else:
+    import Queue
 
 from .Types import NTP
 
 from .DataHolder import DataHolder
 from .DataSources import DataSource
 from .Errors import DataSourceSetupError
+from .ClientSource import ClientSource
+
+
+#: (:obj:`dict` <:obj:`str`, :obj:`code`>) \
+#:     compiled scripts, i.e. {script hash: code object}
+_codes = {}
+
+#: (:class:`threading.Lock`) lock for compiled scripts
+_codesLock = threading.Lock()
+
+
+def _compile(script):
+    """ compiles the script or provides its cached code object
+
+    :param script: python script
+    :type script: :obj:`str`
+    :returns: compiled script
+    :rtype: :obj:`code`
+    """
+    key = hashlib.sha1(script.encode("utf-8")).hexdigest()
+    code = _codes.get(key)
+    if code is None:
+        code = compile(script, "<PYEVAL>", "exec")
+        with _codesLock:
+            code = _codes.setdefault(key, code)
+    return code
+
+
+#: (:class:`re.Pattern`) commonblock items with literal keys
+_commonKeys = re.compile(
+    r"""commonblock\s*\[\s*(?:"([^"]*)"|'([^']*)')\s*\]"""
+    r"""|(?:"([^"]*)"|'([^']*)')\s+(?:not\s+)?in\s+commonblock\b""")
+
+
+def _commonblockKeys(script):
+    """ provides commonblock keys used by the script
+
+    :param script: python script
+    :type script: :obj:`str`
+    :returns: sorted commonblock keys or None if the script
+              accesses the commonblock not only by literal keys
+    :rtype: :obj:`list` <:obj:`str`>
+    """
+    keys = set()
+    found = 0
+    for match in _commonKeys.finditer(script):
+        keys.add([gr for gr in match.groups() if gr is not None][0])
+        found += 1
+    if found != len(re.findall(r"\bcommonblock\b", script)):
+        return None
+    return sorted(keys)
+
+
+class SharedLock(object):
+
+    """ Lock with shared and exclusive modes
+    """
+
+    def __init__(self):
+        """ constructor
+
+        :brief: It creates an unlocked lock
+        """
+        #: (:class:`threading.Condition`) lock condition
+        self.__condition = threading.Condition(threading.Lock())
+        #: (:obj:`int`) number of shared owners
+        self.__shared = 0
+        #: (:obj:`bool`) True if acquired in exclusive mode
+        self.__exclusive = False
+        #: (:obj:`int`) number of threads waiting for exclusive mode
+        self.__waiting = 0
+
+    def acquireShared(self):
+        """ acquires the lock in shared mode
+        """
+        with self.__condition:
+            while self.__exclusive or self.__waiting:
+                self.__condition.wait()
+            self.__shared += 1
+
+    def releaseShared(self):
+        """ releases the lock acquired in shared mode
+        """
+        with self.__condition:
+            self.__shared -= 1
+            if not self.__shared:
+                self.__condition.notify_all()
+
+    def acquire(self):
+        """ acquires the lock in exclusive mode
+        """
+        with self.__condition:
+            self.__waiting += 1
+            while self.__exclusive or self.__shared:
+                self.__condition.wait()
+            self.__waiting -= 1
+            self.__exclusive = True
+
+    def release(self):
+        """ releases the lock acquired in exclusive mode
+        """
+        with self.__condition:
+            self.__exclusive = False
+            self.__condition.notify_all()
+
+    def __enter__(self):
+        """ acquires the lock in exclusive mode
+        """
+        self.acquire()
+
+    def __exit__(self, *args):
+        """ releases the lock acquired in exclusive mode
+        """
+        self.release()
 
 
 class Variables(object):
@@ -38,6 +159,137 @@ class Variables(object):
     """
 
 
+class InputFetcher(object):
+
+    """ Runnable fetching data of PyEval input datasource
+    """
+
+    def __init__(self, source, streams=None):
+        """ constructor
+
+        :param source: input datasource
+        :type source: :class:`nxswriter.DataSources.DataSource`
+        :param streams: tango-like steamset class
+        :type streams: :class:`StreamSet` or :class:`tango.LatestDeviceImpl`
+        """
+        #: (:class:`nxswriter.DataSources.DataSource`) input datasource
+        self.source = source
+        #: (any) fetched value
+        self.value = None
+        #: (:obj:`Exception`) exception raised during fetching
+        self.exception = None
+        #: (:class:`StreamSet` or :class:`tango.LatestDeviceImpl`) stream set
+        self._streams = streams
+
+    def run(self):
+        """ fetches the data
+
+        :brief: The exception raised by the datasource is kept
+                to be raised in the calling thread
+        """
+        self.value = None
+        self.exception = None
+        try:
+            dt = self.source.getData()
+            if dt:
+                dh = DataHolder(streams=self._streams, **dt)
+                if dh and hasattr(dh, "value"):
+                    self.value = dh.value
+                # data shared with other consumers
+                if isinstance(self.value, numpy.ndarray) and \
+                   not self.value.flags.writeable:
+                    self.value = self.value.copy()
+        except Exception as e:
+            self.exception = e
+
+
+class InputWorkers(object):
+
+    """ Bounded pool of worker threads fetching PyEval inputs
+
+    :brief: Worker threads are started on demand and shared
+            by all PyEval datasources
+    """
+
+    def __init__(self, size=8):
+        """ constructor
+
+        :param size: maximal number of worker threads
+        :type size: :obj:`int`
+        """
+        #: (:obj:`int`) maximal number of worker threads
+        self.size = size
+        #: (:class:`Queue.Queue`) queue with fetchers to run
+        self.__queue = Queue.Queue()
+        #: (:obj:`list` <:class:`threading.Thread`>) worker threads
+        self.__threads = []
+        #: (:class:`threading.Lock`) lock of starting threads
+        self.__lock = threading.Lock()
+        #: (:class:`threading.local`) marks worker threads
+        self.__local = threading.local()
+
+    def __getThreads(self):
+        """ get method for threads attribute
+
+        :returns: number of started worker threads
+        :rtype: :obj:`int`
+        """
+        return len(self.__threads)
+
+    #: (:obj:`int`) number of started worker threads
+    threads = property(__getThreads,
+                       doc='number of started worker threads')
+
+    def __start(self, count):
+        """ starts missing worker threads
+
+        :param count: number of required worker threads
+        :type count: :obj:`int`
+        """
+        with self.__lock:
+            while len(self.__threads) < min(count, self.size):
+                th = threading.Thread(target=self.__work)
+                th.daemon = True
+                th.start()
+                self.__threads.append(th)
+
+    def __work(self):
+        """ worker thread runner
+        """
+        self.__local.worker = True
+        while True:
+            fetcher, done = self.__queue.get()
+            try:
+                fetcher.run()
+            finally:
+                done.release()
+
+    def run(self, fetchers):
+        """ runs fetchers and waits for them
+
+        :brief: The calling thread runs the first fetcher. Fetchers
+                of inputs called from worker threads are run inline
+        :param fetchers: input fetchers
+        :type fetchers: :obj:`list` <:class:`InputFetcher`>
+        """
+        if len(fetchers) < 2 or self.size < 1 or \
+           getattr(self.__local, "worker", False):
+            for fetcher in fetchers:
+                fetcher.run()
+            return
+        self.__start(len(fetchers) - 1)
+        done = threading.Semaphore(0)
+        for fetcher in fetchers[1:]:
+            self.__queue.put((fetcher, done))
+        fetchers[0].run()
+        for _ in fetchers[1:]:
+            done.acquire()
+
+
+#: (:class:`InputWorkers`) worker threads shared by PyEval datasources
+WORKERS = InputWorkers()
+
+
 class PyEvalSource(DataSource):
 
     """ Python Eval data source
@@ -72,12 +324,19 @@ class PyEvalSource(DataSource):
         self.__datasources = {}
         #: (:obj:`str`) python script
         self.__script = ""
+        #: (:obj:`code`) compiled python script
+        self.__code = None
         #: (:obj:`bool`) True if common block used
         self.__commonblock = False
         #: (:obj:`bool`) True if counter used
         self.__counter = False
-        #: (:class:`threading.Lock`) lock for common block
+        #: (:class:`SharedLock`) lock for common block
         self.__lock = None
+        #: (:obj:`list` <:obj:`str`>) commonblock keys used by the script
+        #:    or None if the whole commonblock has to be locked
+        self.__keys = None
+        #: (:obj:`list` <:class:`threading.Lock`>) locks of commonblock keys
+        self.__keylocks = []
         #: (:obj:`dict` <:obj:`str`, any> ) \
         #:    common block variables
         self.__common = None
@@ -101,7 +360,7 @@ class PyEvalSource(DataSource):
 
         if sys.version_info > (3,):
             xml = bytes(xml, "UTF-8")
-        root = et.fromstring(xml, parser=XMLParser(collect_ids=False))
+        root = self._parse(xml)
         mds = root.find("datasource")
         inputs = []
         if mds is not None:
@@ -153,10 +412,27 @@ class PyEvalSource(DataSource):
                 "PyEvalSource::setup() - "
                 "PyEval script %s not defined" % self.__name)
 
+        try:
+            self.__code = _compile(self.__script.strip())
+        except Exception as e:
+            if self._streams:
+                self._streams.error(
+                    "PyEvalSource::setup() - "
+                    "PyEval script %s cannot be compiled: %s"
+                    % (self.__name, str(e)),
+                    std=False)
+
+            raise DataSourceSetupError(
+                "PyEvalSource::setup() - "
+                "PyEval script %s cannot be compiled: %s"
+                % (self.__name, str(e)))
+
         if "commonblock" in self.__script:
             self.__commonblock = True
+            self.__keys = _commonblockKeys(self.__script)
         else:
             self.__commonblock = False
+            self.__keys = None
 
     def __str__(self):
         """ self-description
@@ -205,27 +481,35 @@ class PyEvalSource(DataSource):
             self.__pool.common['PYEVAL']["common"]["__counter__"] = \
                 self.__pool.counter
         ds = Variables()
-        for name, source in self.__datasources.items():
-            if name in self.__script:
-                dt = source.getData()
-                value = None
-                if dt:
-                    dh = DataHolder(streams=self._streams, **dt)
-                    if dh and hasattr(dh, "value"):
-                        value = dh.value
-                setattr(ds, name, value)
+        fetchers = dict(
+            (name, InputFetcher(source, self._streams))
+            for name, source in self.__datasources.items()
+            if name in self.__script)
+        # client data are fetched inline
+        WORKERS.run([fetcher for fetcher in fetchers.values()
+                     if not isinstance(fetcher.source, ClientSource)])
+        for fetcher in fetchers.values():
+            if isinstance(fetcher.source, ClientSource):
+                fetcher.run()
+        for name, fetcher in fetchers.items():
+            if fetcher.exception is not None:
+                raise fetcher.exception
+            setattr(ds, name, fetcher.value)
 
         setattr(ds, self.__name, None)
 
         if not self.__commonblock:
-            exec(self.__script.strip(), {}, {"ds": ds})
+            exec(self.__code, {}, {"ds": ds})
             rec = getattr(ds, self.__name)
         else:
             rec = None
-            with self.__lock:
-                exec(self.__script.strip(), {}, {
+            self.__acquire()
+            try:
+                exec(self.__code, {}, {
                     "ds": ds, "commonblock": self.__common})
-                rec = copy.deepcopy(getattr(ds, self.__name))
+                rec = self.__detach(getattr(ds, self.__name))
+            finally:
+                self.__release()
         ntp = NTP()
         rank, shape, dtype = ntp.arrayRankShape(rec)
         if rank in NTP.rTf:
@@ -237,6 +521,63 @@ class PyEvalSource(DataSource):
                     "tangoDType": NTP.pTt[dtype],
                     "shape": shape}
 
+    def __acquire(self):
+        """ acquires commonblock locks
+
+        :brief: Scripts using only literal commonblock keys lock their keys
+                and the commonblock in shared mode, other scripts lock
+                the whole commonblock
+        """
+        if self.__keys is None:
+            self.__lock.acquire()
+        else:
+            self.__lock.acquireShared()
+            for lock in self.__keylocks:
+                lock.acquire()
+
+    def __release(self):
+        """ releases commonblock locks
+        """
+        if self.__keys is None:
+            self.__lock.release()
+        else:
+            for lock in reversed(self.__keylocks):
+                lock.release()
+            self.__lock.releaseShared()
+
+    def __detach(self, rec):
+        """ detaches the result from the commonblock
+
+        :brief: Arrays, array views and nested lists, tuples and
+                dictionaries are copied recursively, so the result does
+                not share any mutable object with the commonblock.
+                Named tuples keep their type while other tuple subclasses
+                which cannot be created from an iterable become tuples
+        :param rec: script result
+        :type rec: any
+        :returns: result which is not shared with the commonblock
+        :rtype: any
+        """
+        if rec is None or isinstance(
+                rec, (int, float, str, bytes, bool, numpy.generic)):
+            return rec
+        if isinstance(rec, numpy.ndarray):
+            if rec.dtype == object:
+                return copy.deepcopy(rec)
+            return numpy.array(rec, copy=True)
+        if isinstance(rec, (list, tuple)):
+            items = [self.__detach(item) for item in rec]
+            if hasattr(rec, "_fields"):
+                return type(rec)(*items)
+            try:
+                return type(rec)(items)
+            except TypeError:
+                return tuple(items) if isinstance(rec, tuple) else items
+        if isinstance(rec, dict):
+            return dict((key, self.__detach(item))
+                        for key, item in rec.items())
+        return copy.deepcopy(rec)
+
     def setDecoders(self, decoders):
         """ sets the used decoders
 
@@ -260,8 +601,14 @@ class PyEvalSource(DataSource):
             if 'PYEVAL' not in self.__pool.common.keys():
                 self.__pool.common['PYEVAL'] = {}
             if "lock" not in self.__pool.common['PYEVAL'].keys():
-                self.__pool.common['PYEVAL']["lock"] = threading.Lock()
+                self.__pool.common['PYEVAL']["lock"] = SharedLock()
             self.__lock = self.__pool.common['PYEVAL']["lock"]
+            if "locks" not in self.__pool.common['PYEVAL'].keys():
+                self.__pool.common['PYEVAL']["locks"] = {}
+            keylocks = self.__pool.common['PYEVAL']["locks"]
+            self.__keylocks = [
+                keylocks.setdefault(key, threading.Lock())
+                for key in (self.__keys or [])]
             if "common" not in self.__pool.common['PYEVAL'].keys():
                 self.__pool.common['PYEVAL']["common"] = {}
                 if self.__pool.nxroot is not None:
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+""" Provides a persistent cache of shapes discovered from datasources """
+
+import json
+import os
+import tempfile
+import threading
+
+
+class ShapeCache(object):
+
+    """ Cache of data shapes read from datasources during openEntry
+
+    :brief: Shapes are keyed by datasource identities, i.e.
+            {repr(identity): shape}. The cache is used only when
+            its directory is set. Changes are stored in the directory
+            by dump(), i.e. once per openEntry and closeEntry.
+    """
+
+    #: (:obj:`str`) name of the file with persistent shapes
+    filename = "shapes.json"
+
+    def __init__(self, directory=None):
+        """ constructor
+
+        :param directory: directory with persistent shapes
+        :type directory: :obj:`str`
+        """
+        #: (:obj:`dict` <:obj:`str`, any>) cached shapes
+        self.__shapes = {}
+        #: (:obj:`str`) directory with persistent shapes
+        self.__directory = None
+        #: (:obj:`bool`) if the cached shapes have not been stored
+        self.__dirty = False
+        #: (:class:`threading.Lock`) cache lock
+        self.__lock = threading.Lock()
+        self.directory = directory
+
+    def __getDirectory(self):
+        """ get method for directory attribute
+
+        :returns: directory with persistent shapes
+        :rtype: :obj:`str`
+        """
+        return self.__directory
+
+    def __setDirectory(self, directory):
+        """ set method for directory attribute
+
+        :brief: It stores pending changes and loads shapes
+                stored in the new directory
+        :param directory: directory with persistent shapes
+        :type directory: :obj:`str`
+        """
+        with self.__lock:
+            self.__dump()
+            self.__directory = directory
+            self.__shapes = self.__load()
+
+    #: (:obj:`str`) directory with persistent shapes
+    directory = property(__getDirectory, __setDirectory,
+                         doc='directory with persistent shapes')
+
+    @classmethod
+    def key(cls, identity):
+        """ provides the cache key
+
+        :param identity: datasource identity
+        :type identity: :obj:`tuple`
+        :returns: cache key
+        :rtype: :obj:`str`
+        """
+        return repr(tuple(identity))
+
+    def get(self, identity):
+        """ provides the cached shape
+
+        :param identity: datasource identity
+        :type identity: :obj:`tuple`
+        :returns: cached shape or None
+        :rtype: any
+        """
+        if not self.__directory:
+            return None
+        with self.__lock:
+            return self.__shapes.get(self.key(identity))
+
+    def set(self, identity, shape):
+        """ stores the shape
+
+        :param identity: datasource identity
+        :type identity: :obj:`tuple`
+        :param shape: data shape
+        :type shape: any
+        """
+        if not self.__directory:
+            return
+        key = self.key(identity)
+        with self.__lock:
+            if self.__shapes.get(key) == shape:
+                return
+            self.__shapes[key] = shape
+            self.__dirty = True
+
+    def discard(self, identity):
+        """ removes the shape
+
+        :param identity: datasource identity
+        :type identity: :obj:`tuple`
+        """
+        with self.__lock:
+            if self.__shapes.pop(self.key(identity), None) is not None:
+                self.__dirty = True
+
+    def clear(self):
+        """ removes all shapes
+        """
+        with self.__lock:
+            self.__shapes = {}
+            self.__dirty = True
+            self.__dump()
+
+    def dump(self):
+        """ stores changed shapes in the directory
+        """
+        with self.__lock:
+            self.__dump()
+
+    def __len__(self):
+        """ provides number of cached shapes
+
+        :returns: number of cached shapes
+        :rtype: :obj:`int`
+        """
+        return len(self.__shapes)
+
+    def __load(self):
+        """ loads the persistent shapes
+
+        :returns: shapes
+        :rtype: :obj:`dict` <:obj:`str`, any>
+        """
+        if not self.__directory:
+            return {}
+        try:
+            with open(os.path.join(
+                    self.__directory, self.filename), "r") as fl:
+                shapes = json.load(fl)
+            return shapes if isinstance(shapes, dict) else {}
+        except Exception:
+            return {}
+
+    def __dump(self):
+        """ stores the persistent shapes
+
+        :brief: It has to be called with the cache lock acquired
+        """
+        if not self.__directory or not self.__dirty:
+            return
+        self.__dirty = False
+        tmpname = None
+        try:
+            if not os.path.isdir(self.__directory):
+                os.makedirs(self.__directory)
+            fd, tmpname = tempfile.mkstemp(
+                suffix=".tmp", dir=self.__directory)
+            with os.fdopen(fd, "w") as fl:
+                json.dump(self.__shapes, fl)
+            os.rename(tmpname, os.path.join(self.__directory, self.filename))
+        except Exception:
+            if tmpname and os.path.isfile(tmpname):
+                os.remove(tmpname)
+
+
+#: (:class:`ShapeCache`) shapes discovered from datasources
+SHAPES = ShapeCache()
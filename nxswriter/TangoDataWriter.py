@@ -22,20 +22,18 @@
 import os
 import shutil
 
-from xml import sax
 import json
 import sys
 import gc
 import weakref
 import time
 
-try:
-    from cStringIO import StringIO
-except ImportError:
-    from io import StringIO
-
 from .NexusXMLHandler import NexusXMLHandler
-from .FetchNameHandler import FetchNameHandler
+from .EntryPlan import EntryPlanCache, EntryPlanReader
+from .EntryTemplate import EntryTemplateCache, TemplateSourcePool
+from .VirtualSteps import VirtualStepFiles, FileThread, FinalFieldCopies
+from .FlushPolicy import FlushPolicy
+from .ShapeCache import SHAPES
 from .StreamSet import StreamSet
 from nxstools import filewriter as FileWriter
 
@@ -96,6 +94,18 @@ class TangoDataWriter(object):
     """ NeXuS data writer
     """
 
+    #: (:class:`nxswriter.EntryPlan.EntryPlanCache`) \
+    #:     compiled XML settings shared by all writers
+    plans = EntryPlanCache()
+
+    #: (:class:`nxswriter.ShapeCache.ShapeCache`) \
+    #:     shapes discovered from datasources shared by all writers
+    shapes = SHAPES
+
+    #: (:class:`nxswriter.EntryTemplate.EntryTemplateCache`) \
+    #:     entry skeletons shared by all writers
+    templates = EntryTemplateCache()
+
     def __init__(self, server=None):
         """ constructor
 
@@ -113,6 +123,8 @@ class TangoDataWriter(object):
         self.__fileext = ""
         #: (:obj:`dict` <:obj:`str` , :obj:`any`>) open file parameters
         self.__pars = {}
+        #: (:class:`nxswriter.FlushPolicy.FlushPolicy`) record flush policy
+        self.__flushPolicy = FlushPolicy()
         #: (:obj:`str`) XML string with file settings
         self.__xmlsettings = ""
         #: (:obj:`str`) global JSON string with data records
@@ -163,6 +175,25 @@ class TangoDataWriter(object):
         self.metadataOutput = ''
         #: (:obj:`int`) steps per file
         self.stepsperfile = 0
+        #: (:obj:`int`) maximal size of split files in bytes
+        self.bytesperfile = 0
+        #: (:obj:`float`) maximal writing time of split files in seconds
+        self.secondsperfile = 0
+        #: (:obj:`bool`) if the current entry is split into files
+        self.__splitting = False
+        #: (:obj:`int`) number of steps in the current split file
+        self.__filesteps = 0
+        #: (:obj:`float`) time of opening the current split file
+        self.__filestart = 0
+        #: (:class:`nxswriter.VirtualSteps.FileThread`) \
+        #:     thread copying the master file to the next split file
+        self.__nextFile = None
+        #: (:obj:`bool`) split files contain only STEP fields exposed
+        #:     by virtual datasets of the master file
+        self.virtualmaster = False
+        #: (:class:`nxswriter.VirtualSteps.VirtualStepFiles`) \
+        #:     split files of the virtual master file
+        self.__virtualSteps = None
 
         #: (:obj:`int`) current file id
         self.__currentfileid = 0
@@ -173,9 +204,9 @@ class TangoDataWriter(object):
         #:      pool with datasources
         self.__datasources = DataSourcePool()
 
-        #: (:class:`nxswriter.FetchNameHandler.FetchNameHandler`) \
-        #:       group name parser
-        self.__fetcher = None
+        #: (:class:`nxswriter.EntryPlan.EntryPlan`) \
+        #:       compiled XML settings
+        self.__plan = None
 
         #: (:obj:`str`) adding logs
         self.addingLogs = True
@@ -300,6 +331,19 @@ class TangoDataWriter(object):
     currentfileid = property(__getCurrentFileID,
                              doc='(:obj:`str`) the current file id')
 
+    def __getFlushTime(self):
+        """ get method for flushtime attribute
+
+        :returns: time spent on flushing the current entry in seconds
+        :rtype: :obj:`float`
+        """
+        return self.__flushPolicy.time
+
+    #: (:obj:`float`) time spent on flushing the current entry in seconds
+    flushtime = property(
+        __getFlushTime,
+        doc='(:obj:`float`) time spent on flushing the current entry')
+
     def __getXML(self):
         """ get method for xmlsettings attribute
 
@@ -314,14 +358,10 @@ class TangoDataWriter(object):
         :param xmlset: xml settings
         :type xmlset: :obj:`str`
         """
-        self.__fetcher = FetchNameHandler(streams=self._streams)
-        if sys.version_info > (3,):
-            sax.parseString(xmlset, self.__fetcher)
-        else:
-            if isinstance(xmlset, unicode):
-                sax.parseString(xmlset.encode('utf-8'), self.__fetcher)
-            else:
-                sax.parseString(xmlset, self.__fetcher)
+        plan = self.plans.get(xmlset, self._streams)
+        # fetches group names and types of the settings
+        plan.groupTypes
+        self.__plan = plan
         self.__xmlsettings = xmlset
 
     def __delXML(self):
@@ -413,6 +453,7 @@ class TangoDataWriter(object):
         self.__currentfileid = 0
 
         self.__pars = self.__getParams(self.writer)
+        self.__flushPolicy = FlushPolicy.fromParams(self.__pars)
         pars = dict(self.__pars)
         pars["writer"] = wrmodule
         if os.path.isfile(self.__fileName):
@@ -495,29 +536,19 @@ class TangoDataWriter(object):
             # flag for INIT mode
             self.__datasources.counter = -1
             self.__datasources.nxroot = self.__nxRoot
-            errorHandler = sax.ErrorHandler()
-            parser = sax.make_parser()
+            parent = self.__nxPath[-1] if self.__nxPath else self.__eFile
+            reader = EntryPlanReader(self.__plan)
             handler = NexusXMLHandler(
-                self.__nxPath[-1] if self.__nxPath else self.__eFile,
+                parent,
                 self.__datasources,
-                self.__decoders, self.__fetcher.groupTypes,
-                parser, json.loads(self.jsonrecord),
+                self.__decoders, self.__plan.groupTypes,
+                reader, json.loads(self.jsonrecord),
                 self._streams,
-                self.skipacquisition
+                self.skipacquisition,
+                template=self.__cloneTemplate(parent)
             )
-            parser.setContentHandler(handler)
-            parser.setErrorHandler(errorHandler)
-            inpsrc = sax.InputSource()
-            if sys.version_info > (3,):
-                inpsrc.setByteStream(StringIO(self.xmlsettings))
-            else:
-                if isinstance(self.xmlsettings, unicode):
-                    inpsrc.setByteStream(
-                        StringIO(self.xmlsettings.encode('utf-8')))
-                else:
-                    inpsrc.setByteStream(StringIO(self.xmlsettings))
-
-            parser.parse(inpsrc)
+            reader.parse(handler)
+            self.shapes.dump()
 
             self.__initPool = handler.initPool
             self.__stepPool = handler.stepPool
@@ -554,11 +585,12 @@ class TangoDataWriter(object):
                     "string")
                 lfield.write(self.xmlsettings)
                 lfield.close()
-            if self.__nxFile and hasattr(self.__nxFile, "flush"):
-                self.__nxFile.flush()
-            if self.stepsperfile > 0:
-                self.__filenames = []
-                self.__filetimes = {}
+            self.__flushPolicy.reset()
+            self.__flushPolicy.flush(self.__nxFile)
+            self.__resetSplitFiles()
+            self.__splitting = self.__splitsFiles()
+            if self.__splitting:
+                self.__openVirtualSteps()
                 self.__nextfile()
             elif "swmr" in self.__pars.keys() and self.__pars["swmr"]:
                 self.__nxFile.reopen(readonly=False, **self.__pars)
@@ -566,19 +598,180 @@ class TangoDataWriter(object):
             # print("START")
             self.__nxFile.prepare()
 
+    def __cloneTemplate(self, parent):
+        """ clones the entry skeleton from the template cache
+
+        :param parent: parent element of the new entry
+        :type parent: :class:`nxswriter.FElement.FElement`
+        :returns: if the entry skeleton has been cloned
+        :rtype: :obj:`bool`
+        """
+        if not self.templates.directory or self.skipacquisition:
+            return False
+        target = getattr(parent.h5Object, "h5object", None)
+        if not self.templates.accepts(target):
+            return False
+        names = self.templates.names(self.__plan)
+        if any(name in target for name in names) or \
+           not self.templates.static(self.__plan):
+            return False
+        fname = self.templates.get(
+            self.__plan, self.__buildTemplate, (self.canfail,))
+        if not fname:
+            return False
+        for name in self.templates.copy(fname, names, target):
+            parent._addChildName(name)
+        return True
+
+    def __buildTemplate(self, filename):
+        """ creates the entry skeleton without links in the template file
+
+        :brief: Datasources of the skeleton do not fetch any data
+        :param filename: template file name
+        :type filename: :obj:`str`
+        """
+        nxfile = FileWriter.create_file(filename, overwrite=True)
+        sources = TemplateSourcePool(self.canfail)
+        try:
+            reader = EntryPlanReader(self.__plan)
+            handler = NexusXMLHandler(
+                EFile([], None, nxfile.root()),
+                sources,
+                self.__decoders, self.__plan.groupTypes,
+                reader, None,
+                self._streams,
+                links=False
+            )
+            reader.parse(handler)
+            handler.close()
+        finally:
+            nxfile.close()
+
+    def __openVirtualSteps(self):
+        """ prepares split files of the virtual master file
+
+        :brief: It is used only for files written via h5py
+        """
+        self.__virtualSteps = None
+        if not self.virtualmaster or "h5py" not in WRITERS or \
+           not VirtualStepFiles.accepts(self.__nxRoot):
+            return
+        elements = list(self.__stepPool.elements)
+        for pool in self.__triggerPools.values():
+            elements.extend(pool.elements)
+        self.__virtualSteps = VirtualStepFiles(
+            elements, self._streams, writer=WRITERS["h5py"], **self.__pars)
+
+    def __resetSplitFiles(self):
+        """ resets the state of split files
+        """
+        self.__splitting = False
+        self.__filenames = []
+        self.__filetimes = {}
+        self.__filesteps = 0
+
+    def __splitsFiles(self):
+        """ checks if the entry is split into separate files
+
+        :returns: if any rollover policy is set
+        :rtype: :obj:`bool`
+        """
+        return self.stepsperfile > 0 or self.bytesperfile > 0 \
+            or self.secondsperfile > 0
+
+    def __splitName(self, fileid):
+        """ provides the split file name
+
+        :param fileid: split file id
+        :type fileid: :obj:`int`
+        :returns: split file name
+        :rtype: :obj:`str`
+        """
+        return "%s_%05d%s" % (self.__fileprefix, fileid, self.__fileext)
+
+    def __rollover(self):
+        """ checks if the current split file is completed
+
+        :returns: if the next split file has to be opened
+        :rtype: :obj:`bool`
+        """
+        if self.stepsperfile > 0 and self.__filesteps >= self.stepsperfile:
+            return True
+        if self.bytesperfile > 0:
+            if self.__virtualSteps is not None:
+                size = self.__virtualSteps.size
+            else:
+                size = os.path.getsize(self.__filenames[-1])
+            if size >= self.bytesperfile:
+                return True
+        if self.secondsperfile > 0 and \
+           time.time() - self.__filestart >= self.secondsperfile:
+            return True
+        return False
+
+    def __prepareNextFile(self):
+        """ copies the master file to the next split file in the background
+
+        :brief: The split file is reopened in __nextfile() by the record
+                thread since the element H5 objects are bound to the
+                file handle, which can be reopened only after
+                the current split file is closed
+        """
+        self.__nextFile = FileThread(
+            self.__splitName(self.__currentfileid + 1),
+            shutil.copy2, self.__fileName,
+            self.__splitName(self.__currentfileid + 1))
+        self.__nextFile.start()
+
+    def __takeNextFile(self, filename):
+        """ waits for the split file copied in the background
+
+        :param filename: split file name
+        :type filename: :obj:`str`
+        :returns: if the split file has been copied
+        :rtype: :obj:`bool`
+        """
+        nextFile, self.__nextFile = self.__nextFile, None
+        if nextFile is None:
+            return False
+        if nextFile.filename == filename:
+            try:
+                nextFile.get()
+                return True
+            except Exception as e:
+                self._streams.warn(
+                    "TangoDataWriter::__takeNextFile() - "
+                    "The file '%s' cannot be prepared: %s"
+                    % (filename, str(e)))
+        nextFile.discard()
+        return False
+
+    def __discardNextFile(self):
+        """ removes the split file copied in the background
+        """
+        if self.__nextFile is not None:
+            self.__nextFile.discard()
+            self.__nextFile = None
+
     def __nextfile(self):
-        self.__nxFile.close()
         self.__currentfileid += 1
         self.__nxRoot.currentfileid = self.__currentfileid
-        self.__filenames.append("%s_%05d%s" % (
-            self.__fileprefix,
-            self.__currentfileid,
-            self.__fileext)
-        )
-        shutil.copy2(self.__fileName, self.__filenames[-1])
-        self.__filetimes[self.__filenames[-1]] = self.__nxFile.currenttime()
-        self.__nxFile.name = self.__filenames[-1]
+        filename = self.__splitName(self.__currentfileid)
+        self.__filenames.append(filename)
+        self.__filesteps = 0
+        self.__filestart = time.time()
+        if self.__virtualSteps is not None:
+            self.__virtualSteps.next(filename)
+            self.__virtualSteps.prepare(
+                self.__splitName(self.__currentfileid + 1))
+            return
+        self.__nxFile.close()
+        if not self.__takeNextFile(filename):
+            shutil.copy2(self.__fileName, filename)
+        self.__filetimes[filename] = self.__nxFile.currenttime()
+        self.__nxFile.name = filename
         self.__nxFile.reopen(readonly=False, **self.__pars)
+        self.__prepareNextFile()
 
     def __previousfile(self):
         self.__nxFile.close()
@@ -598,6 +791,17 @@ class TangoDataWriter(object):
             self.__nxFile.name = self.__filenames[-1]
             self.__nxFile.reopen(readonly=False, **self.__pars)
 
+    def __closeVirtualSteps(self):
+        """ closes split files and creates virtual fields of the master file
+        """
+        if not self.__filesteps:
+            self.__virtualSteps.remove()
+            self.__filenames.pop()
+            self.__currentfileid -= 1
+            self.__nxRoot.currentfileid = self.__currentfileid
+        self.__virtualSteps.close()
+        self.__virtualSteps = None
+
     def record(self, jsonstring=None):
         """ runs threads form the STEP pool
 
@@ -643,14 +847,15 @@ class TangoDataWriter(object):
                         self.__triggerPools[pool].runAndWait()
                         self.__triggerPools[pool].checkErrors()
 
-        if self.__nxFile and hasattr(self.__nxFile, "flush"):
-            self.__nxFile.flush()
+        if self.__flushPolicy.record(triggers):
+            self.__flushPolicy.flush(self.__nxFile, self.__virtualSteps)
         if self.__nxFile and hasattr(self.__nxFile, "start") and \
            self.__datasources.counter == 1:
             # print("START")
             self.__nxFile.start()
-        if self.stepsperfile > 0:
-            if (self.__datasources.counter) % self.stepsperfile == 0:
+        if self.__splitting:
+            self.__filesteps += 1
+            if self.__rollover():
                 self.__nextfile()
         self.skipacquisition = False
         dt = time.time() - st
@@ -671,6 +876,43 @@ class TangoDataWriter(object):
                 "file_time", "string",
                 overwrite=True)[...] = str(self.__filetimes[fname])
 
+    def __finalFieldCopies(self):
+        """ provides copies of FINAL fields for the other split files
+
+        :brief: FINAL data are fetched once instead of running
+                the FINAL pool for each split file
+        :returns: FINAL field copies or None if they are not supported
+        :rtype: :class:`nxswriter.VirtualSteps.FinalFieldCopies`
+        """
+        if not VirtualStepFiles.accepts(self.__nxRoot):
+            return None
+        copies = FinalFieldCopies(
+            [] if self.skipacquisition else self.__finalPool.elements,
+            self._streams)
+        return copies if copies.valid else None
+
+    def __copyFinalFields(self, copies):
+        """ copies FINAL fields of the current split file into the others
+
+        :brief: The split files are written one after another since h5py
+                serializes all its calls. Afterwards the first split file
+                is reopened as after running the FINAL pool for each file
+        :param copies: FINAL field copies
+        :type copies: :class:`nxswriter.VirtualSteps.FinalFieldCopies`
+        """
+        updatetime = str(self.__nxFile.currenttime())
+        for i, filename in enumerate(self.__filenames[:-1]):
+            attrs = {"file_name": filename, "file_update_time": updatetime}
+            if i and filename in self.__filetimes:
+                attrs["file_time"] = str(self.__filetimes[filename])
+            copies.copy(filename, attrs)
+        self.__nxFile.close()
+        del self.__filenames[1:]
+        self.__currentfileid = 1
+        self.__nxRoot.currentfileid = self.__currentfileid
+        self.__nxFile.name = self.__filenames[0]
+        self.__nxFile.reopen(readonly=False, **self.__pars)
+
     def closeEntry(self):
         """ closes the data entry
 
@@ -678,9 +920,13 @@ class TangoDataWriter(object):
                 removes the thread pools
         """
         # flag for FINAL mode
-        if self.stepsperfile > 0:
+        virtual = self.__virtualSteps is not None
+        if virtual:
+            self.__closeVirtualSteps()
+        elif self.__splitting:
+            self.__discardNextFile()
             os.remove(self.__fileName)
-            if (self.__datasources.counter) % self.stepsperfile == 0:
+            if not self.__filesteps and len(self.__filenames) > 1:
                 self.__removefile()
 
         self.__datasources.counter = -2
@@ -694,16 +940,25 @@ class TangoDataWriter(object):
             self.__finalPool.setJSON(json.loads(self.jsonrecord))
             if not self.skipacquisition:
                 self.__finalPool.runAndWait()
-            if self.stepsperfile > 0:
+            copies = None
+            if self.__splitting and not virtual:
                 self.__updateNXRoot()
-                while len(self.__filenames) > 1:
+                if len(self.__filenames) > 1:
+                    copies = self.__finalFieldCopies()
+                while copies is None and len(self.__filenames) > 1:
                     self.__previousfile()
                     if not self.skipacquisition:
                         self.__finalPool.runAndWait()
                     self.__updateNXRoot()
-            if not self.skipacquisition:
-                self.__finalPool.checkErrors()
+            try:
+                if not self.skipacquisition:
+                    self.__finalPool.checkErrors()
+            finally:
+                if copies is not None:
+                    self.__copyFinalFields(copies)
+                self.shapes.dump()
         self.skipacquisition = False
+        self.__resetSplitFiles()
 
         if self.__initPool:
             self.__initPool.close()
@@ -725,8 +980,13 @@ class TangoDataWriter(object):
         if self.addingLogs and self.__logGroup:
             self.__logGroup.close()
 
-        if self.__nxFile and hasattr(self.__nxFile, "flush"):
-            self.__nxFile.flush()
+        self.__flushPolicy.flush(self.__nxFile)
+        self._streams.info(
+            "TangoDataWriter::closeEntry() - "
+            "%s flushes took %s s" % (
+                self.__flushPolicy.count, self.__flushPolicy.time),
+            False
+        )
         if self.__nxFile and hasattr(self.__nxFile, "finish"):
             self.__nxFile.finish()
 
@@ -754,6 +1014,9 @@ class TangoDataWriter(object):
 
         :brief: It closes the H5 file
         """
+        if self.__virtualSteps is not None:
+            self.__closeVirtualSteps()
+        self.__discardNextFile()
         self.__currentfileid = 0
         if self.__nxRoot:
             self.__nxRoot.currentfileid = self.__currentfileid
@@ -23,8 +23,6 @@ import sys
 import time
 import threading
 import socket
-import xml.etree.ElementTree as et
-from lxml.etree import XMLParser
 
 from .Types import NTP
 
@@ -139,6 +137,8 @@ class TangoSource(DataSource):
         self.__pool = None
         #: (:class:`tango.DeviceProxy`) device proxy
         self.__proxy = None
+        #: (:obj:`tuple`) canonical datasource key
+        self.__key = None
 
         #: (:obj:`dict` <:obj:`str` , :obj:`dict` <:obj:`str`, any>>) \
         #:     the current  static JSON object
@@ -154,6 +154,14 @@ class TangoSource(DataSource):
         #: (:obj:`str`) client datasource for mixed CLIENT/TANGO mode with fqdn
         self.fullclient = None
 
+    def identity(self):
+        """ provides identity of the datasource
+
+        :returns: canonical datasource key or None
+        :rtype: :obj:`tuple`
+        """
+        return self.__key
+
     def __str__(self):
         """ self-description
 
@@ -186,7 +194,7 @@ class TangoSource(DataSource):
         """
         if sys.version_info > (3,):
             xml = bytes(xml, "UTF-8")
-        root = et.fromstring(xml, parser=XMLParser(collect_ids=False))
+        root = self._parse(xml)
         rec = root.find("record")
         name = None
         if rec is not None:
@@ -276,6 +284,9 @@ class TangoSource(DataSource):
                 socket.getfqdn(host), eport,
                 edevice, name.lower()
             )
+        self.__key = ("TANGO", self.device, self.member.name,
+                      self.member.memberType, self.member.encoding,
+                      self.group, self.client)
 
     def setDecoders(self, decoders):
         """ sets the used decoders
@@ -323,6 +334,9 @@ class TangoSource(DataSource):
     def getData(self):
         """ data provider
 
+        :brief: Client data are looked up by the datasource name while
+                device data of datasources with the same setup are read
+                once per step via the datasource pool
         :returns: dictionary with collected data
         :rtype: {'rank': :obj:`str`, 'value': any, 'tangoDType': :obj:`str`, \
         :        'shape': :obj:`list` <int>, 'encoding': :obj:`str`, \
@@ -336,6 +350,18 @@ class TangoSource(DataSource):
                 res = self.__tryclient(self.fullclient.lower())
                 if res is not None:
                     return res
+        if self.__key is not None and hasattr(self.__pool, "getData"):
+            return self.__pool.getData(self.__key, self.__fetchData)
+        return self.__fetchData()
+
+    def __fetchData(self):
+        """ reads data from the device
+
+        :returns: dictionary with collected data
+        :rtype: {'rank': :obj:`str`, 'value': any, 'tangoDType': :obj:`str`, \
+        :        'shape': :obj:`list` <int>, 'encoding': :obj:`str`, \
+        :        'decoders': :obj:`str`}
+        """
         if not PYTANGO_AVAILABLE:
             if self._streams:
                 self._streams.error(
@@ -64,6 +64,18 @@ class ThreadPool(object):
         #: (:obj:`float`) maximal runtime
         self.maxRuntime = maxruntime
 
+    def __getElements(self):
+        """ get method for elements attribute
+
+        :returns: list of the appended elements
+        :rtype: :obj:`list` <:class:`nxswriter.Element.Element`>
+        """
+        return list(self.__elementList)
+
+    #: (:obj:`list` <:class:`nxswriter.Element.Element`>) appended elements
+    elements = property(__getElements,
+                        doc='list of the appended elements')
+
     def append(self, elem):
         """ appends the thread element
 
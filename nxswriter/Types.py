@@ -64,6 +64,32 @@ class Converters(object):
             return True
         return False
 
+    @classmethod
+    def toBoolArray(cls, value):
+        """ converts to bool numpy array
+
+        :brief: It converts numeric or string numpy arrays at once and falls
+                back to element-wise conversion for ragged or mixed data.
+                As in the element-wise conversion, elements of numpy
+                string arrays are False only if they are empty
+        :param value: variable to convert
+        :type value: any
+        :returns: result in bool type
+        :rtype: :class:`numpy.ndarray`
+        """
+        try:
+            arr = numpy.asarray(value)
+        except ValueError:
+            arr = None
+        if arr is not None:
+            if arr.dtype.kind in "biufc":
+                return arr.astype("bool")
+            elif arr.dtype.kind in "US" and \
+                    isinstance(value, numpy.ndarray):
+                return numpy.char.str_len(arr) > 0
+        return numpy.array(
+            NTP().createArray(value, cls.toBool), dtype="bool")
+
 
 class NTP(object):
 
@@ -116,6 +142,36 @@ class NTP(object):
     #: (:obj:`dict` <:obj:`int` , :obj:`str` >) map of rank :  data format
     rTf = {0: "SCALAR", 1: "SPECTRUM", 2: "IMAGE", 3: "VERTEX"}
 
+    @classmethod
+    def __isPlainArray(cls, array):
+        """ checks if array is a non-empty numpy array of simple elements
+
+        :param array: given array
+        :type array: any
+        :returns: True for non-empty numpy arrays without python objects
+        :rtype: :obj:`bool`
+        """
+        return isinstance(array, numpy.ndarray) and array.ndim > 0 \
+            and array.size > 0 and array.dtype.kind != "O"
+
+    @classmethod
+    def __elementType(cls, value):
+        """ type name of the array element
+
+        :param value: array element
+        :type value: any
+        :returns: type name
+        :rtype: :obj:`str`
+        """
+        if type(value) in [numpy.bytes_, numpy.str_]:
+            return "str"
+        elif hasattr(value, "dtype"):
+            return str(value.dtype)
+        elif hasattr(value, "tolist"):
+            return type(value.tolist()).__name__
+        else:
+            return type(value).__name__
+
     def arrayRank(self, array):
         """ array rank
 
@@ -125,6 +181,8 @@ class NTP(object):
         :returns: rank
         :rtype: :obj:`int`
         """
+        if self.__isPlainArray(array):
+            return array.ndim
         rank = 0
         if hasattr(array, "__iter__") and not \
            isinstance(array, (str, bytes)):
@@ -147,6 +205,9 @@ class NTP(object):
         :returns: (rank, inverse shape, type)
         :rtype: (:obj:`int` , :obj:`list` <:obj:`int` > , :obj:`str` )
         """
+        if self.__isPlainArray(array):
+            return (array.ndim, list(reversed(array.shape)),
+                    self.__elementType(array[(0,) * array.ndim]))
         rank = 0
         shape = []
         pythonDType = None
@@ -159,7 +220,7 @@ class NTP(object):
             except IndexError:
                 if hasattr(array, "shape") and len(array.shape) == 0:
                     rank = 0
-                    if type(array) in [numpy.string_, numpy.str_]:
+                    if type(array) in [numpy.bytes_, numpy.str_]:
                         pythonDType = "str"
                     elif hasattr(array, "dtype"):
                         pythonDType = str(array.dtype)
@@ -170,14 +231,7 @@ class NTP(object):
                     shape.append(len(array))
 
         else:
-            if type(array) in [numpy.string_, numpy.str_]:
-                pythonDType = "str"
-            elif hasattr(array, "dtype"):
-                pythonDType = str(array.dtype)
-            elif hasattr(array, "tolist"):
-                pythonDType = type(array.tolist()).__name__
-            else:
-                pythonDType = type(array).__name__
+            pythonDType = self.__elementType(array)
         return (rank, shape, pythonDType)
 
     def arrayRankShape(self, array):
@@ -0,0 +1,519 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+""" Provides split files of STEP fields exposed by a virtual master file
+    and copies of FINAL fields written into split files
+"""
+
+import os
+import posixpath
+import numpy
+from threading import Thread
+
+from nxstools import filewriter as FileWriter
+
+try:
+    import h5py
+    #: (:obj:`bool`) True if h5py is installed
+    H5PY_AVAILABLE = True
+except ImportError:
+    H5PY_AVAILABLE = False
+
+
+class FileThread(Thread):
+
+    """ thread preparing a split file in the background
+    """
+
+    def __init__(self, filename, target, *args):
+        """ constructor
+
+        :param filename: name of the prepared file
+        :type filename: :obj:`str`
+        :param target: function preparing the file
+        :type target: :obj:`instancemethod` or :obj:`function`
+        :param args: arguments of the function
+        :type args: :obj:`tuple`
+        """
+        Thread.__init__(self)
+        self.daemon = True
+        #: (:obj:`str`) name of the prepared file
+        self.filename = filename
+        #: (:obj:`instancemethod` or :obj:`function`) preparing function
+        self.__target = target
+        #: (:obj:`tuple`) arguments of the preparing function
+        self.__args = args
+        #: (any) result of the preparing function
+        self.result = None
+        #: (:class:`Exception`) error raised by the preparing function
+        self.error = None
+
+    def run(self):
+        """ runner
+
+        :brief: It prepares the file
+        """
+        try:
+            self.result = self.__target(*self.__args)
+        except Exception as e:
+            self.error = e
+
+    def get(self):
+        """ waits for the prepared file
+
+        :returns: result of the preparing function
+        :rtype: any
+        """
+        self.join()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def discard(self):
+        """ waits for the prepared file and removes it
+        """
+        self.join()
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
+
+
+class VirtualStepFiles(object):
+
+    """ Split files with STEP fields of the master file
+
+    :brief: Each split file contains only STEP fields of its step range.
+            On closing the master fields are replaced by virtual datasets
+            concatenating the split fields along their growing dimension.
+    """
+
+    def __init__(self, elements, streams=None, **pars):
+        """ constructor
+
+        :param elements: STEP elements
+        :type elements: :obj:`list` <:class:`nxswriter.Element.Element`>
+        :param streams: tango-like steamset class
+        :type streams: :class:`StreamSet` or :class:`tango.LatestDeviceImpl`
+        :param pars: parameters of the split file creation
+        :type pars: :obj:`dict` < :obj:`str`, any>
+        """
+        #: (:obj:`list` <(:class:`nxswriter.Element.Element`, \
+        #:     :class:`nxswriter.FileWriter.FTField`)>) \
+        #:     STEP elements with their master fields
+        self.__fields = [
+            (el, el.h5Object) for el in elements
+            if isinstance(getattr(el.h5Object, "h5object", None),
+                          h5py.Dataset)]
+        #: (:class:`StreamSet` or :class:`tango.LatestDeviceImpl`) stream set
+        self._streams = streams
+        #: (:obj:`dict` < :obj:`str`, any>) split file parameters
+        self.__pars = pars
+        #: (:obj:`list` <:obj:`str`>) split file names
+        self.filenames = []
+        #: (:class:`nxswriter.FileWriter.FTFile`) current split file
+        self.__file = None
+        #: (:class:`FileThread`) thread preparing the next split file
+        self.__prepared = None
+
+    @classmethod
+    def accepts(cls, obj):
+        """ checks if the object is written via h5py
+
+        :param obj: file tree object
+        :type obj: :class:`nxswriter.FileWriter.FTObject`
+        :returns: if the underlying object is an h5py group
+        :rtype: :obj:`bool`
+        """
+        return H5PY_AVAILABLE and isinstance(
+            getattr(obj, "h5object", None), h5py.Group)
+
+    def __getSize(self):
+        """ get method for size attribute
+
+        :returns: size of the current split file in bytes
+        :rtype: :obj:`int`
+        """
+        if not self.filenames or not os.path.isfile(self.filenames[-1]):
+            return 0
+        return os.path.getsize(self.filenames[-1])
+
+    #: (:obj:`int`) size of the current split file in bytes
+    size = property(__getSize,
+                    doc='size of the current split file in bytes')
+
+    def prepare(self, filename):
+        """ creates the next split file in the background
+
+        :param filename: split file name
+        :type filename: :obj:`str`
+        """
+        self.__discard()
+        self.__prepared = FileThread(filename, self.__create, filename)
+        self.__prepared.start()
+
+    def next(self, filename):
+        """ closes the current split file and opens the next one
+
+        :brief: The opened file contains empty copies of the master
+                STEP fields which are set as the element H5 objects.
+                It is created unless it has been prepared in the background
+        :param filename: split file name
+        :type filename: :obj:`str`
+        """
+        self.__close()
+        created = None
+        if self.__prepared is not None \
+           and self.__prepared.filename == filename:
+            try:
+                created = self.__prepared.get()
+                self.__prepared = None
+            except Exception as e:
+                if self._streams:
+                    self._streams.warn(
+                        "VirtualStepFiles::next() - "
+                        "The file '%s' cannot be prepared: %s"
+                        % (filename, str(e)))
+        self.__discard()
+        if created is None:
+            created = self.__create(filename)
+        self.__file, objects = created
+        self.filenames.append(filename)
+        for (el, _), obj in zip(self.__fields, objects):
+            el.h5Object = obj
+
+    def __create(self, filename):
+        """ creates the split file with empty copies of STEP fields
+
+        :param filename: split file name
+        :type filename: :obj:`str`
+        :returns: split file and its STEP fields
+        :rtype: (:class:`nxswriter.FileWriter.FTFile`, \
+                 :obj:`list` <:class:`nxswriter.FileWriter.FTField`>)
+        """
+        nxfile = FileWriter.create_file(
+            filename, overwrite=True, **self.__pars)
+        root = nxfile.root()
+        h5root = root.h5object
+        for _, field in self.__fields:
+            dataset = field.h5object
+            parent = self.__requireGroup(h5root, dataset.parent)
+            dataset.file.copy(dataset, parent)
+        objects = []
+        for _, field in self.__fields:
+            obj = root
+            for name in field.h5object.name.split("/")[1:]:
+                obj = obj.open(name)
+            objects.append(obj)
+        return nxfile, objects
+
+    def remove(self):
+        """ closes and removes the current split file
+        """
+        self.__close()
+        self.__discard()
+        if self.filenames:
+            os.remove(self.filenames.pop())
+
+    def flush(self):
+        """ flushes the current split file
+        """
+        if self.__file is not None:
+            self.__file.flush()
+
+    def close(self):
+        """ closes the split files and creates virtual master fields
+
+        :brief: The master fields are set back as the element H5 objects
+        """
+        self.__close()
+        self.__discard()
+        for el, field in self.__fields:
+            el.h5Object = field
+        if not self.filenames:
+            return
+        shapes = []
+        for filename in self.filenames:
+            with h5py.File(filename, "r") as fl:
+                shapes.append(
+                    [fl[field.h5object.name].shape
+                     for _, field in self.__fields])
+        for i, (el, field) in enumerate(self.__fields):
+            self.__virtualize(
+                el, field, [(fn, sh[i])
+                            for fn, sh in zip(self.filenames, shapes)])
+        self.__fields = []
+
+    def __discard(self):
+        """ removes the file prepared in the background
+        """
+        if self.__prepared is not None:
+            self.__prepared.join()
+            if self.__prepared.result is not None:
+                self.__prepared.result[0].close()
+            self.__prepared.discard()
+            self.__prepared = None
+
+    def __close(self):
+        """ closes the current split file
+        """
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    @classmethod
+    def __requireGroup(cls, h5root, group):
+        """ provides the split file group of the master group
+
+        :param h5root: split file root
+        :type h5root: :class:`h5py.File`
+        :param group: master group
+        :type group: :class:`h5py.Group`
+        :returns: split file group
+        :rtype: :class:`h5py.Group`
+        """
+        if group.name == "/":
+            return h5root
+        if group.name in h5root:
+            return h5root[group.name]
+        parent = cls.__requireGroup(h5root, group.parent)
+        h5group = parent.create_group(group.name.split("/")[-1])
+        if "NX_class" in group.attrs:
+            h5group.attrs["NX_class"] = group.attrs["NX_class"]
+        return h5group
+
+    def __virtualize(self, element, field, sources):
+        """ replaces the master field by the virtual dataset
+
+        :param element: STEP element
+        :type element: :class:`nxswriter.Element.Element`
+        :param field: master field
+        :type field: :class:`nxswriter.FileWriter.FTField`
+        :param sources: split file names with shapes of their fields
+        :type sources: :obj:`list` <(:obj:`str`, :obj:`tuple`)>
+        """
+        dataset = field.h5object
+        axis = max((getattr(element, "grows", None) or 1) - 1, 0)
+        shape = list(dataset.shape)
+        if len(shape) <= axis:
+            return
+        shape[axis] = 0
+        for _, sshape in sources:
+            shape[axis] += sshape[axis]
+            for i, sh in enumerate(sshape):
+                if i != axis:
+                    shape[i] = max(shape[i], sh)
+        dirname = os.path.dirname(os.path.abspath(dataset.file.filename))
+        layout = h5py.VirtualLayout(shape=tuple(shape), dtype=dataset.dtype)
+        offset = 0
+        for filename, sshape in sources:
+            if not sshape[axis]:
+                continue
+            key = [slice(0, sh) for sh in sshape]
+            key[axis] = slice(offset, offset + sshape[axis])
+            layout[tuple(key)] = h5py.VirtualSource(
+                os.path.relpath(os.path.abspath(filename), dirname),
+                dataset.name, shape=sshape)
+            offset += sshape[axis]
+        attrs = [(key, dataset.attrs[key], dataset.attrs.get_id(key).dtype)
+                 for key in dataset.attrs.keys()]
+        parent = dataset.parent
+        name = dataset.name.split("/")[-1]
+        tmpname = "%s.__virtual__" % name
+        try:
+            vds = parent.create_virtual_dataset(tmpname, layout)
+            for key, value, dtype in attrs:
+                vds.attrs.create(key, value, dtype=dtype)
+            del parent[name]
+            parent.move(tmpname, name)
+        except Exception as e:
+            if tmpname in parent:
+                del parent[tmpname]
+            if self._streams:
+                self._streams.error(
+                    "VirtualStepFiles::__virtualize() - "
+                    "The virtual field '%s' cannot be created: %s"
+                    % (dataset.name, str(e)), std=False)
+            raise
+        field.reopen()
+
+
+class FinalFieldCopies(object):
+
+    """ FINAL fields and attributes copied into other split files
+
+    :brief: FINAL data are fetched and written once into the current
+            split file. Their values are read once and written into
+            the remaining split files which are copies of the same master
+            file
+    """
+
+    #: (:obj:`tuple` <:obj:`str`>) attributes added by checking errors
+    runattrs = ("nexdatas_canfail", "nexdatas_canfail_error")
+
+    def __init__(self, elements, streams=None):
+        """ constructor
+
+        :param elements: FINAL elements which have been already run
+        :type elements: :obj:`list` <:class:`nxswriter.Element.Element`>
+        :param streams: tango-like steamset class
+        :type streams: :class:`StreamSet` or :class:`tango.LatestDeviceImpl`
+        """
+        #: (:obj:`list` <:class:`nxswriter.Element.Element`>) FINAL elements
+        self.__elements = list(elements)
+        #: (:obj:`list` <(:obj:`str`, :obj:`str`, :obj:`tuple`, \
+        #:     :obj:`list` <(:obj:`str`, any, :class:`numpy.dtype`)>)>) \
+        #:     object paths with names of FINAL attributes, \
+        #:     values of FINAL fields and attributes added by the run
+        self.__items = None
+        #: (:obj:`bool`) if all FINAL elements are written via h5py
+        self.valid = H5PY_AVAILABLE and all(
+            self.__object(el) is not None for el in self.__elements)
+        #: (:class:`StreamSet` or :class:`tango.LatestDeviceImpl`) stream set
+        self._streams = streams
+
+    @classmethod
+    def __attributes(cls, h5object, names):
+        """ reads attributes with their types
+
+        :param h5object: h5py object
+        :type h5object: :class:`h5py.Dataset` or :class:`h5py.Group`
+        :param names: attribute names
+        :type names: :obj:`list` <:obj:`str`>
+        :returns: attribute names, values and types
+        :rtype: :obj:`list` <(:obj:`str`, any, :class:`numpy.dtype`)>
+        """
+        return [(name, h5object.attrs[name],
+                 h5object.attrs.get_id(name).dtype)
+                for name in names if name in h5object.attrs]
+
+    @classmethod
+    def __object(cls, element):
+        """ provides the written FINAL object
+
+        :param element: FINAL element
+        :type element: :class:`nxswriter.Element.Element`
+        :returns: h5py field or owner of the attribute with its name
+        :rtype: (:class:`h5py.Dataset` or :class:`h5py.Group`, :obj:`str`)
+        """
+        h5object = getattr(element.h5Object, "h5object", None)
+        if isinstance(h5object, h5py.Dataset):
+            return (h5object, None)
+        if isinstance(h5object, tuple) and len(h5object) == 2 \
+           and isinstance(h5object[0], h5py.AttributeManager):
+            owner = getattr(
+                getattr(element, "last", None), "h5Object", None)
+            owner = getattr(owner, "h5object", None)
+            if isinstance(owner, (h5py.Dataset, h5py.Group)):
+                return (owner, h5object[1])
+        return None
+
+    def __read(self):
+        """ reads values of the written FINAL objects
+
+        :returns: object paths, attribute names, field values
+                  with their shapes and types, and attributes
+        :rtype: :obj:`list` <(:obj:`str`, :obj:`str`, :obj:`tuple`, \
+                :obj:`list`)>
+        """
+        items = []
+        for el in self.__elements:
+            h5object, name = self.__object(el)
+            if name is None:
+                items.append((
+                    h5object.name, None,
+                    (h5object[...] if h5object.size else None,
+                     h5object.shape, h5object.dtype),
+                    self.__attributes(h5object, self.runattrs)))
+            else:
+                items.append((
+                    h5object.name, name, None,
+                    self.__attributes(h5object, (name,) + self.runattrs)))
+        return items
+
+    def copy(self, filename, attrs=None):
+        """ writes FINAL objects into the split file
+
+        :param filename: split file name
+        :type filename: :obj:`str`
+        :param attrs: root attributes of the split file
+        :type attrs: :obj:`dict` <:obj:`str`, :obj:`str`>
+        """
+        if self.__items is None:
+            self.__items = self.__read()
+        with h5py.File(filename, "r+") as fl:
+            for path, name, value, hattrs in self.__items:
+                try:
+                    if value is not None:
+                        h5object = self.__writeField(fl, path, value)
+                    else:
+                        h5object = fl[path]
+                    if hattrs:
+                        if not isinstance(h5object, h5py.HLObject):
+                            h5object = h5py.Dataset(h5object)
+                        for key, vl, dtype in hattrs:
+                            h5object.attrs.create(key, vl, dtype=dtype)
+                except Exception as e:
+                    if self._streams:
+                        self._streams.error(
+                            "FinalFieldCopies::copy() - "
+                            "The FINAL object '%s%s' cannot be written "
+                            "into '%s': %s" % (
+                                path, "@%s" % name if name else "",
+                                filename, str(e)), std=False)
+                    raise
+            for key, value in (attrs or {}).items():
+                fl.attrs[key] = value
+
+    @classmethod
+    def __writeField(cls, h5file, path, value):
+        """ writes the field value
+
+        :brief: The field with a different shape or type is recreated
+        :param h5file: split file
+        :type h5file: :class:`h5py.File`
+        :param path: field path
+        :type path: :obj:`str`
+        :param value: field value with its shape and type
+        :type value: :obj:`tuple`
+        :returns: written field
+        :rtype: :class:`h5py.h5d.DatasetID` or :class:`h5py.Dataset`
+        """
+        data, shape, dtype = value
+        dsid = h5py.h5d.open(h5file.id, path.encode('utf-8'))
+        if dsid.shape != shape or dsid.dtype != dtype:
+            field = h5py.Dataset(dsid)
+            hattrs = cls.__attributes(field, field.attrs.keys())
+            parent = field.parent
+            name = posixpath.basename(path)
+            del parent[name]
+            field = parent.create_dataset(
+                name, shape=shape, dtype=dtype,
+                maxshape=tuple(None for _ in shape) or None)
+            for key, vl, tp in hattrs:
+                field.attrs.create(key, vl, dtype=tp)
+            if data is not None:
+                field[...] = data
+            return field
+        if data is None:
+            return dsid
+        if dtype.kind == "O":
+            h5py.Dataset(dsid)[...] = data
+        else:
+            dsid.write(h5py.h5s.ALL, h5py.h5s.ALL,
+                       numpy.ascontiguousarray(data, dtype=dtype))
+        return dsid
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+# \package test nexdatas
+# \file ChunkCompressorH5PY_test.py
+# unittests for chunk compressor
+#
+import unittest
+import os
+import sys
+import numpy
+import h5py
+
+from nxswriter.ChunkCompressor import ChunkCompressor
+import nxswriter.ChunkCompressor
+
+try:
+    import hdf5plugin
+    # True if hdf5plugin is installed
+    HDF5PLUGIN_AVAILABLE = True
+except ImportError:
+    HDF5PLUGIN_AVAILABLE = False
+
+
+# test fixture
+class ChunkCompressorH5PYTest(unittest.TestCase):
+
+    # constructor
+    # \param methodName name of the test method
+    def __init__(self, methodName):
+        unittest.TestCase.__init__(self, methodName)
+
+    # test starter
+    # \brief Common set up
+    def setUp(self):
+        print("\nsetting up...")
+
+    # test closer
+    # \brief Common tear down
+    def tearDown(self):
+        print("tearing down ...")
+
+    # constructor test
+    # \brief It tests default settings
+    def test_constructor(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = ChunkCompressor([])
+        self.assertEqual(el.filters, [])
+        self.assertTrue(not el.isValid())
+
+        el = ChunkCompressor([(2, (2,)), (1, [4])])
+        self.assertEqual(el.filters, [(2, (2,)), (1, (4,))])
+        self.assertTrue(el.isValid())
+
+        self.assertTrue(not ChunkCompressor([(32001, ())]).isValid())
+        self.assertTrue(not ChunkCompressor([(1, ()), (307, ())]).isValid())
+        self.assertEqual(
+            ChunkCompressor([(32004, ())]).isValid(),
+            nxswriter.ChunkCompressor.LZ4_AVAILABLE)
+        self.assertTrue(
+            not ChunkCompressor([(32008, (0, 4, 2, 0, 0))]).isValid())
+        self.assertEqual(
+            ChunkCompressor([(32008, (0, 4, 2, 0, 2))]).isValid(),
+            nxswriter.ChunkCompressor.BITSHUFFLE_AVAILABLE)
+
+    # compress test
+    # \brief It tests if compressed chunks are readable by HDF5 filters
+    def test_compress(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+        fname = '%s/%s%s.h5' % (os.getcwd(), self.__class__.__name__, fun)
+
+        filters = [
+            ("deflate", dict(compression="gzip", compression_opts=3)),
+            ("shuffle_deflate",
+             dict(compression="gzip", compression_opts=1, shuffle=True)),
+        ]
+        if HDF5PLUGIN_AVAILABLE:
+            filters.append(("lz4", dict(**hdf5plugin.LZ4(nbytes=1000))))
+            filters.append(("bslz4", dict(**hdf5plugin.Bitshuffle())))
+        frames = [
+            numpy.arange(6000, dtype="uint16").reshape(60, 100) % 97,
+            numpy.random.rand(30, 40),
+            numpy.arange(256, dtype="int8"),
+        ]
+        try:
+            with h5py.File(fname, "w") as fl:
+                for name, kwargs in filters:
+                    for i, frame in enumerate(frames):
+                        dset = fl.create_dataset(
+                            "%s_%s" % (name, i), (2,) + frame.shape,
+                            frame.dtype, chunks=(1,) + frame.shape,
+                            **kwargs)
+                        plist = dset.id.get_create_plist()
+                        cp = ChunkCompressor(
+                            [plist.get_filter(j)[0:3:2]
+                             for j in range(plist.get_nfilters())])
+                        if not cp.isValid():
+                            continue
+                        dset.id.write_direct_chunk(
+                            (1,) + (0,) * frame.ndim, cp.compress(frame))
+                        dset[0] = frame
+            with h5py.File(fname, "r") as fl:
+                self.assertEqual(len(fl.keys()), len(filters) * len(frames))
+                for name in fl.keys():
+                    i = int(name.split("_")[-1])
+                    self.assertTrue(
+                        numpy.array_equal(fl[name][1], frames[i]))
+                    self.assertTrue(
+                        numpy.array_equal(fl[name][0], frames[i]))
+        finally:
+            os.remove(fname)
+
+    # stores test
+    # \brief It tests which pipelines store compressed chunks directly
+    def test_stores(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        self.assertTrue(ChunkCompressor.stores([(1, (6,))], 1))
+        self.assertTrue(ChunkCompressor.stores([(32004, (0,))], 32004))
+        self.assertTrue(
+            ChunkCompressor.stores([(32008, (0, 4, 2, 0, 2))], 32008))
+        self.assertTrue(
+            not ChunkCompressor.stores([(32008, (0, 4, 2, 0, 0))], 32008))
+        self.assertTrue(not ChunkCompressor.stores([(32008, (0, 0))], 32008))
+        self.assertTrue(not ChunkCompressor.stores([(1, (6,))], 32004))
+        self.assertTrue(
+            not ChunkCompressor.stores([(2, (2,)), (1, (6,))], 1))
+        self.assertTrue(not ChunkCompressor.stores([], 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+# \package test nexdatas
+# \file ConnectionPool_test.py
+# unittests for database connection pool
+#
+import unittest
+import os
+import sys
+import time
+import sqlite3
+import threading
+
+from nxswriter.ConnectionPool import ConnectionPool
+from nxswriter.DBaseSource import DBaseSource
+from nxswriter.Errors import DataSourceError
+
+
+# sqlite connection with a health check
+class SQLiteConnection(object):
+
+    # constructor
+    # \param name database file name
+    def __init__(self, name):
+        self.db = sqlite3.connect(name, check_same_thread=False)
+        self.closed = False
+        self.pings = 0
+
+    # provides a cursor
+    def cursor(self):
+        return self.db.cursor()
+
+    # finishes the transaction
+    def rollback(self):
+        self.db.rollback()
+
+    # checks the connection
+    def ping(self):
+        self.pings += 1
+        self.db.execute("SELECT 1")
+
+    # closes the connection
+    def close(self):
+        self.closed = True
+        self.db.close()
+
+
+# test fixture
+class ConnectionPoolTest(unittest.TestCase):
+
+    # constructor
+    # \param methodName name of the test method
+    def __init__(self, methodName):
+        unittest.TestCase.__init__(self, methodName)
+        self.__fname = None
+        self.__opened = []
+
+    # test starter
+    # \brief Common set up
+    def setUp(self):
+        print("\nsetting up...")
+        self.__fname = '%s/%s.sqlite' % (os.getcwd(), self.__class__.__name__)
+        self.__opened = []
+        db = sqlite3.connect(self.__fname)
+        db.execute("CREATE TABLE device (name TEXT, value INTEGER)")
+        db.execute("INSERT INTO device VALUES ('motor', 1)")
+        db.commit()
+        db.close()
+
+    # test closer
+    # \brief Common tear down
+    def tearDown(self):
+        print("tearing down ...")
+        for db in self.__opened:
+            if not db.closed:
+                db.close()
+        os.remove(self.__fname)
+
+    # opens a new connection
+    # \returns sqlite connection
+    def connect(self):
+        db = SQLiteConnection(self.__fname)
+        self.__opened.append(db)
+        return db
+
+    # constructor test
+    # \brief It tests default settings
+    def test_constructor(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = ConnectionPool()
+        self.assertEqual(el.maxsize, 4)
+        self.assertEqual(el.maxidle, 300.)
+        self.assertEqual(el.maxopen, 16)
+        self.assertEqual(el.timeout, 60.)
+        self.assertEqual(el.size(), 0)
+        self.assertEqual(el.opened(), 0)
+        el = ConnectionPool(2, 10., 3, None)
+        self.assertEqual(el.maxsize, 2)
+        self.assertEqual(el.maxidle, 10.)
+        self.assertEqual(el.maxopen, 3)
+        self.assertEqual(el.timeout, None)
+        self.assertTrue(isinstance(DBaseSource.connections, ConnectionPool))
+
+    # acquire release test
+    # \brief It tests if connections are reused
+    def test_acquire_release(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = ConnectionPool()
+        db = el.acquire(("SQLITE", "a"), self.connect)
+        self.assertEqual(len(self.__opened), 1)
+        cursor = db.cursor()
+        cursor.execute("SELECT value FROM device")
+        self.assertEqual(cursor.fetchone()[0], 1)
+        cursor.close()
+        el.release(("SQLITE", "a"), db)
+        self.assertEqual(el.size(("SQLITE", "a")), 1)
+
+        db2 = el.acquire(("SQLITE", "a"), self.connect)
+        self.assertTrue(db2 is db)
+        self.assertEqual(db.pings, 1)
+        self.assertEqual(len(self.__opened), 1)
+        self.assertEqual(el.size(), 0)
+
+        db3 = el.acquire(("SQLITE", "b"), self.connect)
+        self.assertTrue(db3 is not db)
+        self.assertEqual(len(self.__opened), 2)
+        el.release(("SQLITE", "a"), db2)
+        el.release(("SQLITE", "b"), db3)
+        self.assertEqual(el.size(("SQLITE", "a")), 1)
+        self.assertEqual(el.size(("SQLITE", "b")), 1)
+        self.assertEqual(el.size(), 2)
+
+        el.clear()
+        self.assertEqual(el.size(), 0)
+        self.assertTrue(db.closed)
+        self.assertTrue(db3.closed)
+
+    # health check test
+    # \brief It tests if broken connections are replaced
+    def test_acquire_broken(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = ConnectionPool()
+        db = el.acquire(("SQLITE", "a"), self.connect)
+        el.release(("SQLITE", "a"), db)
+        db.db.close()
+        db2 = el.acquire(("SQLITE", "a"), self.connect)
+        self.assertTrue(db2 is not db)
+        self.assertTrue(db.closed)
+        self.assertEqual(len(self.__opened), 2)
+
+        el.discard(db2)
+        self.assertTrue(db2.closed)
+        self.assertEqual(el.size(), 0)
+
+    # maxsize test
+    # \brief It tests if the number of idle connections is limited
+    def test_maxsize(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = ConnectionPool(maxsize=2)
+        dbs = [el.acquire(("SQLITE", "a"), self.connect) for _ in range(3)]
+        self.assertEqual(len(self.__opened), 3)
+        for db in dbs:
+            el.release(("SQLITE", "a"), db)
+        self.assertEqual(el.size(("SQLITE", "a")), 2)
+        self.assertTrue(not dbs[0].closed)
+        self.assertTrue(not dbs[1].closed)
+        self.assertTrue(dbs[2].closed)
+        self.assertEqual(el.opened(), 2)
+
+    # maxopen test
+    # \brief It tests if the number of open connections is limited
+    def test_maxopen(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = ConnectionPool(maxopen=2, timeout=0.1)
+        db = el.acquire(("SQLITE", "a"), self.connect)
+        db2 = el.acquire(("SQLITE", "a"), self.connect)
+        self.assertEqual(el.opened(), 2)
+        self.assertRaises(
+            DataSourceError, el.acquire, ("SQLITE", "b"), self.connect)
+        self.assertEqual(len(self.__opened), 2)
+
+        # an idle connection of another key is closed
+        el.release(("SQLITE", "a"), db)
+        db3 = el.acquire(("SQLITE", "b"), self.connect)
+        self.assertTrue(db.closed)
+        self.assertEqual(len(self.__opened), 3)
+        self.assertEqual(el.opened(), 2)
+
+        # a waiting thread gets the released connection
+        el.timeout = None
+        results = []
+
+        def query():
+            results.append(el.acquire(("SQLITE", "a"), self.connect))
+
+        th = threading.Thread(target=query)
+        th.start()
+        time.sleep(0.05)
+        self.assertEqual(results, [])
+        el.release(("SQLITE", "a"), db2)
+        th.join()
+        self.assertTrue(results[0] is db2)
+        self.assertEqual(len(self.__opened), 3)
+
+        # a discarded connection frees its place
+        th = threading.Thread(target=query)
+        th.start()
+        time.sleep(0.05)
+        el.discard(db3)
+        th.join()
+        self.assertEqual(len(self.__opened), 4)
+        self.assertTrue(results[1] is self.__opened[-1])
+        self.assertEqual(el.opened(), 2)
+        el.release(("SQLITE", "a"), results[0])
+        el.release(("SQLITE", "a"), results[1])
+        el.clear()
+        self.assertEqual(el.opened(), 0)
+
+    # idle eviction test
+    # \brief It tests if idle connections are closed
+    def test_maxidle(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = ConnectionPool(maxidle=0.05)
+        db = el.acquire(("SQLITE", "a"), self.connect)
+        db2 = el.acquire(("SQLITE", "b"), self.connect)
+        el.release(("SQLITE", "a"), db)
+        el.release(("SQLITE", "b"), db2)
+        time.sleep(0.1)
+        db3 = el.acquire(("SQLITE", "a"), self.connect)
+        self.assertTrue(db3 is not db)
+        self.assertTrue(db.closed)
+        self.assertTrue(db2.closed)
+        self.assertEqual(el.size(), 0)
+
+    # transaction test
+    # \brief It tests if reused connections see committed changes
+    def test_release_transaction(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = ConnectionPool()
+        db = el.acquire(("SQLITE", "a"), self.connect)
+        cursor = db.cursor()
+        cursor.execute("INSERT INTO device VALUES ('temp', 2)")
+        cursor.close()
+        el.release(("SQLITE", "a"), db)
+        db = el.acquire(("SQLITE", "a"), self.connect)
+        cursor = db.cursor()
+        cursor.execute("SELECT count(*) FROM device")
+        self.assertEqual(cursor.fetchone()[0], 1)
+        cursor.close()
+        el.release(("SQLITE", "a"), db)
+
+    # threads test
+    # \brief It tests if the pool can be shared by threads
+    def test_threads(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = ConnectionPool(maxsize=8)
+        results = []
+
+        def query():
+            for _ in range(20):
+                db = el.acquire(("SQLITE", "a"), self.connect)
+                cursor = db.cursor()
+                cursor.execute("SELECT value FROM device")
+                results.append(cursor.fetchone()[0])
+                cursor.close()
+                el.release(("SQLITE", "a"), db)
+
+        threads = [threading.Thread(target=query) for _ in range(4)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        self.assertEqual(results, [1] * 80)
+        self.assertTrue(len(self.__opened) <= 4)
+        self.assertEqual(el.size(), len(self.__opened))
+        self.assertEqual(el.opened(), len(self.__opened))
+        el.clear()
+
+        # limited number of open connections
+        el = ConnectionPool(maxsize=1, maxopen=2)
+        results = []
+        threads = [threading.Thread(target=query) for _ in range(4)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        self.assertEqual(results, [1] * 80)
+        self.assertEqual(el.opened(), 1)
+        el.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,9 +22,10 @@
 import unittest
 import sys
 import struct
+import numpy
 
 
-from nxswriter.Types import Converters
+from nxswriter.Types import Converters, NTP
 
 
 # if 64-bit machione
@@ -170,6 +171,39 @@ class ConvertersTest(unittest.TestCase):
         for b in bools:
             self.assertEqual(Converters.toBool(b), bools[b])
 
+    # toBoolArray test
+    # \brief It tests conversion of arrays
+    def test_toBoolArray(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        arrs = [
+            [1, 0, 2, -1],
+            [[0.0, 1.5], [2.0, 0.0]],
+            [True, False, True],
+            numpy.array(["True", " false ", "0", "1", "FALSE", "x", ""]),
+            numpy.array([["false", "0"], ["", " "]]),
+            numpy.array([b"false", b"0", b"", b"1"]),
+            ["True", "false", "0", "1", "FALSE", ""],
+            [0.0, "a", "false", 1],
+            numpy.array([[3, 0], [0, 1]], dtype="uint16"),
+        ]
+
+        for arr in arrs:
+            res = Converters.toBoolArray(arr)
+            self.assertTrue(isinstance(res, numpy.ndarray))
+            self.assertEqual(res.dtype.name, "bool")
+            # element-wise conversion
+            self.assertEqual(
+                res.tolist(),
+                numpy.array(NTP().createArray(arr, Converters.toBool),
+                            dtype="bool").tolist())
+
+        self.assertEqual(
+            Converters.toBoolArray(
+                numpy.array(["false", "0", "", "x"])).tolist(),
+            [True, True, False, True])
+
 
 if __name__ == '__main__':
     unittest.main()
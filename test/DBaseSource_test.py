@@ -26,10 +26,11 @@ import random
 import struct
 import binascii
 import time
+import numpy
 
 
 from nxswriter.DataSources import DataSource
-from nxswriter.DBaseSource import DBaseSource
+from nxswriter.DBaseSource import DBaseSource, ResultCache
 from nxswriter.Errors import DataSourceSetupError
 
 # if 64-bit machione
@@ -103,6 +104,7 @@ class DBaseSourceTest(unittest.TestCase):
         self.assertEqual(ds.passwd, None)
         self.assertEqual(ds.mycnf, '/etc/my.cnf')
         self.assertEqual(ds.format, None)
+        self.assertEqual(ds.ttl, None)
 
     # __str__ test
     # \brief It tests default settings
@@ -435,6 +437,70 @@ class DBaseSourceTest(unittest.TestCase):
         self.assertEqual(ds.passwd, passwd)
         self.assertEqual(ds.mycnf, '/etc/my.cnf')
 
+    # setup test
+    # \brief It tests time-to-live of query results
+    def test_setup_ttl(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        query = "select pid from devices;"
+        ds = DBaseSource()
+        ds.setup("<datasource><query format='SPECTRUM'>%s</query>"
+                 "</datasource>" % query)
+        self.assertEqual(ds.ttl, None)
+
+        ds = DBaseSource()
+        ds.setup("<datasource><query format='SPECTRUM' ttl='2.5'>%s"
+                 "</query></datasource>" % query)
+        self.assertEqual(ds.ttl, 2.5)
+        self.assertEqual(ds.query, query)
+
+        ds = DBaseSource()
+        self.myAssertRaise(
+            DataSourceSetupError, ds.setup,
+            "<datasource><query format='SPECTRUM' ttl='long'>%s"
+            "</query></datasource>" % query)
+
+    # ResultCache test
+    # \brief It tests caching of query results
+    def test_ResultCache(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        self.assertTrue(isinstance(DBaseSource.results, ResultCache))
+        el = ResultCache(2)
+        self.assertEqual(el.maxsize, 2)
+        self.assertEqual(el.get(("MYSQL", "q1")), None)
+
+        sdata = {"rank": "SPECTRUM", "value": ["a", "b"],
+                 "tangoDType": "DevString", "shape": [2, 0]}
+        dt = el.set(("MYSQL", "q1"), sdata, 10.)
+        self.assertEqual(dt, sdata)
+        dt["value"].append("c")
+        dt = el.get(("MYSQL", "q1"))
+        self.assertEqual(dt["value"], ["a", "b"])
+        self.assertTrue(dt is not sdata)
+
+        adata = {"rank": "IMAGE", "value": numpy.ones((2, 3)),
+                 "tangoDType": "DevDouble", "shape": [2, 3]}
+        dt = el.set(("MYSQL", "q2"), adata, 10.)
+        self.assertTrue(dt["value"] is adata["value"])
+        self.assertTrue(not dt["value"].flags.writeable)
+        self.assertTrue(el.get(("MYSQL", "q2"))["value"] is adata["value"])
+
+        el.set(("MYSQL", "q3"), dict(sdata), 20.)
+        self.assertEqual(el.get(("MYSQL", "q1")), None)
+        self.assertTrue(el.get(("MYSQL", "q2")) is not None)
+        self.assertTrue(el.get(("MYSQL", "q3")) is not None)
+
+        el.set(("MYSQL", "q4"), dict(sdata), 0.05)
+        time.sleep(0.1)
+        self.assertEqual(el.get(("MYSQL", "q4")), None)
+        self.assertTrue(el.get(("MYSQL", "q3")) is not None)
+
+        el.clear()
+        self.assertEqual(el.get(("MYSQL", "q3")), None)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -27,6 +27,7 @@ import struct
 import numpy
 import binascii
 import time
+import zlib
 
 
 from nxswriter.DataHolder import DataHolder
@@ -757,6 +758,145 @@ class DataHolderTest(unittest.TestCase):
                         else:
                             self.myAssertRaise(Exception, el.cast, it)
 
+    # cast test
+    # \brief It tests casting without copying
+    def test_cast_nocopy(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        value = numpy.arange(24, dtype="uint16").reshape(4, 6)
+        el = DataHolder("IMAGE", value, "DevUShort", [4, 6])
+        elc = el.cast("uint16")
+        self.assertTrue(elc is value)
+        self.assertTrue(el.cast("uint16") is elc)
+
+        elc = el.cast("float32")
+        self.assertEqual(elc.dtype.name, "float32")
+        self.assertTrue(el.cast("float32") is elc)
+        self.assertTrue(numpy.array_equal(elc, value))
+
+        el.value = numpy.ones((2, 3), dtype="uint16")
+        elc = el.cast("float32")
+        self.assertEqual(elc.shape, (2, 3))
+        self.assertTrue(numpy.array_equal(elc, el.value))
+
+        value = [[1, 2, 3], [4, 5, 6]]
+        el = DataHolder("IMAGE", value, "DevLong64", [2, 3])
+        elc = el.cast("int64")
+        self.assertEqual(elc.dtype.name, "int64")
+        self.assertTrue(el.cast("int64") is elc)
+
+    # buffer test
+    # \brief It tests providing aligned contiguous buffers
+    def test_buffer(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        value = numpy.arange(24, dtype="uint32").reshape(4, 6)
+        el = DataHolder("IMAGE", value, "DevULong", [4, 6])
+        buf = el.buffer("uint32")
+        self.assertTrue(buf is value)
+
+        value = numpy.arange(24, dtype="uint32").reshape(4, 6)[:, ::2]
+        el = DataHolder("IMAGE", value, "DevULong", [4, 3])
+        buf = el.buffer("uint32")
+        self.assertTrue(buf.flags.c_contiguous)
+        self.assertTrue(buf.flags.aligned)
+        self.assertTrue(numpy.array_equal(buf, value))
+
+        value = numpy.arange(24, dtype=">u4").reshape(4, 6)
+        el = DataHolder("IMAGE", value, "DevULong", [4, 6])
+        buf = el.buffer("uint32")
+        self.assertTrue(buf.dtype.isnative)
+        self.assertTrue(numpy.array_equal(buf, value))
+
+    # constructor test
+    # \brief It tests compressed DevEncoded data
+    def test_constructor_encode_compressed(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        value = numpy.arange(24, dtype="int16").reshape(4, 6)
+        hformat = '<IHHIIHHHHHHHHIIIIIIII'
+        chunk = zlib.compress(value.tobytes())
+        data = ["ZLIB_DATA_ARRAY", struct.pack(
+            hformat, 0x44544159, 2, struct.calcsize(hformat), 0, 5, 0, 2,
+            6, 4, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 0, 0) + chunk]
+        el = DataHolder("SCALAR", data, "DevEncoded", [1, 0],
+                        "ZLIB_DATA_ARRAY", DecoderPool())
+        self.assertEqual(el.format, "IMAGE")
+        self.assertEqual(el.tangoDType, "DevShort")
+        self.assertEqual(el.shape, [4, 6])
+        self.assertEqual(el.filterid, 1)
+        self.assertEqual(bytes(el.chunk), chunk)
+        self.assertTrue(numpy.array_equal(el.value, value))
+        self.assertTrue(numpy.array_equal(el.cast("int16"), value))
+
+        el = DataHolder("SCALAR", data, "DevEncoded", [1, 0],
+                        "ZLIB_DATA_ARRAY", DecoderPool())
+        el.value = value
+        self.assertTrue(el.value is value)
+
+    # constructor test
+    # \brief It tests if decoded DevEncoded data are read-only
+    def test_constructor_encode_readonly(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        hformat = '<IHHIIHHHHHHHHIIIIIIII'
+        value = numpy.arange(24, dtype="uint16").reshape(4, 6)
+        for endianness, image, tp in [
+                (0, value.tobytes(), bytes),
+                (0, value.tobytes(), bytearray),
+                (1, value.astype(">u2").tobytes(), bytes)]:
+            encoded = tp(struct.pack(
+                hformat, 0x44544159, 2, struct.calcsize(hformat), 0, 1,
+                endianness, 2, 6, 4, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 0, 0) +
+                image)
+            data = ["DATA_ARRAY", encoded]
+            el = DataHolder("SCALAR", data, "DevEncoded", [1, 0],
+                            "DATA_ARRAY", DecoderPool())
+            self.assertTrue(numpy.array_equal(el.value, value))
+            self.assertTrue(not el.value.flags.writeable)
+            self.assertRaises(ValueError, el.value.fill, 0)
+            self.assertTrue(el.cast("uint16") is el.value)
+            elc = el.cast("float64")
+            self.assertTrue(elc.flags.writeable)
+            elc[...] = 0
+            self.assertTrue(numpy.array_equal(el.value, value))
+            self.assertEqual(
+                bytes(encoded[struct.calcsize(hformat):]), image)
+
+        data = ["UINT32", numpy.arange(4, dtype="uint32").tobytes()]
+        el = DataHolder("SCALAR", data, "DevEncoded", [1, 0],
+                        "UINT32", DecoderPool())
+        self.assertEqual(el.value.tolist(), [0, 1, 2, 3])
+        self.assertTrue(not el.value.flags.writeable)
+
+    # constructor test
+    # \brief It tests multi-frame DevEncoded data
+    def test_constructor_encode_frames(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        hformat = '<IHHIIHHHHHHHHIIIIIIII'
+        frames = numpy.arange(24, dtype="uint32").reshape(2, 3, 4)
+        data = ["DATA_ARRAY", struct.pack(
+            hformat, 0x44544159, 2, struct.calcsize(hformat), 0, 2, 0, 3,
+            4, 3, 2, 0, 0, 0, 1, 1, 1, 1, 1, 1, 0, 0) + frames.tobytes()]
+        el = DataHolder("SCALAR", data, "DevEncoded", [1, 0],
+                        "DATA_ARRAY", DecoderPool())
+        self.assertEqual(el.format, "VERTEX")
+        self.assertEqual(el.tangoDType, "DevULong")
+        self.assertEqual(el.shape, [2, 3, 4])
+        self.assertTrue(numpy.array_equal(el.value, frames))
+
+        data = ["DATA_ARRAY", struct.pack(
+            hformat, 0x44544159, 2, struct.calcsize(hformat), 0, 2, 0, 4,
+            4, 3, 2, 1, 0, 0, 1, 1, 1, 1, 1, 1, 0, 0) + frames.tobytes()]
+        self.assertRaises(ValueError, DataHolder, "SCALAR", data,
+                          "DevEncoded", [1, 0], "DATA_ARRAY", DecoderPool())
+
 
 if __name__ == '__main__':
     unittest.main()
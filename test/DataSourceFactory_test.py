@@ -30,7 +30,7 @@ except Exception:
     from . import TstDataSource
 
 from nxswriter.DataSourceFactory import DataSourceFactory
-from nxswriter.DataSourcePool import DataSourcePool
+from nxswriter.DataSourcePool import DataSourcePool, BatchDataSource
 from nxswriter.Element import Element
 from nxswriter.EField import EField
 from nxswriter import DataSources
@@ -44,6 +44,22 @@ from nxswriter.DecoderPool import DecoderPool
 IS64BIT = (struct.calcsize("P") == 8)
 
 
+# DataSource with batch data provider
+class BatchDS(DataSources.DataSource):
+    # batch calls
+    calls = []
+
+    # batch data provider
+    # \param sources list of datasources
+    # \returns list of data
+    @classmethod
+    def fetch_many(cls, sources):
+        cls.calls.append(len(sources))
+        return [{"rank": "SCALAR", "value": len(sources),
+                 "tangoDType": "DevLong", "shape": [0, 0]}
+                for _ in sources]
+
+
 # test fixture
 class DataSourceFactoryTest(unittest.TestCase):
 
@@ -391,6 +407,35 @@ ds.result = ds.myclient + 1
         self.assertEqual(td.stack[11], 'getData')
         self.checkData(dt, "SCALAR", 1, "DevLong", [0, 0])
 
+    # store test
+    # \brief It tests if datasources with batch data providers are wrapped
+    def test_store_batch(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        dsp = DataSourcePool()
+        dsp.append(BatchDS, "BATCH")
+        dsp.counter = 1
+        BatchDS.calls[:] = []
+        sources = []
+        elements = []
+        for strategy in ["STEP", "STEP", "STEP", "INIT"]:
+            el = EField(self._fattrs, None)
+            el.strategy = strategy
+            elements.append(el)
+            ds = DataSourceFactory({"type": "BATCH"}, el)
+            self.assertEqual(ds.setDataSources(dsp), None)
+            self.assertEqual(
+                ds.store(["<datasource type='BATCH'>", "",
+                          "</datasource>"]), None)
+            self.assertTrue(isinstance(ds.last.source, BatchDataSource))
+            self.assertTrue(isinstance(ds.last.source.source, BatchDS))
+            sources.append(ds.last.source)
+        # the INIT datasource is not read in the STEP batch
+        for source in sources[:3]:
+            self.checkData(source.getData(), "SCALAR", 3, "DevLong", [0, 0])
+        self.assertEqual(BatchDS.calls, [3])
+
 
 if __name__ == '__main__':
     unittest.main()
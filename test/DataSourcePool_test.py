@@ -23,11 +23,12 @@ import unittest
 import sys
 import struct
 import json
+import numpy
 
 import nxswriter
 
 
-from nxswriter.DataSourcePool import DataSourcePool
+from nxswriter.DataSourcePool import DataSourcePool, BatchDataSource
 from nxswriter.TangoSource import TangoSource
 from nxswriter.DBaseSource import DBaseSource
 from nxswriter.ClientSource import ClientSource
@@ -104,6 +105,69 @@ class W4DS(object):
         pass
 
 
+# DataSource with batch data provider
+class BatchDS(object):
+    # batch calls
+    calls = []
+
+    # constructor
+    # \param value datasource value
+    def __init__(self, value=None):
+        self.value = value
+
+    # setup method
+    def setup(self, xml):
+        pass
+
+    # getData method
+    def getData(self):
+        return self.fetch_many([self])[0]
+
+    # isValid method
+    def isValid(self):
+        return True
+
+    # str method
+    def __str__(self):
+        return "BatchDS %s" % self.value
+
+    # batch data provider
+    # \param sources list of datasources
+    # \returns list of data
+    @classmethod
+    def fetch_many(cls, sources):
+        cls.calls.append(
+            sorted(src.value for src in sources if src.value is not None))
+        return [ValueError("wrong value") if src.value is None else
+                {"rank": "SCALAR", "value": src.value,
+                 "tangoDType": "DevLong64", "shape": [1, 0]}
+                for src in sources]
+
+
+# element with a strategy
+class StrategyElement(object):
+
+    # constructor
+    # \param strategy strategy mode
+    def __init__(self, strategy=None):
+        self.strategy = strategy
+
+
+# DataSource with asynchronous batch data provider
+class AsyncBatchDS(BatchDS):
+    # batch calls
+    calls = []
+
+    # asynchronous batch data provider
+    # \param sources list of datasources
+    # \returns list of data
+    @classmethod
+    def fetch_many_async(cls, sources):
+        async def fetch():
+            return cls.fetch_many(sources)
+        return fetch()
+
+
 # test fixture
 class DataSourcePoolTest(unittest.TestCase):
 
@@ -343,6 +407,178 @@ class DataSourcePoolTest(unittest.TestCase):
         self.assertEqual(el.get("CL"), None)
         self.assertEqual(el.get("W0"), None)
 
+    # getData test
+    # \brief It tests if data are read once per step
+    def test_getData(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return {"rank": "SPECTRUM", "value": [[1, 2], [3]],
+                    "tangoDType": "DevLong", "shape": [2, 0]}
+
+        def afetch():
+            calls.append(1)
+            return {"rank": "IMAGE", "value": numpy.ones((2, 3)),
+                    "tangoDType": "DevDouble", "shape": [2, 3]}
+
+        el = DataSourcePool()
+        for counter in [0, -1, -2]:
+            el.counter = counter
+            calls[:] = []
+            el.getData(("DB", "q"), fetch)
+            el.getData(("DB", "q"), fetch)
+            self.assertEqual(len(calls), 2)
+
+        el.counter = 1
+        calls[:] = []
+        dt1 = el.getData(("DB", "q"), fetch)
+        dt2 = el.getData(("DB", "q"), fetch)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(dt1, dt2)
+        dt1["value"][0].append(5)
+        self.assertEqual(dt2["value"], [[1, 2], [3]])
+        self.assertEqual(
+            el.getData(("DB", "q"), fetch)["value"], [[1, 2], [3]])
+        self.assertEqual(len(calls), 1)
+
+        el.getData(("DB", "q2"), fetch)
+        self.assertEqual(len(calls), 2)
+        el.counter = 1
+        el.getData(("DB", "q"), fetch)
+        self.assertEqual(len(calls), 2)
+
+        el.counter = 2
+        el.getData(("DB", "q"), fetch)
+        self.assertEqual(len(calls), 3)
+
+        calls[:] = []
+        dt1 = el.getData(("TANGO", "a"), afetch)
+        dt2 = el.getData(("TANGO", "a"), afetch)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(dt1["value"] is dt2["value"])
+        self.assertTrue(not dt1["value"].flags.writeable)
+
+        # arrays owned by datasources stay writeable
+        value = numpy.ones((2, 3))
+        data = {"rank": "IMAGE", "value": value,
+                "tangoDType": "DevDouble", "shape": [2, 3]}
+        dt1 = el.getData(("TANGO", "b"), lambda: data)
+        self.assertTrue(value.flags.writeable)
+        self.assertTrue(data["value"] is value)
+        self.assertTrue(not dt1["value"].flags.writeable)
+        self.assertTrue(dt1["value"].base is value)
+
+    # getBatchData test
+    # \brief It tests if user datasources are read in batches
+    def test_getBatchData(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = DataSourcePool()
+        ds = W4DS()
+        self.assertTrue(el.register(ds) is ds)
+
+        BatchDS.calls[:] = []
+        dss = [el.register(BatchDS(i)) for i in range(4)]
+        for ds in dss:
+            self.assertTrue(isinstance(ds, BatchDataSource))
+            self.assertTrue(isinstance(ds.source, BatchDS))
+            self.assertTrue(ds.isValid())
+        self.assertEqual(str(dss[2]), "BatchDS 2")
+
+        self.assertEqual(dss[1].getData()["value"], 1)
+        self.assertEqual(BatchDS.calls, [[1]])
+
+        el.counter = -1
+        BatchDS.calls[:] = []
+        self.assertEqual(dss[0].getData()["value"], 0)
+        self.assertEqual(dss[1].getData()["value"], 1)
+        self.assertEqual(BatchDS.calls, [[0, 1, 2, 3]])
+
+        for counter in range(1, 4):
+            el.counter = counter
+            BatchDS.calls[:] = []
+            for ds in dss[1:]:
+                self.assertEqual(ds.getData()["value"], ds.value)
+            self.assertEqual(BatchDS.calls, [[0, 1, 2, 3]]
+                             if counter == 1 else [[1, 2, 3]])
+
+        el.counter = -2
+        BatchDS.calls[:] = []
+        self.assertEqual(dss[3].getData()["value"], 3)
+        self.assertEqual(dss[3].getData()["value"], 3)
+        self.assertEqual(BatchDS.calls, [[0, 1, 2, 3], [3]])
+
+        el.counter = -1
+        BatchDS.calls[:] = []
+        self.assertEqual(dss[2].getData()["value"], 2)
+        self.assertEqual(dss[0].getData()["value"], 0)
+        self.assertEqual(BatchDS.calls, [[0, 1, 2]])
+
+        el.counter = 1
+        ds = el.register(BatchDS())
+        self.myAssertRaise(ValueError, ds.getData)
+        self.assertEqual(dss[2].getData()["value"], 2)
+
+        if sys.version_info > (3,):
+            AsyncBatchDS.calls[:] = []
+            dss = [el.register(AsyncBatchDS(i)) for i in range(3)]
+            el.counter = 2
+            for ds in dss:
+                self.assertEqual(ds.getData()["value"], ds.value)
+            self.assertEqual(AsyncBatchDS.calls, [[0, 1, 2]])
+
+    # getBatchData test
+    # \brief It tests if batches contain datasources of the current mode
+    def test_getBatchData_modes(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = DataSourcePool()
+        BatchDS.calls[:] = []
+        strategies = ["INIT", "STEP", "FINAL", "STEP", "INIT", None]
+        elements = [StrategyElement(st) for st in strategies]
+        dss = [el.register(BatchDS(i), elements[i]) for i in range(6)]
+        self.assertEqual(el.modes, {"INIT": -1, "STEP": 1, "FINAL": -2})
+
+        el.counter = -1
+        self.assertEqual(dss[0].getData()["value"], 0)
+        self.assertEqual(dss[4].getData()["value"], 4)
+        self.assertEqual(BatchDS.calls, [[0, 4]])
+
+        el.counter = 1
+        BatchDS.calls[:] = []
+        self.assertEqual(dss[1].getData()["value"], 1)
+        self.assertEqual(dss[3].getData()["value"], 3)
+        self.assertEqual(BatchDS.calls, [[1, 3]])
+
+        # strategy set after registration
+        elements[5].strategy = "STEP"
+        el.counter = 2
+        BatchDS.calls[:] = []
+        self.assertEqual(dss[5].getData()["value"], 5)
+        self.assertEqual(dss[1].getData()["value"], 1)
+        self.assertEqual(BatchDS.calls, [[1, 3, 5]])
+
+        el.counter = -2
+        BatchDS.calls[:] = []
+        self.assertEqual(dss[2].getData()["value"], 2)
+        self.assertEqual(BatchDS.calls, [[2]])
+
+        # datasources of removed elements are not read
+        el2 = DataSourcePool()
+        BatchDS.calls[:] = []
+        element = StrategyElement("STEP")
+        ds = el2.register(BatchDS(1), element)
+        el2.register(BatchDS(2), StrategyElement("STEP"))
+        el2.counter = 1
+        self.assertEqual(ds.getData()["value"], 1)
+        self.assertEqual(BatchDS.calls, [[1]])
+
 
 if __name__ == '__main__':
     unittest.main()
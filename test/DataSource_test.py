@@ -24,7 +24,7 @@ import sys
 import struct
 import xml.etree.ElementTree as et
 
-from nxswriter.DataSources import DataSource
+from nxswriter.DataSources import DataSource, XMLNodeCache, XMLNODES
 from nxswriter.TangoSource import PYTANGO_AVAILABLE as PYTANGO
 from nxswriter.DBaseSource import DB_AVAILABLE as DB
 
@@ -188,6 +188,40 @@ class DataSourceTest(unittest.TestCase):
         node = et.fromstring("<node></node>")
         self.assertEqual(el._getText(node).strip(), '')
 
+    # parse test
+    # \brief It tests caching of parsed xml
+    def test_parse(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        xml = "<datasource><record name='r1'/></datasource>"
+        node = DataSource._parse(xml)
+        self.assertEqual(node.tag, "datasource")
+        self.assertEqual(node.find("record").get("name"), "r1")
+        self.assertTrue(DataSource._parse(xml) is node)
+        self.assertTrue(DataSource._parse(xml.encode()) is node)
+        self.assertTrue(XMLNODES.get(xml) is node)
+        self.myAssertRaise(Exception, DataSource._parse, "<datasource>")
+
+        el = XMLNodeCache(2)
+        self.assertEqual(el.maxsize, 2)
+        nodes = [el.get("<node>%s</node>" % i) for i in range(3)]
+        self.assertEqual([nd.text for nd in nodes], ["0", "1", "2"])
+        self.assertTrue(el.get("<node>2</node>") is nodes[2])
+        self.assertTrue(el.get("<node>0</node>") is not nodes[0])
+        el.set("<node>1</node>", nodes[0])
+        self.assertTrue(el.get("<node>1</node>") is nodes[0])
+        el.clear()
+        self.assertTrue(el.get("<node>1</node>") is not nodes[0])
+
+        attached = {}
+        self.assertEqual(el.attach(attached), None)
+        node = el.get("<node>1</node>")
+        self.assertEqual(list(attached.values()), [node])
+        self.assertTrue(el.get(b"<node>1</node>") is node)
+        self.assertTrue(el.attach(None) is attached)
+        self.assertTrue(el.get("<node>1</node>") is not node)
+
 
 if __name__ == '__main__':
     unittest.main()
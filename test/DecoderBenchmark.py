@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+# \package test nexdatas
+# \file DecoderBenchmark.py
+# benchmark for DevEncoded decoders
+#
+# usage: python DecoderBenchmark.py [<width> [<height> [<repeat>]]]
+#
+import sys
+import struct
+import timeit
+import zlib
+import numpy
+
+try:
+    import lz4.block
+    # True if lz4 is installed
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+try:
+    import bitshuffle
+    # True if bitshuffle is installed
+    BITSHUFFLE_AVAILABLE = True
+except ImportError:
+    BITSHUFFLE_AVAILABLE = False
+
+from nxswriter.DataHolder import DataHolder
+from nxswriter.DecoderPool import DecoderPool
+
+
+# Creates an encoded VIDEO_IMAGE from numpy array
+# \param image numpy array
+# \returns lima image
+def encodeVideoImage(image):
+    modes = {'uint8': 0, 'uint16': 1, 'uint32': 2, 'uint64': 3}
+    height, width = image.shape
+    endian = ord(struct.pack('=H', 1).decode()[-1])
+    hsize = struct.calcsize('!IHHqiiHHHH')
+    header = struct.pack('!IHHqiiHHHH', 0x5644454f, 1,
+                         modes[str(image.dtype)], -1,
+                         width, height, endian, hsize, 0, 0)
+    return ['VIDEO_IMAGE', header + image.tobytes()]
+
+
+# Creates an encoded DATA_ARRAY from numpy array
+# \param image numpy array
+# \returns lima data array
+def encodeDataArray(image):
+    modes = {'uint8': 0, 'uint16': 1, 'uint32': 2, 'uint64': 3,
+             'int8': 4, 'int16': 5, 'int32': 6, 'int64': 7,
+             'float32': 8, 'float64': 9}
+    endian = ord(struct.pack('=H', 1).decode()[-1])
+    hformat = '<IHHIIHHHHHHHHIIIIIIII'
+    hsize = struct.calcsize(hformat)
+    shape = list(reversed(image.shape)) + [0] * (6 - len(image.shape))
+    steps = [1] * 6
+    header = struct.pack(hformat, 0x44544159, 2, hsize, 0,
+                         modes[str(image.dtype)], endian, len(image.shape),
+                         *(shape + steps + [0, 0]))
+    return ['DATA_ARRAY', header + image.tobytes()]
+
+
+# Compresses an encoded DATA_ARRAY
+# \param data lima data array
+# \param filterid HDF5 filter id
+# \param blocksize compression block size in elements
+# \returns compressed lima data array
+def compressDataArray(data, filterid, blocksize=2048):
+    name, image = data
+    hsize = struct.unpack('<H', image[6:8])[0]
+    itemsize = {0: 1, 1: 2, 2: 4, 3: 8, 4: 1, 5: 2, 6: 4, 7: 8,
+                8: 4, 9: 8}[struct.unpack('<I', image[12:16])[0]]
+    raw = image[hsize:]
+    if filterid == 1:
+        return ['ZLIB_' + name, image[:hsize] + zlib.compress(raw)]
+    bsize = blocksize * itemsize
+    if filterid == 32004:
+        chunk = struct.pack('>QI', len(raw), bsize)
+        for i in range(0, len(raw), bsize):
+            block = raw[i:i + bsize]
+            cblock = lz4.block.compress(block, store_size=False)
+            if len(cblock) >= len(block):
+                cblock = block
+            chunk += struct.pack('>I', len(cblock)) + cblock
+        return ['LZ4_' + name, image[:hsize] + chunk]
+    arr = numpy.frombuffer(raw, dtype='uint%s' % (itemsize * 8))
+    chunk = struct.pack('>QI', len(raw), bsize) + \
+        bitshuffle.compress_lz4(arr, blocksize).tobytes()
+    return ['BSLZ4_' + name, image[:hsize] + chunk]
+
+
+# Measures decoding time
+# \brief Every timed iteration decodes its own copy of the encoded data
+#         with a new DataHolder and copies the result, so neither the
+#         cached value nor the zero-copy view of a previous iteration
+#         is measured
+# \param pool decoder pool
+# \param data encoded data
+# \param repeat number of repetitions
+# \returns the best decoding time in seconds and the decoded size in bytes
+def measure(pool, data, repeat):
+    buffers = [bytes(bytearray(data[1])) for _ in range(repeat)]
+    decoded = []
+
+    def run():
+        holder = DataHolder("SCALAR", [data[0], buffers.pop()],
+                            "DevEncoded", [1, 0],
+                            encoding=data[0], decoders=pool)
+        decoded[:] = [numpy.array(holder.value)]
+    dt = min(timeit.repeat(run, number=1, repeat=repeat))
+    return dt, decoded[0].nbytes
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 2048
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    pool = DecoderPool()
+    image = numpy.random.randint(
+        0, 0xffff, size=(height, width)).astype("uint16")
+    uimage = image.astype("uint32").flatten()
+    cases = [
+        ("VIDEO_IMAGE uint16", encodeVideoImage(image)),
+        ("DATA_ARRAY uint16", encodeDataArray(image)),
+        ("DATA_ARRAY float64", encodeDataArray(image.astype("float64"))),
+        ("UINT32", ['UINT32', uimage.tobytes()]),
+        ("ZLIB uint16", compressDataArray(encodeDataArray(image), 1)),
+    ]
+    if LZ4_AVAILABLE:
+        cases.append(
+            ("LZ4 uint16", compressDataArray(encodeDataArray(image), 32004)))
+    if BITSHUFFLE_AVAILABLE:
+        cases.append(
+            ("BSLZ4 uint16",
+             compressDataArray(encodeDataArray(image), 32008)))
+
+    print("frame: %s x %s, repeat: %s" % (width, height, repeat))
+    for name, data in cases:
+        dt, size = measure(pool, data, repeat)
+        print("%-20s %10.6f s  %10.1f MB/s" % (
+            name, dt, size / dt / 1e6 if dt else float('inf')))
+
+
+if __name__ == '__main__':
+    main()
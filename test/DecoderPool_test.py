@@ -23,12 +23,28 @@ import unittest
 import sys
 import struct
 import json
+import threading
+import zlib
 import numpy as np
 import nxswriter
 
 from nxswriter.DecoderPool import (
     DecoderPool, UTF8decoder, UINT32decoder, VDEOdecoder)
 
+try:
+    import lz4.block
+    # True if lz4 is installed
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+try:
+    import bitshuffle
+    # True if bitshuffle is installed
+    BITSHUFFLE_AVAILABLE = True
+except ImportError:
+    BITSHUFFLE_AVAILABLE = False
+
 
 # if 64-bit machione
 IS64BIT = (struct.calcsize("P") == 8)
@@ -392,6 +408,129 @@ class DecoderPoolTest(unittest.TestCase):
         self.assertEqual(ad.shape(), [4, 3, 2])
         self.assertTrue(np.allclose(dw2, tw2))
 
+    # compresses image of the lima data array
+    # \param image lima data array
+    # \param filterid HDF5 filter id
+    # \param blocksize compression block size
+    # \returns compressed lima data array
+    def compressImage(self, image, filterid, blocksize=16):
+        hsize = struct.unpack('<H', image[6:8])[0]
+        data = image[hsize:]
+        if filterid == 1:
+            chunk = zlib.compress(data)
+        elif filterid == 32004:
+            chunk = struct.pack('>QI', len(data), blocksize)
+            for i in range(0, len(data), blocksize):
+                block = data[i:i + blocksize]
+                cblock = lz4.block.compress(block, store_size=False)
+                if len(cblock) >= len(block):
+                    cblock = block
+                chunk += struct.pack('>I', len(cblock)) + cblock
+        else:
+            itemsize = {0: 1, 1: 2, 2: 4, 3: 8, 4: 1, 5: 2, 6: 4, 7: 8,
+                        8: 4, 9: 8}[struct.unpack('<I', image[12:16])[0]]
+            arr = np.frombuffer(data, dtype='uint%s' % (itemsize * 8))
+            chunk = struct.pack('>QI', len(data), blocksize * itemsize) + \
+                bitshuffle.compress_lz4(arr, blocksize).tobytes()
+        return image[:hsize] + chunk
+
+    # compressed DATA_ARRAY test
+    # \brief It tests decoding of compressed images
+    def test_compressed_DATA_ARRAY_decoders(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = DecoderPool()
+        decoders = [("ZLIB_DATA_ARRAY", 1)]
+        if LZ4_AVAILABLE:
+            decoders.append(("LZ4_DATA_ARRAY", 32004))
+        if BITSHUFFLE_AVAILABLE:
+            decoders.append(("BSLZ4_DATA_ARRAY", 32008))
+        tws = [np.array(range(24), dtype='int16').reshape(4, 6),
+               np.array(range(24), dtype='uint32').reshape(4, 3, 2)]
+        for name, filterid in decoders:
+            self.assertTrue(el.hasDecoder(name))
+            for image, tw in zip(self.__images, tws):
+                cimage = self.compressImage(image, filterid)
+                ad = el.get(name)
+                self.assertEqual(ad.name, name)
+                self.assertEqual(ad.filterid, filterid)
+                ad.load((name, cimage))
+                self.assertEqual(ad.shape(), list(tw.shape))
+                self.assertEqual(ad.dtype, str(tw.dtype))
+                self.assertEqual(bytes(ad.chunk()), cimage[64:])
+                dw = ad.decode()
+                self.assertEqual(dw.shape, tw.shape)
+                self.assertEqual(dw.dtype, tw.dtype)
+                self.assertTrue(np.array_equal(dw, tw))
+                self.assertFalse(dw.flags.writeable)
+                self.assertTrue(el.create(name) is not ad)
+                self.assertTrue(type(el.create(name)) is type(ad))
+
+    # get method test
+    # \brief It tests decoders used in parallel threads
+    def test_get_threads(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = DecoderPool()
+        el.append(W4DS, "W0")
+        ds = el.get("LIMA_VIDEO_IMAGE")
+        self.assertTrue(ds is el.get("LIMA_VIDEO_IMAGE"))
+
+        results = {}
+
+        def getDecoders(index):
+            results[index] = (el.get("LIMA_VIDEO_IMAGE"), el.get("W0"))
+
+        threads = [threading.Thread(target=getDecoders, args=(i,))
+                   for i in range(4)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        decoders = [ds] + [results[i][0] for i in range(4)]
+        self.assertEqual(len(set(id(dc) for dc in decoders)), 5)
+        for i in range(4):
+            self.assertTrue(isinstance(results[i][0], VDEOdecoder))
+            self.assertTrue(isinstance(results[i][1], W4DS))
+
+    # decode test
+    # \brief It tests decoding in parallel threads
+    def test_decode_threads(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = DecoderPool()
+        images = [np.full((30 + i, 40), i, dtype="uint16")
+                  for i in range(8)]
+        hsize = struct.calcsize('!IHHqiiHHHH')
+        endian = ord(struct.pack('=H', 1).decode()[-1])
+        encoded = [
+            ["VIDEO_IMAGE", struct.pack(
+                '!IHHqiiHHHH', 0x5644454f, 1, 1, -1,
+                im.shape[1], im.shape[0], endian, hsize, 0, 0) + im.tobytes()]
+            for im in images]
+        errors = []
+
+        def decode(index):
+            for _ in range(100):
+                dc = el.get("VIDEO_IMAGE")
+                dc.load(encoded[index])
+                shape = dc.shape()
+                value = dc.decode()
+                if shape != list(images[index].shape) or \
+                   not np.array_equal(value, images[index]):
+                    errors.append(index)
+
+        threads = [threading.Thread(target=decode, args=(i,))
+                   for i in range(len(images))]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        self.assertEqual(errors, [])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -25,6 +25,8 @@ import sys
 import random
 import struct
 import binascii
+import shutil
+import tempfile
 
 from nxstools import filewriter as FileWriter
 from nxstools import h5pywriter as H5PYWriter
@@ -35,6 +37,7 @@ from nxswriter.Element import Element
 from nxswriter.H5Elements import EFile
 from nxswriter.H5Elements import EDim
 from nxswriter.H5Elements import EDimensions
+from nxswriter.ShapeCache import SHAPES
 
 try:
     from TstDataSource import TstDataSource
@@ -372,6 +375,41 @@ class EDimTest(unittest.TestCase):
         nxFile.close()
         os.remove(fname)
 
+    # store method test
+    # \brief It tests dimensions taken from the shape cache
+    def test_store_last_index_cache(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        fname = "test.h5"
+        nxFile = FileWriter.create_file(fname, overwrite=True).root()
+        eFile = EFile([], None, nxFile)
+        directory = tempfile.mkdtemp()
+        try:
+            SHAPES.directory = directory
+            ds = TstDataSource()
+            ds.identity = lambda: ("TST", "length")
+            ds.value0d = self.__rnd.randint(1, 10)
+            length = ds.value0d
+            for i in range(2):
+                el = Element(self._tfname, self._fattrs2, eFile)
+                fi = EField(self._fattrs2, el)
+                el2 = EDimensions(self._fattrs4, fi)
+                el3 = EDim(self._attrs5, el2)
+                el3.source = ds
+                el3.store()
+                self.assertEqual(fi.lengths, {'1': '%s' % length})
+                self.assertEqual(fi._shapeKeys, [("dim", "TST", "length")])
+                self.assertEqual(ds.stack.count("getData"), 1)
+                ds.value0d += 1
+            self.assertEqual(
+                SHAPES.get(("dim", "TST", "length")), '%s' % length)
+        finally:
+            SHAPES.directory = None
+            shutil.rmtree(directory)
+            nxFile.close()
+            os.remove(fname)
+
     # last method test
     # \brief It tests executing _lastObject method
     def test_store_last_index2(self):
@@ -27,6 +27,8 @@ import binascii
 import struct
 import numpy
 import time
+import zlib
+import h5py
 
 from nxswriter.FElement import FElementWithAttr
 from nxswriter.FElement import FElement
@@ -34,12 +36,22 @@ from nxswriter.EField import EField
 from nxswriter.Element import Element
 from nxswriter.H5Elements import EFile
 from nxswriter.Types import NTP, Converters
+from nxswriter.DecoderPool import DecoderPool
 
 from nxswriter.Errors import XMLSettingSyntaxError
 from nxstools import filewriter as FileWriter
 from nxstools import h5pywriter as H5PYWriter
 
 
+try:
+    import bitshuffle
+    # registers the bitshuffle filter in HDF5
+    import hdf5plugin  # noqa: F401
+    # True if bitshuffle and hdf5plugin are installed
+    BITSHUFFLE_AVAILABLE = True
+except ImportError:
+    BITSHUFFLE_AVAILABLE = False
+
 try:
     from TstDataSource import TstDataSource
 except Exception:
@@ -6539,6 +6551,233 @@ class EFieldH5PYTest(unittest.TestCase):
         self._nxFile.close()
         os.remove(self._fname)
 
+    # run method tests
+    # \brief It tests direct writing of compressed chunks
+    def test_run_X_2d_direct_chunk(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+        self._fname = '%s/%s%s.h5' % (
+            os.getcwd(), self.__class__.__name__, fun)
+
+        FileWriter.writer = H5PYWriter
+        self._nxFile = FileWriter.create_file(
+            self._fname, overwrite=True).root()
+        eFile = EFile({}, None, self._nxFile)
+        steps = 5
+        images = [numpy.arange(12, dtype="uint16").reshape(3, 4) * i
+                  for i in range(steps)]
+        hformat = '<IHHIIHHHHHHHHIIIIIIII'
+        header = struct.pack(
+            hformat, 0x44544159, 2, struct.calcsize(hformat), 0, 1, 0, 2,
+            4, 3, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 0, 0)
+        decoders = DecoderPool()
+
+        for name, shuffle in [("direct", False), ("filtered", True)]:
+            el = EField({"name": name, "type": "NX_UINT16"}, eFile)
+            ds = TstDataSource()
+            el.source = ds
+            el.rank = "2"
+            el.lengths = {"1": "3", "2": "4"}
+            el.strategy = 'STEP'
+            el.compression = 1
+            el.rate = 5
+            el.shuffle = shuffle
+            for i, image in enumerate(images):
+                ds.value = {
+                    "rank": NTP.rTf[0],
+                    "value": ["ZLIB_DATA_ARRAY",
+                              header + zlib.compress(image.tobytes(), 1)],
+                    "tangoDType": "DevEncoded",
+                    "shape": [0, 0],
+                    "encoding": "ZLIB_DATA_ARRAY",
+                    "decoders": decoders}
+                if not i:
+                    el.store()
+                self.assertEqual(el.run(), None)
+                self.assertEqual(el.error, None)
+        self._nxFile.close()
+
+        with h5py.File(self._fname, "r") as fl:
+            for name in ["direct", "filtered"]:
+                self.assertEqual(fl[name].shape, (steps, 3, 4))
+                self.assertTrue(numpy.array_equal(fl[name][...], images))
+            for i, image in enumerate(images):
+                self.assertEqual(
+                    fl["direct"].id.read_direct_chunk((i, 0, 0))[1],
+                    zlib.compress(image.tobytes(), 1))
+                self.assertNotEqual(
+                    fl["filtered"].id.read_direct_chunk((i, 0, 0))[1],
+                    zlib.compress(image.tobytes(), 1))
+        os.remove(self._fname)
+
+    # run method tests
+    # \brief It tests writing bitshuffle chunks into pipelines
+    #        with and without LZ4 compression
+    def test_run_X_2d_direct_chunk_bitshuffle(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+        if not BITSHUFFLE_AVAILABLE:
+            print("Skip: bitshuffle or hdf5plugin not available")
+            return
+        self._fname = '%s/%s%s.h5' % (
+            os.getcwd(), self.__class__.__name__, fun)
+
+        FileWriter.writer = H5PYWriter
+        self._nxFile = FileWriter.create_file(
+            self._fname, overwrite=True).root()
+        eFile = EFile({}, None, self._nxFile)
+        steps = 3
+        images = [numpy.arange(12, dtype="uint16").reshape(3, 4) * (i + 1)
+                  for i in range(steps)]
+        hformat = '<IHHIIHHHHHHHHIIIIIIII'
+        header = struct.pack(
+            hformat, 0x44544159, 2, struct.calcsize(hformat), 0, 1, 0, 2,
+            4, 3, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 0, 0)
+        decoders = DecoderPool()
+        chunks = [
+            struct.pack('>QI', image.nbytes, 8 * image.itemsize) +
+            bitshuffle.compress_lz4(image.reshape(-1), 8).tobytes()
+            for image in images]
+
+        for name, options in [("nolz4", "0,0"), ("lz4", "0,2")]:
+            el = EField({"name": name, "type": "NX_UINT16"}, eFile)
+            ds = TstDataSource()
+            el.source = ds
+            el.rank = "2"
+            el.lengths = {"1": "3", "2": "4"}
+            el.strategy = 'STEP'
+            el.filters = {0: (32008, "", options, "")}
+            el.store()
+            for chunk in chunks:
+                ds.value = {
+                    "rank": NTP.rTf[0],
+                    "value": ["BSLZ4_DATA_ARRAY", header + chunk],
+                    "tangoDType": "DevEncoded",
+                    "shape": [0, 0],
+                    "encoding": "BSLZ4_DATA_ARRAY",
+                    "decoders": decoders}
+                self.assertEqual(el.run(), None)
+                self.assertEqual(el.error, None)
+        self._nxFile.close()
+
+        with h5py.File(self._fname, "r") as fl:
+            for name in ["nolz4", "lz4"]:
+                self.assertEqual(fl[name].shape, (steps, 3, 4))
+                self.assertTrue(numpy.array_equal(fl[name][...], images))
+            for i, chunk in enumerate(chunks):
+                self.assertEqual(
+                    fl["lz4"].id.read_direct_chunk((i, 0, 0))[1], chunk)
+                self.assertTrue(
+                    fl["nolz4"].id.read_direct_chunk((i, 0, 0))[1] != chunk)
+        os.remove(self._fname)
+
+    # run method tests
+    # \brief It tests compressing chunks before writing them directly
+    def test_run_X_2d_precompress(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+        self._fname = '%s/%s%s.h5' % (
+            os.getcwd(), self.__class__.__name__, fun)
+
+        FileWriter.writer = H5PYWriter
+        self._nxFile = FileWriter.create_file(
+            self._fname, overwrite=True).root()
+        eFile = EFile({}, None, self._nxFile)
+        steps = 5
+        images = [numpy.arange(12, dtype="int32").reshape(3, 4) * i
+                  for i in range(steps)]
+
+        for name, precompress in [("direct", True), ("filtered", False)]:
+            el = EField({"name": name, "type": "NX_INT32"}, eFile)
+            ds = TstDataSource()
+            el.source = ds
+            el.rank = "2"
+            el.lengths = {"1": "3", "2": "4"}
+            el.strategy = 'STEP'
+            el.compression = 1
+            el.rate = 3
+            el.shuffle = True
+            el.precompress = precompress
+            for i, image in enumerate(images):
+                ds.value = {
+                    "rank": NTP.rTf[2],
+                    "value": image,
+                    "tangoDType": "DevLong",
+                    "shape": [3, 4]}
+                if not i:
+                    el.store()
+                self.assertEqual(el.run(), None)
+                self.assertEqual(el.error, None)
+        self._nxFile.close()
+
+        with h5py.File(self._fname, "r") as fl:
+            for name in ["direct", "filtered"]:
+                self.assertEqual(fl[name].shape, (steps, 3, 4))
+                self.assertTrue(numpy.array_equal(fl[name][...], images))
+            for i, image in enumerate(images):
+                shuffled = image.view("uint8").reshape(-1, 4).T.tobytes()
+                self.assertEqual(
+                    fl["direct"].id.read_direct_chunk((i, 0, 0))[1],
+                    zlib.compress(shuffled, 3))
+        os.remove(self._fname)
+
+    # run method tests
+    # \brief It tests writing multi-frame DevEncoded data
+    def test_run_X_2d_frames(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+        self._fname = '%s/%s%s.h5' % (
+            os.getcwd(), self.__class__.__name__, fun)
+
+        FileWriter.writer = H5PYWriter
+        self._nxFile = FileWriter.create_file(
+            self._fname, overwrite=True).root()
+        eFile = EFile({}, None, self._nxFile)
+        nframes = [1, 3, 2, 1, 4]
+        blocks = []
+        for i, nfr in enumerate(nframes):
+            blocks.append(
+                (numpy.arange(12 * nfr, dtype="uint16") + 100 * i).reshape(
+                    nfr, 3, 4))
+        hformat = '<IHHIIHHHHHHHHIIIIIIII'
+        decoders = DecoderPool()
+
+        for name, precompress in [("filtered", False), ("direct", True)]:
+            el = EField({"name": name, "type": "NX_UINT16"}, eFile)
+            ds = TstDataSource()
+            el.source = ds
+            el.rank = "2"
+            el.lengths = {"1": "3", "2": "4"}
+            el.strategy = 'STEP'
+            el.compression = 1
+            el.shuffle = False
+            el.precompress = precompress
+            for i, block in enumerate(blocks):
+                header = struct.pack(
+                    hformat, 0x44544159, 2, struct.calcsize(hformat), 0, 1,
+                    0, 3, 4, 3, block.shape[0], 0, 0, 0, 1, 1, 1, 1, 1, 1,
+                    0, 0)
+                ds.value = {
+                    "rank": NTP.rTf[0],
+                    "value": ["DATA_ARRAY", header + block.tobytes()],
+                    "tangoDType": "DevEncoded",
+                    "shape": [0, 0],
+                    "encoding": "DATA_ARRAY",
+                    "decoders": decoders}
+                if not i:
+                    el.store()
+                self.assertEqual(el.run(), None)
+                self.assertEqual(el.error, None)
+                self.assertEqual(el.frames, block.shape[0])
+        self._nxFile.close()
+
+        with h5py.File(self._fname, "r") as fl:
+            for name in ["filtered", "direct"]:
+                self.assertEqual(fl[name].shape, (sum(nframes), 3, 4))
+                self.assertTrue(numpy.array_equal(
+                    fl[name][...], numpy.concatenate(blocks)))
+        os.remove(self._fname)
+
 
 if __name__ == '__main__':
     unittest.main()
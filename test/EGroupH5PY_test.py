@@ -167,6 +167,7 @@ class EGroupH5PYTest(unittest.TestCase):
 
         self.myAssertRaise(XMLSettingSyntaxError, EGroup, self._gattrs, eFile)
         el = EGroup(self._gattrs, eFile, reloadmode=True)
+        self.assertEqual(eFile._childNames(), set([self._gattrs["name"]]))
         self.assertTrue(isinstance(el, Element))
         self.assertTrue(isinstance(el, FElement))
         self.assertTrue(isinstance(el, FElementWithAttr))
@@ -116,6 +116,8 @@ class EStrategyH5PYTest(unittest.TestCase):
         self.assertEqual(el.rate, 2)
         self.assertEqual(st.last.shuffle, True)
         self.assertEqual(el.shuffle, True)
+        self.assertEqual(st.last.precompress, False)
+        self.assertEqual(el.precompress, False)
 
     # first constructor test
     # \brief It tests default settings
@@ -232,6 +234,7 @@ class EStrategyH5PYTest(unittest.TestCase):
         attrs["compression"] = "32008"
         attrs["compression_opts"] = "2,0"
         attrs["shuffle"] = "true"
+        attrs["precompress"] = "true"
         el = EField(self._fattrs, None)
         st = EStrategy(attrs, el)
         self.assertTrue(isinstance(st, Element))
@@ -257,6 +260,8 @@ class EStrategyH5PYTest(unittest.TestCase):
             [int(elm) for elm in attrs["compression_opts"].split(",")])
         self.assertEqual(st.last.shuffle, Converters.toBool(attrs["shuffle"]))
         self.assertEqual(el.shuffle, Converters.toBool(attrs["shuffle"]))
+        self.assertEqual(st.last.precompress, True)
+        self.assertEqual(el.precompress, True)
 
     # store method test
     # \brief It tests executing store method
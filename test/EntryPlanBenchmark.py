@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+# \package test nexdatas
+# \file EntryPlanBenchmark.py
+# benchmark for loading of xml configurations in openEntry
+#
+# usage: python EntryPlanBenchmark.py [<fields> [<repeat>]]
+#
+import os
+import sys
+import shutil
+import tempfile
+import timeit
+from io import BytesIO
+from xml import sax
+
+from nxstools import filewriter as FileWriter
+from nxstools import h5pywriter as H5PYWriter
+
+from nxswriter.H5Elements import EFile
+from nxswriter.NexusXMLHandler import NexusXMLHandler
+from nxswriter.FetchNameHandler import FetchNameHandler
+from nxswriter.EntryPlan import EntryPlan, EntryPlanReader, INNER_TAGS
+from nxswriter.InnerXMLParser import InnerXMLHandler
+from nxswriter.DataSourcePool import DataSourcePool
+from nxswriter.DataSources import XMLNODES
+
+
+# Creates an xml configuration with CLIENT STEP fields
+# \param fields number of fields
+# \returns xml configuration
+def createXML(fields):
+    field = """
+      <field name="field%s" type="NX_FLOAT64" units="mm">
+        <strategy mode="STEP"/>
+        <datasource type="CLIENT" name="field%s">
+          <record name="field%s"/>
+        </datasource>
+        <doc>field %s</doc>
+      </field>"""
+    return """<?xml version='1.0'?>
+<definition>
+  <group type="NXentry" name="entry">
+    <group type="NXinstrument" name="instrument">
+      <group type="NXcollection" name="fields">%s
+      </group>
+    </group>
+  </group>
+</definition>
+""" % "".join(field % ((i,) * 4) for i in range(fields))
+
+
+# Creates the entry from the xml configuration
+# \param dirname output directory
+# \param parse function parsing the configuration with the handler
+# \param groupTypes map of NXclass : name
+# \param parser xml reader passed to the handler
+def openEntry(dirname, parse, groupTypes, parser):
+    fname = os.path.join(dirname, "bench.h5")
+    nxfile = FileWriter.create_file(fname, overwrite=True)
+    datasources = DataSourcePool()
+    try:
+        handler = NexusXMLHandler(
+            EFile([], None, nxfile.root()), datasources, None,
+            groupTypes, parser)
+        parse(handler)
+        handler.close()
+    finally:
+        nxfile.close()
+
+
+# handler collecting inner xml of datasources and docs like openEntry
+class InnerXMLCollector(sax.ContentHandler):
+
+    # constructor
+    # \param parser xml reader
+    def __init__(self, parser):
+        sax.ContentHandler.__init__(self)
+        self.parser = parser
+        self.inner = []
+
+    # switches to the inner xml handler
+    def startElement(self, name, attrs):
+        if name in INNER_TAGS:
+            self.inner.append(
+                InnerXMLHandler(self.parser, self, name, attrs))
+            self.parser.setContentHandler(self.inner[-1])
+
+
+# Creates input source with the xml configuration
+# \param xml xml configuration
+# \returns SAX input source
+def createInputSource(xml):
+    inpsrc = sax.InputSource()
+    inpsrc.setByteStream(BytesIO(xml.encode('utf-8')))
+    return inpsrc
+
+
+# Measures openEntry with two SAX passes over the configuration
+# \param xml xml configuration
+# \param dirname output directory
+def measureSAX(xml, dirname):
+    XMLNODES.clear()
+    fetcher = FetchNameHandler()
+    sax.parseString(xml.encode('utf-8'), fetcher)
+    parser = sax.make_parser()
+
+    def parse(handler):
+        parser.setContentHandler(handler)
+        parser.setErrorHandler(sax.ErrorHandler())
+        parser.parse(createInputSource(xml))
+    openEntry(dirname, parse, fetcher.groupTypes, parser)
+
+
+# Measures loading of the configuration with two SAX passes
+# \param xml xml configuration
+def measureSAXLoad(xml):
+    fetcher = FetchNameHandler()
+    sax.parseString(xml.encode('utf-8'), fetcher)
+    parser = sax.make_parser()
+    collector = InnerXMLCollector(parser)
+    parser.setContentHandler(collector)
+    parser.parse(createInputSource(xml))
+
+
+# Measures loading of the configuration in a single pass
+# \param xml xml configuration
+def measurePlanLoad(xml):
+    EntryPlan.fromXML(xml)
+
+
+# Measures openEntry with the plan compiled in a single pass
+# \param xml xml configuration
+# \param dirname output directory
+# \param plan compiled plan or None
+def measurePlan(xml, dirname, plan=None):
+    if plan is None:
+        plan = EntryPlan.fromXML(xml)
+    reader = EntryPlanReader(plan)
+    openEntry(dirname, reader.parse, plan.groupTypes, reader)
+
+
+def main():
+    fields = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    FileWriter.writer = H5PYWriter
+    xml = createXML(fields)
+    dirname = tempfile.mkdtemp()
+    try:
+        plan = EntryPlan.fromXML(xml)
+        cases = [
+            ("SAX load", lambda: measureSAXLoad(xml)),
+            ("single pass load", lambda: measurePlanLoad(xml)),
+            ("SAX two passes", lambda: measureSAX(xml, dirname)),
+            ("compiled plan", lambda: measurePlan(xml, dirname)),
+            ("cached plan", lambda: measurePlan(xml, dirname, plan)),
+        ]
+        print("fields: %s, xml: %s kB, repeat: %s" % (
+            fields, len(xml) // 1024, repeat))
+        for name, run in cases:
+            dt = min(timeit.repeat(run, number=1, repeat=repeat))
+            print("%-24s %10.4f s" % (name, dt))
+    finally:
+        shutil.rmtree(dirname)
+
+
+if __name__ == '__main__':
+    main()
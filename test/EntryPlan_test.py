@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+# \package test nexdatas
+# \file EntryPlan_test.py
+# unittests for compiled entry plans
+#
+import unittest
+import sys
+from xml import sax
+
+from nxswriter.EntryPlan import (
+    EntryPlan, EntryPlanCache, EntryPlanReader)
+from nxswriter.InnerXMLParser import InnerXMLHandler
+from nxswriter.DataSources import XMLNODES
+from nxswriter.Errors import XMLSyntaxError
+
+
+# handler recording SAX events with inner xml of datasources
+class RecordingHandler(sax.ContentHandler):
+
+    # constructor
+    # \param parser xml reader
+    def __init__(self, parser):
+        sax.ContentHandler.__init__(self)
+        self.parser = parser
+        self.events = []
+        self.inner = None
+
+    # records the opening tag
+    def startElement(self, name, attrs):
+        self.__flush()
+        self.events.append(("start", name, dict(attrs)))
+        if name == "datasource":
+            self.inner = InnerXMLHandler(self.parser, self, name, attrs)
+            self.parser.setContentHandler(self.inner)
+
+    # records the tag content
+    def characters(self, content):
+        self.__flush()
+        if self.events and self.events[-1][0] == "chars":
+            self.events[-1] = ("chars", self.events[-1][1] + content)
+        else:
+            self.events.append(("chars", content))
+
+    # records the closing tag
+    def endElement(self, name):
+        self.__flush()
+        self.events.append(("end", name))
+
+    # records the inner xml
+    def __flush(self):
+        if self.inner is not None:
+            self.events.append(("inner", self.inner.xml))
+            self.inner = None
+
+
+# test fixture
+class EntryPlanTest(unittest.TestCase):
+
+    # constructor
+    # \param methodName name of the test method
+    def __init__(self, methodName):
+        unittest.TestCase.__init__(self, methodName)
+
+        self._xml = """<?xml version='1.0'?>
+<definition>
+  <group type="NXentry" name="entry">
+    <group type="NXinstrument">
+      <attribute name="name">instr</attribute>
+      <field name="counter" type="NX_FLOAT">
+        <strategy mode="STEP"/>
+        <datasource type="PYEVAL" name="sum">
+          <datasource type="CLIENT" name="c1">
+            <record name="c1"/>
+          </datasource>
+          <result>
+ds.result = ds.c1 &lt; 3 and "&amp;"
+          </result>
+        </datasource>
+      </field>
+      <doc>counter &amp; doc</doc>
+    </group>
+    <link name="data" target="/NXentry/NXinstrument/counter"/>
+  </group>
+</definition>
+"""
+
+    # test starter
+    # \brief Common set up
+    def setUp(self):
+        print("\nsetting up...")
+
+    # test closer
+    # \brief Common tear down
+    def tearDown(self):
+        print("tearing down ...")
+
+    # Exception tester
+    # \param exception expected exception
+    # \param method called method
+    # \param args list with method arguments
+    # \param kwargs dictionary with method arguments
+    def myAssertRaise(self, exception, method, *args, **kwargs):
+        try:
+            error = False
+            method(*args, **kwargs)
+        except exception:
+            error = True
+        self.assertEqual(error, True)
+
+    # fromXML test
+    # \brief It tests compiling of the xml settings
+    def test_fromXML(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        plan = EntryPlan.fromXML(self._xml)
+        self.assertEqual(plan.events[0], ("start", "definition", {}, None))
+        self.assertEqual(plan.events[-1], ("end", "definition"))
+        starts = [ev for ev in plan.events if ev[0] == "start"]
+        inner = [ev for ev in starts if ev[3] is not None]
+        self.assertEqual([ev[1] for ev in inner], ["datasource", "doc"])
+        self.assertEqual(
+            plan.events[inner[0][3][1]], ("end", "datasource"))
+        self.assertEqual(plan.events[inner[1][3][1]], ("end", "doc"))
+        self.assertEqual(
+            inner[1][3][0], ("<doc>", "counter &amp; doc", "</doc>"))
+        self.assertEqual(plan.nodes, {})
+        self.assertEqual(XMLNODES.attach(plan.nodes), None)
+        try:
+            node = XMLNODES.get("".join(inner[0][3][0]))
+        finally:
+            self.assertTrue(XMLNODES.attach(None) is plan.nodes)
+        self.assertEqual(list(plan.nodes.values()), [node])
+        self.assertEqual(node.tag, "datasource")
+        self.assertEqual(node.get("name"), "sum")
+        self.assertEqual(node.tail, None)
+        self.assertEqual(node.find("datasource").get("name"), "c1")
+        self.assertTrue(XMLNODES.get("".join(inner[0][3][0])) is not node)
+        for i, ev in enumerate(plan.events[1:]):
+            self.assertTrue(
+                ev[0] != "chars" or plan.events[i][0] != "chars")
+
+        gt = plan.groupTypes
+        self.assertTrue(plan.groupTypes is gt)
+        self.assertEqual(gt.child(name="entry").nxtype, "NXentry")
+        self.assertEqual(
+            gt.child(name="entry").child(nxtype="NXinstrument").name,
+            "instr")
+
+        self.myAssertRaise(
+            XMLSyntaxError, EntryPlan.fromXML,
+            "<definition><group/></definition>")
+        self.myAssertRaise(
+            sax.SAXParseException, EntryPlan.fromXML, "<definition>")
+
+    # parse test
+    # \brief It tests if the plan replays SAX events
+    def test_parse(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        parser = sax.make_parser()
+        expected = RecordingHandler(parser)
+        parser.setContentHandler(expected)
+        inpsrc = sax.InputSource()
+        if sys.version_info > (3,):
+            from io import StringIO
+        else:
+            from StringIO import StringIO
+        inpsrc.setByteStream(StringIO(self._xml))
+        parser.parse(inpsrc)
+
+        plan = EntryPlan.fromXML(self._xml)
+        reader = EntryPlanReader(plan)
+        handler = RecordingHandler(reader)
+        reader.parse(handler)
+        self.assertEqual(handler.events, expected.events)
+        self.assertTrue(reader.getContentHandler() is handler)
+        self.assertEqual(
+            [ev[0] for ev in handler.events].count("inner"), 1)
+
+        reader = EntryPlanReader(plan, inner=False)
+        handler = RecordingHandler(reader)
+        reader.parse(handler)
+        self.assertEqual(handler.events, expected.events)
+
+    # cache test
+    # \brief It tests LRU cache of plans
+    def test_cache(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = EntryPlanCache(2)
+        self.assertEqual(el.maxsize, 2)
+        self.assertEqual(len(el), 0)
+
+        xmls = ["<definition><group type='NX%s'/></definition>" % i
+                for i in range(3)]
+        plan = el.get(xmls[0])
+        self.assertTrue(isinstance(plan, EntryPlan))
+        self.assertTrue(el.get(xmls[0]) is plan)
+        plan1 = el.get(xmls[1])
+        self.assertTrue(el.get(xmls[0]) is plan)
+        el.get(xmls[2])
+        self.assertEqual(len(el), 2)
+        self.assertTrue(el.get(xmls[0]) is plan)
+        self.assertTrue(el.get(xmls[1]) is not plan1)
+        self.assertEqual(EntryPlanCache.key(xmls[0]),
+                         EntryPlanCache.key(xmls[0]))
+        self.assertTrue(EntryPlanCache.key(xmls[0]) !=
+                        EntryPlanCache.key(xmls[1]))
+        el.clear()
+        self.assertEqual(len(el), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
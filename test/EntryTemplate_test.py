@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+# \package test nexdatas
+# \file EntryTemplate_test.py
+# unittests for entry templates
+#
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+import h5py
+
+from nxswriter.EntryTemplate import EntryTemplateCache, TemplateSourcePool
+from nxswriter.DataSources import DataSource
+from nxswriter.EntryPlan import EntryPlan
+from nxswriter.TangoDataWriter import TangoDataWriter
+
+
+# test fixture
+class EntryTemplateTest(unittest.TestCase):
+
+    # constructor
+    # \param methodName name of the test method
+    def __init__(self, methodName):
+        unittest.TestCase.__init__(self, methodName)
+
+        self._xml = """<?xml version='1.0'?>
+<definition>
+  <group type="NXentry" name="%s">
+    <group type="NXinstrument" name="instrument">
+      <attribute name ="short_name"> scan instrument </attribute>
+      <group type="NXdetector" name="detector">
+        <field units="m" type="NX_FLOAT" name="counter1">
+          <strategy mode="STEP"/>
+          <datasource type="CLIENT">
+            <record name="exp_c01"/>
+          </datasource>
+        </field>
+        <field units="" type="NX_FLOAT" name="mca">
+          <dimensions rank="1">
+            <dim value="4" index="1"/>
+          </dimensions>
+          <strategy mode="STEP"/>
+          <datasource type="CLIENT">
+            <record name="mca"/>
+          </datasource>
+        </field>
+        <field type="NX_INT32" name="spectrum">
+          <dimensions rank="1">
+            <dim value="3" index="1"/>
+          </dimensions>
+          <strategy mode="INIT"/>
+          <datasource type="CLIENT">
+            <record name="spectrum"/>
+          </datasource>
+        </field>
+        <field type="NX_CHAR" name="description">Detector</field>
+      </group>
+    </group>
+    <group type="NXdata" name="data">
+      <link target="/NXentry/NXinstrument/NXdetector/mca" name="data"/>
+    </group>
+  </group>
+</definition>
+"""
+
+    # test starter
+    # \brief Common set up
+    def setUp(self):
+        print("\nsetting up...")
+        self._dir = tempfile.mkdtemp()
+
+    # test closer
+    # \brief Common tear down
+    def tearDown(self):
+        print("tearing down ...")
+        shutil.rmtree(self._dir)
+
+    # provides a content of the h5py group
+    # \param group h5py group
+    # \param path path of the group
+    # \param content dictionary with the collected content
+    # \returns dictionary with a content of the group
+    def dump(self, group, path="", content=None):
+        content = {} if content is None else content
+        for name in group.keys():
+            item = path + "/" + name
+            link = group.get(name, getlink=True)
+            if isinstance(link, h5py.SoftLink):
+                content[item] = ("link", link.path)
+                continue
+            obj = group[name]
+            attrs = sorted(
+                (key, str(value)) for key, value in obj.attrs.items())
+            if isinstance(obj, h5py.Dataset):
+                content[item] = (
+                    "field", obj.shape, str(obj.dtype), obj.chunks,
+                    str(obj[...]), attrs)
+            else:
+                content[item] = ("group", attrs)
+                self.dump(obj, item, content)
+        return content
+
+    # writes entries with the writer
+    # \param fname output file name
+    # \param entries entry names
+    # \param spectrum spectrum length
+    # \param xml xml settings
+    def write(self, fname, entries, spectrum=3, xml=None):
+        tdw = TangoDataWriter()
+        tdw.writer = "h5py"
+        tdw.fileName = fname
+        tdw.openFile()
+        for entry in entries:
+            tdw.jsonrecord = '{"data": {"spectrum": %s}}' % list(
+                range(spectrum))
+            tdw.xmlsettings = (xml or self._xml) % entry
+            tdw.openEntry()
+            for i in range(2):
+                tdw.record(
+                    '{"data": {"exp_c01": %s, "mca": [%s, 1, 2, 3]}}'
+                    % (i, i))
+            tdw.closeEntry()
+        tdw.closeFile()
+
+    # names and key test
+    # \brief It tests keys independent of entry names
+    def test_key(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        plan1 = EntryPlan.fromXML(self._xml % "entry1")
+        plan2 = EntryPlan.fromXML(self._xml % "scan_002")
+        self.assertEqual(EntryTemplateCache.names(plan1), ["entry1"])
+        self.assertEqual(EntryTemplateCache.names(plan2), ["scan_002"])
+        self.assertEqual(EntryTemplateCache.key(plan1),
+                         EntryTemplateCache.key(plan2))
+        self.assertTrue(EntryTemplateCache.key(plan1) !=
+                        EntryTemplateCache.key(plan1, (True,)))
+        plan3 = EntryPlan.fromXML(
+            self._xml.replace('name="data"', 'name="mydata"') % "entry1")
+        self.assertTrue(EntryTemplateCache.key(plan1) !=
+                        EntryTemplateCache.key(plan3))
+        plan4 = EntryPlan.fromXML(
+            self._xml.replace(
+                'target="/NXentry/', 'target="/entry1:NXentry/') % "entry1")
+        self.assertEqual(EntryTemplateCache.key(plan1),
+                         EntryTemplateCache.key(plan4))
+
+    # static test
+    # \brief It tests if skeletons depend on data
+    def test_static(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        plan = EntryPlan.fromXML(self._xml % "entry1")
+        self.assertTrue(EntryTemplateCache.static(plan))
+        plan = EntryPlan.fromXML(
+            self._xml.replace('<dim value="3" index="1"/>', '') % "entry1")
+        self.assertTrue(not EntryTemplateCache.static(plan))
+        plan = EntryPlan.fromXML(
+            self._xml.replace(
+                '<dim value="3" index="1"/>',
+                '<dim index="1"><datasource type="CLIENT">'
+                '<record name="length"/></datasource></dim>') % "entry1")
+        self.assertTrue(not EntryTemplateCache.static(plan))
+        plan = EntryPlan.fromXML(
+            self._xml.replace(
+                '<field type="NX_CHAR" name="description">Detector</field>',
+                '<field type="NX_INT32" name="description">'
+                '<dimensions rank="1"/>1 2 3</field>') % "entry1")
+        self.assertTrue(EntryTemplateCache.static(plan))
+
+    # source pool test
+    # \brief It tests placeholder datasources of templates
+    def test_templateSourcePool(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        pool = TemplateSourcePool(True)
+        self.assertEqual(pool.canfail, True)
+        self.assertTrue(pool.hasDataSource("TANGO"))
+        ds = pool.get("TANGO")()
+        self.assertEqual(type(ds), DataSource)
+        self.assertEqual(ds.setup("<datasource/>"), None)
+        self.assertEqual(ds.getData(), None)
+
+    # get and copy test
+    # \brief It tests building and copying of templates
+    def test_get_copy(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        plan = EntryPlan.fromXML(self._xml % "entry1")
+        built = []
+
+        def build(filename):
+            built.append(filename)
+            with h5py.File(filename, "w") as fl:
+                fl.create_group("entry1").attrs["NX_class"] = "NXentry"
+                fl.create_dataset("title", data=3)
+
+        el = EntryTemplateCache()
+        self.assertEqual(el.directory, None)
+        self.assertEqual(el.get(plan, build), None)
+        self.assertEqual(built, [])
+        self.assertTrue(not el.accepts(None))
+
+        el.directory = os.path.join(self._dir, "templates")
+        fname = el.get(plan, build)
+        self.assertEqual(len(built), 1)
+        self.assertTrue(os.path.isfile(fname))
+        self.assertEqual(el.get(plan, build), fname)
+        self.assertEqual(len(built), 1)
+        self.assertEqual(os.listdir(el.directory),
+                         [os.path.basename(fname)])
+
+        with h5py.File(os.path.join(self._dir, "out.h5"), "w") as fl:
+            self.assertTrue(el.accepts(fl))
+            self.assertEqual(
+                sorted(el.copy(fname, ["scan_1"], fl)), ["scan_1", "title"])
+            self.assertEqual(sorted(fl.keys()), ["scan_1", "title"])
+            self.assertEqual(fl["scan_1"].attrs["NX_class"], "NXentry")
+            self.assertEqual(fl["title"][...], 3)
+            self.assertTrue(EntryTemplateCache.namesattr not in fl.attrs)
+
+        def fail(filename):
+            raise ValueError("broken")
+
+        self.assertRaises(ValueError, el.get, plan, fail, (True,))
+        self.assertEqual(len(os.listdir(el.directory)), 1)
+        el.clear()
+        self.assertEqual(os.listdir(el.directory), [])
+
+    # openEntry test
+    # \brief It tests if cloned entries are equal to created ones
+    def test_openEntry(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        expected = os.path.join(self._dir, "expected.h5")
+        cloned = os.path.join(self._dir, "cloned.h5")
+        entries = ["entry1", "entry2", "scan_3"]
+        self.write(expected, entries)
+        directory = os.path.join(self._dir, "templates")
+        TangoDataWriter.templates.directory = directory
+        try:
+            self.write(cloned, entries)
+            # canfail is switched on after the first entry
+            self.assertEqual(len(os.listdir(directory)), 2)
+            with h5py.File(expected, "r") as efl, \
+                    h5py.File(cloned, "r") as cfl:
+                for entry in entries:
+                    self.assertEqual(
+                        self.dump(cfl[entry]), self.dump(efl[entry]))
+
+            # the INIT spectrum shape is read from the JSON record
+            xml = self._xml.replace(
+                '<dim value="3" index="1"/>', '')
+            for spectrum in [5, 2]:
+                entry = "dynamic%s" % spectrum
+                self.write(cloned, [entry], spectrum, xml)
+                self.write(expected, [entry], spectrum, xml)
+                with h5py.File(expected, "r") as efl, \
+                        h5py.File(cloned, "r") as cfl:
+                    self.assertEqual(
+                        self.dump(cfl[entry]), self.dump(efl[entry]))
+                    self.assertEqual(
+                        cfl[entry]["instrument/detector/spectrum"].shape,
+                        (spectrum,))
+            self.assertEqual(len(os.listdir(directory)), 2)
+        finally:
+            TangoDataWriter.templates.directory = None
+
+
+if __name__ == '__main__':
+    unittest.main()
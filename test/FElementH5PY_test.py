@@ -26,11 +26,16 @@ import random
 import struct
 import binascii
 import time
+import shutil
+import tempfile
+import numpy
 
 
 from nxswriter.Element import Element
 from nxswriter.FElement import FElement
 from nxswriter.Errors import XMLSettingSyntaxError
+from nxswriter.DataHolder import DataHolder
+from nxswriter.ShapeCache import SHAPES
 from nxstools import filewriter as FileWriter
 from nxstools import h5pywriter as H5PYWriter
 
@@ -172,6 +177,24 @@ class FElementH5PYTest(unittest.TestCase):
         self.assertEqual(el.run(), None)
         self.assertTrue(ds.dataTaken)
 
+    # child names test
+    # \brief It tests the cached child names
+    def test_childNames(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+        el = FElement(self._tfname, self._fattrs, None)
+        el._addChildName("name")
+        el.h5Object = self._group
+        self.assertEqual(el._childNames(), set([self._fdname]))
+        el._addChildName("name")
+        self.assertEqual(el._childNames(), set([self._fdname, "name"]))
+        self._group.create_field("other", "int64")
+        self.assertEqual(el._childNames(), set([self._fdname, "name"]))
+        el.h5Object = self._nxFile
+        self.assertEqual(el._childNames(), set([self._gname]))
+        el.h5Object = self._group
+        self.assertEqual(el._childNames(), set([self._fdname, "other"]))
+
     # run _findShape test
     # \brief It tests _findShape method
     def test_findShape_lengths_1d(self):
@@ -429,6 +452,51 @@ class FElementH5PYTest(unittest.TestCase):
             XMLSettingSyntaxError, el._findShape, "3", lengths=lens,
             extraD=True)
 
+    # run _findShape test
+    # \brief It tests _findShape method with cached shapes
+    def test_findShape_ds_cache(self):
+        print("Run: %s.test_findShape_ds_cache() " % self.__class__.__name__)
+        ds = TstDataSource()
+        ds.identity = lambda: ("TST", "spectrum")
+        directory = tempfile.mkdtemp()
+        try:
+            SHAPES.directory = directory
+            mlen = self.__rnd.randint(1, 10000)
+            ds.dims = [mlen]
+            el = FElement(self._tfname, self._fattrs, None)
+            el.source = ds
+            self.assertEqual(
+                el._findShape("1", extraD=True, checkData=True), [0, mlen])
+            self.assertEqual(ds.stack.count("getData"), 1)
+            self.assertEqual(SHAPES.get(("TST", "spectrum")), [mlen])
+
+            ds.dims = [mlen + 1]
+            el = FElement(self._tfname, self._fattrs, None)
+            el.source = ds
+            self.assertEqual(
+                el._findShape("1", extraD=True, checkData=True), [0, mlen])
+            self.assertEqual(ds.stack.count("getData"), 1)
+
+            el._checkShape(DataHolder(**ds.getData()))
+            self.assertEqual(SHAPES.get(("TST", "spectrum")), None)
+            self.assertEqual(
+                el._findShape("1", extraD=True, checkData=True),
+                [0, mlen + 1])
+            self.assertEqual(SHAPES.get(("TST", "spectrum")), [mlen + 1])
+            el._checkShape(DataHolder(
+                "SPECTRUM", numpy.ones([mlen + 1]), "DevLong", [mlen + 1]))
+            self.assertEqual(SHAPES.get(("TST", "spectrum")), [mlen + 1])
+
+            el = FElement(self._tfname, self._fattrs, None)
+            el.source = ds
+            self.assertEqual(
+                el._findShape("1", {"1": str(mlen)}, extraD=True,
+                              checkData=True), [0, mlen])
+            self.assertEqual(el._shapeKeys, [])
+        finally:
+            SHAPES.directory = None
+            shutil.rmtree(directory)
+
     # run _findShape test
     # \brief It tests _findShape method
     def test_findShape_ds_1d(self):
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+# \package test nexdatas
+# \file FlushPolicy_test.py
+# unittests for flush policies
+#
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+import h5py
+
+from nxswriter.FlushPolicy import FlushPolicy
+from nxswriter.TangoDataWriter import TangoDataWriter
+
+
+# file with counted flushes
+class FlushedFile(object):
+
+    # constructor
+    def __init__(self):
+        self.flushes = 0
+
+    # flushes the file
+    def flush(self):
+        self.flushes += 1
+
+
+# test fixture
+class FlushPolicyTest(unittest.TestCase):
+
+    # constructor
+    # \param methodName name of the test method
+    def __init__(self, methodName):
+        unittest.TestCase.__init__(self, methodName)
+
+        self._xml = """<?xml version='1.0'?>
+<definition>
+  <group type="NXentry" name="entry1">
+    <group type="NXinstrument" name="instrument">
+      <group type="NXdetector" name="detector">
+        <field units="m" type="NX_FLOAT" name="counter1">
+          <strategy mode="STEP"/>
+          <datasource type="CLIENT">
+            <record name="exp_c01"/>
+          </datasource>
+        </field>
+        <field units="" type="NX_INT32" name="mca">
+          <dimensions rank="1">
+            <dim value="3" index="1"/>
+          </dimensions>
+          <strategy mode="STEP" trigger="mcatrigger"/>
+          <datasource type="CLIENT">
+            <record name="mca"/>
+          </datasource>
+        </field>
+      </group>
+    </group>
+  </group>
+</definition>
+"""
+
+    # test starter
+    # \brief Common set up
+    def setUp(self):
+        print("\nsetting up...")
+        self._dir = tempfile.mkdtemp()
+
+    # test closer
+    # \brief Common tear down
+    def tearDown(self):
+        print("tearing down ...")
+        shutil.rmtree(self._dir)
+
+    # params test
+    # \brief It tests creating policies from writer url parameters
+    def test_fromParams(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        pars = {"swmr": True, "libver": "latest"}
+        fp = FlushPolicy.fromParams(pars)
+        self.assertEqual(pars, {"swmr": True, "libver": "latest"})
+        self.assertEqual(fp.mode, "step")
+        self.assertEqual(fp.steps, 1)
+        self.assertEqual(fp.seconds, 0)
+        self.assertEqual(fp.swmr, True)
+
+        pars = {"flush": "step", "flushsteps": "10", "flushtime": "2.5"}
+        fp = FlushPolicy.fromParams(pars)
+        self.assertEqual(pars, {})
+        self.assertEqual(fp.mode, "step")
+        self.assertEqual(fp.steps, 10)
+        self.assertEqual(fp.seconds, 2.5)
+        self.assertEqual(fp.swmr, False)
+
+        self.assertRaises(ValueError, FlushPolicy.fromParams,
+                          {"flush": "never"})
+        self.assertRaises(ValueError, FlushPolicy.fromParams,
+                          {"flushsteps": "many"})
+
+    # record test
+    # \brief It tests which records are flushed
+    def test_record(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        self.assertEqual(
+            [FlushPolicy().record() for _ in range(3)], [True] * 3)
+        fp = FlushPolicy(steps=3)
+        self.assertEqual(
+            [fp.record() for _ in range(3)], [False, False, True])
+        fp.flush()
+        self.assertEqual(
+            [fp.record() for _ in range(3)], [False, False, True])
+        fp = FlushPolicy(steps=0, seconds=0.05)
+        self.assertTrue(not fp.record())
+        time.sleep(0.06)
+        self.assertTrue(fp.record())
+        fp = FlushPolicy("trigger")
+        self.assertTrue(not fp.record())
+        self.assertTrue(not fp.record([]))
+        self.assertTrue(fp.record(["mcatrigger"]))
+        self.assertTrue(not FlushPolicy("swmr").record())
+        self.assertTrue(FlushPolicy("swmr", swmr=True).record())
+        self.assertTrue(not FlushPolicy("entry").record(["mcatrigger"]))
+        self.assertRaises(ValueError, FlushPolicy, "never")
+
+    # flush test
+    # \brief It tests flushing files and measuring the flush time
+    def test_flush(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        fp = FlushPolicy()
+        fl1 = FlushedFile()
+        fl2 = FlushedFile()
+        self.assertEqual(fp.count, 0)
+        self.assertEqual(fp.time, 0)
+        self.assertTrue(fp.flush(fl1, None, fl2) >= 0)
+        fp.flush(fl1)
+        self.assertEqual(fl1.flushes, 2)
+        self.assertEqual(fl2.flushes, 1)
+        self.assertEqual(fp.count, 2)
+        self.assertTrue(fp.time >= 0)
+        fp.reset()
+        self.assertEqual(fp.count, 0)
+        self.assertEqual(fp.time, 0)
+
+    # writer test
+    # \brief It tests writing with flush policies
+    def test_writer(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        fname = os.path.join(self._dir, "scan.h5")
+        for url in ["h5py", "h5py?flush=trigger",
+                    "h5py?flushsteps=0&flushtime=1000",
+                    "h5py?flush=entry", "h5py?flush=swmr&swmr=true"]:
+            tdw = TangoDataWriter()
+            tdw.writer = url
+            tdw.fileName = fname
+            self.assertEqual(tdw.flushtime, 0)
+            tdw.openFile()
+            tdw.xmlsettings = self._xml
+            tdw.openEntry()
+            for i in range(4):
+                tdw.record(
+                    '{"data": {"exp_c01": %s, "mca": [%s, 1, 2]}, '
+                    '"triggers": %s}' % (
+                        i, i, '["mcatrigger"]' if i % 2 else '[]'))
+            tdw.closeEntry()
+            self.assertTrue(tdw.flushtime > 0)
+            tdw.closeFile()
+
+            with h5py.File(fname, "r") as fl:
+                det = fl["entry1/instrument/detector"]
+                self.assertEqual(det["counter1"][...].tolist(),
+                                 [0., 1., 2., 3.])
+                self.assertEqual(det["mca"][...].tolist(),
+                                 [[1, 1, 2], [3, 1, 2]])
+            os.remove(fname)
+
+        tdw = TangoDataWriter()
+        tdw.writer = "h5py?flush=never"
+        tdw.fileName = fname
+        self.assertRaises(ValueError, tdw.openFile)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -444,6 +444,30 @@ class MYSQLSourceTest(unittest.TestCase):
 
             self.checkData(dt, arr[a][1], value, arr[a][2], arr[a][3])
 
+    # getData test
+    # \brief It tests caching of query results
+    def test_getData_ttl(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        query = "SELECT RAND()"
+        values = []
+        for ttl in [None, None, 60., 60.]:
+            ds = DBaseSource()
+            self.setsource(ds)
+            ds.query = query
+            ds.dbtype = self.__dbtype
+            ds.format = 'SCALAR'
+            ds.dbname = self.__dbname
+            ds.ttl = ttl
+            dt = ds.getData()
+            self.checkData(dt, 'SCALAR', dt["value"], 'DevDouble', [1, 0])
+            values.append(dt["value"])
+        self.assertTrue(values[0] != values[1])
+        self.assertTrue(values[1] != values[2])
+        self.assertEqual(values[2], values[3])
+        DBaseSource.results.clear()
+
 
 if __name__ == '__main__':
     unittest.main()
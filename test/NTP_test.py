@@ -1052,6 +1052,36 @@ class NTPTest(unittest.TestCase):
                         else:
                             self.assertEqual(evalue[i][j], elc[i][j])
 
+    # arrayRankRShape test
+    # \brief It tests the numpy array shortcut
+    def test_arrayRankRShape_np_fast(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        arrs = [
+            numpy.array([1, 2, 3], dtype="int16"),
+            numpy.array([[1.5, 2], [3, 4]], dtype="float32"),
+            numpy.array([[[1, 2], [3, 4]]], dtype=">u4"),
+            numpy.array([["a", "bb"], ["ccc", "d"]]),
+            numpy.array([b"a", b"bb"]),
+            numpy.array([True, False]),
+            numpy.array([[1, 2, 3]], dtype="int64")[:, ::2],
+        ]
+        for arr in arrs:
+            res = NTP().arrayRankRShape(arr)
+            self.assertEqual(res[0], arr.ndim)
+            self.assertEqual(res[1], list(reversed(arr.shape)))
+            elem = arr
+            for _ in range(arr.ndim):
+                elem = elem[0]
+            if type(elem) in [numpy.bytes_, numpy.str_]:
+                self.assertEqual(res[2], "str")
+            else:
+                self.assertEqual(res[2], str(elem.dtype))
+            self.assertEqual(NTP().arrayRank(arr), arr.ndim)
+            self.assertEqual(
+                NTP().arrayRankRShape(arr.tolist())[:2], res[:2])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -26,14 +26,55 @@ import random
 import struct
 import json
 import binascii
+import threading
+import time
+import numpy
 
 
 from nxswriter.DataSources import DataSource
 from nxswriter.PyEvalSource import PyEvalSource
+import nxswriter.PyEvalSource
 from nxswriter.DataSourcePool import DataSourcePool
+from nxswriter.DecoderPool import DecoderPool
 from nxswriter.Errors import DataSourceSetupError
 from nxswriter.Types import Converters, NTP
 
+
+# datasource with delayed data
+class DelayedSource(DataSource):
+
+    # sets the parameters up from xml
+    # \param xml datasource parameters
+    def setup(self, xml):
+        self.delay = 0.2
+
+    # access to data
+    # \returns data
+    def getData(self):
+        time.sleep(self.delay)
+        return {"rank": "SCALAR", "value": 3,
+                "tangoDType": "DevLong64", "shape": [1, 0]}
+
+
+# datasource providing DevEncoded images
+class EncodedSource(DataSource):
+
+    # access to data
+    # \returns data
+    def getData(self):
+        return {"rank": "SCALAR", "value": ["DATA_ARRAY", self.image],
+                "tangoDType": "DevEncoded", "shape": [1, 0],
+                "encoding": "DATA_ARRAY", "decoders": DecoderPool()}
+
+
+# datasource raising an exception
+class FailingSource(DataSource):
+
+    # access to data
+    def getData(self):
+        raise ValueError("Input not available")
+
+
 # if 64-bit machione
 IS64BIT = (struct.calcsize("P") == 8)
 
@@ -196,6 +237,299 @@ class PyEvalSourceTest(unittest.TestCase):
                 for j in range(len(value[i])):
                     self.assertEqual(data["value"][i][j], value[i][j])
 
+    # setup test
+    # \brief It tests compilation of scripts
+    def test_setup_compile(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        script = 'ds.result = 12 + 3'
+        ds = PyEvalSource()
+        self.myAssertRaise(
+            DataSourceSetupError, ds.setup,
+            "<datasource><result>ds.result = 12 +</result></datasource>")
+
+        ds = PyEvalSource()
+        self.assertEqual(ds.setup(
+            "<datasource><result>\n   %s\n</result></datasource>" % script),
+            None)
+        code = nxswriter.PyEvalSource._compile(script)
+        self.assertTrue(code is nxswriter.PyEvalSource._compile(script))
+        self.assertTrue(code is not nxswriter.PyEvalSource._compile(
+            'ds.result = 12 + 4'))
+        dt = ds.getData()
+        self.checkData(dt, "SCALAR", 15, "DevLong64", [])
+
+        ds2 = PyEvalSource()
+        self.assertEqual(ds2.setup(
+            "<datasource><result>%s</result></datasource>" % script),
+            None)
+        dt = ds2.getData()
+        self.checkData(dt, "SCALAR", 15, "DevLong64", [])
+
+    # commonblock keys test
+    # \brief It tests finding commonblock keys used by scripts
+    def test_commonblockKeys(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        keys = nxswriter.PyEvalSource._commonblockKeys
+        self.assertEqual(keys("ds.result = 1"), [])
+        self.assertEqual(
+            keys('ds.result = commonblock["__counter__"]'), ["__counter__"])
+        self.assertEqual(
+            keys("if 'sum' not in commonblock:\n"
+                 "    commonblock['sum'] = 0\n"
+                 "commonblock[ 'sum' ] += ds.inp\n"
+                 "ds.result = commonblock['sum'] + commonblock[\"c\"]"),
+            ["c", "sum"])
+        self.assertEqual(keys("ds.result = commonblock[ds.inp]"), None)
+        self.assertEqual(keys("ds.result = commonblock.get('a')"), None)
+        self.assertEqual(
+            keys("ds.result = len(commonblock)\ncommonblock['a'] = 1"),
+            None)
+
+    # shared lock test
+    # \brief It tests shared and exclusive modes of the lock
+    def test_SharedLock(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        lock = nxswriter.PyEvalSource.SharedLock()
+        events = []
+
+        def exclusive():
+            with lock:
+                events.append("exclusive")
+
+        lock.acquireShared()
+        lock.acquireShared()
+        th = threading.Thread(target=exclusive)
+        th.start()
+        time.sleep(0.05)
+        self.assertEqual(events, [])
+        lock.releaseShared()
+        time.sleep(0.05)
+        self.assertEqual(events, [])
+        lock.releaseShared()
+        th.join()
+        self.assertEqual(events, ["exclusive"])
+
+        lock.acquire()
+        th = threading.Thread(target=lambda: (
+            lock.acquireShared(), events.append("shared"),
+            lock.releaseShared()))
+        th.start()
+        time.sleep(0.05)
+        self.assertEqual(events, ["exclusive"])
+        lock.release()
+        th.join()
+        self.assertEqual(events, ["exclusive", "shared"])
+
+    # getData test
+    # \brief It tests concurrent scripts with commonblock
+    def test_getData_commonblock_threads(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        dp = DataSourcePool()
+        scripts = [
+            "if 'l%s' not in commonblock:\n"
+            "    commonblock['l%s'] = []\n"
+            "commonblock['l%s'].append(1)\n"
+            "ds.result = commonblock['l%s']" % ((i,) * 4)
+            for i in range(3)]
+        scripts.append(
+            "commonblock.setdefault('all', []).append(1)\n"
+            "ds.result = len(commonblock['all'])")
+        sources = []
+        for script in scripts:
+            ds = PyEvalSource()
+            self.assertEqual(ds.setup(
+                "<datasource><result>%s</result></datasource>" % script),
+                None)
+            self.assertEqual(ds.setDataSources(dp), None)
+            sources.append(ds)
+        common = dp.common['PYEVAL']["common"]
+        self.assertEqual(
+            sorted(dp.common['PYEVAL']["locks"].keys()), ["l0", "l1", "l2"])
+
+        results = {}
+
+        def run(index):
+            for _ in range(50):
+                results[index] = sources[index].getData()["value"]
+
+        threads = [threading.Thread(target=run, args=(i,))
+                   for i in range(len(sources))]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        for i in range(3):
+            self.assertEqual(len(common['l%s' % i]), 50)
+            self.assertEqual(results[i], [1] * 50)
+            self.assertTrue(results[i] is not common['l%s' % i])
+        self.assertEqual(results[3], 50)
+
+    # getData test
+    # \brief It tests if results are detached from commonblock
+    def test_getData_commonblock_detach(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        dp = DataSourcePool()
+        ds = PyEvalSource()
+        self.assertEqual(ds.setup(
+            "<datasource><result>"
+            "import numpy\n"
+            "if 'arr' not in commonblock:\n"
+            "    commonblock['arr'] = numpy.arange(6)\n"
+            "    commonblock['nested'] = {'l': [[1, 2], [3]]}\n"
+            "ds.result = [commonblock['arr'][1:4], commonblock['arr'][:3]]"
+            "</result></datasource>"), None)
+        self.assertEqual(ds.setDataSources(dp), None)
+        ds2 = PyEvalSource()
+        self.assertEqual(ds2.setup(
+            "<datasource><result>"
+            "ds.result = [commonblock['nested']['l']]"
+            "</result></datasource>"), None)
+        self.assertEqual(ds2.setDataSources(dp), None)
+        common = dp.common['PYEVAL']["common"]
+
+        res = ds.getData()["value"]
+        self.assertEqual([r.tolist() for r in res], [[1, 2, 3], [0, 1, 2]])
+        for r in res:
+            self.assertTrue(r.flags.owndata)
+            self.assertTrue(not numpy.shares_memory(r, common['arr']))
+        common['arr'][:] = 0
+        self.assertEqual([r.tolist() for r in res], [[1, 2, 3], [0, 1, 2]])
+
+        res = ds2.getData()["value"]
+        self.assertEqual(res, [[[1, 2], [3]]])
+        common['nested']['l'][0].append(5)
+        self.assertEqual(res, [[[1, 2], [3]]])
+
+        # named tuples and tuples with positional fields
+        ds3 = PyEvalSource()
+        self.assertEqual(ds3.setup(
+            "<datasource><result>"
+            "import collections\n"
+            "Point = collections.namedtuple('Point', ['x', 'y'])\n"
+            "class Pair(tuple):\n"
+            "    def __new__(cls, first, second):\n"
+            "        return tuple.__new__(cls, (first, second))\n"
+            "commonblock['point'] = Point([1], [2])\n"
+            "ds.result = [commonblock['point'], Pair([3], [4])]"
+            "</result></datasource>"), None)
+        self.assertEqual(ds3.setDataSources(dp), None)
+        res = ds3.getData()["value"]
+        self.assertEqual(type(res[0]).__name__, "Point")
+        self.assertEqual(res[0].x, [1])
+        self.assertEqual(res[0].y, [2])
+        self.assertTrue(res[0].x is not common['point'].x)
+        self.assertTrue(type(res[1]) is tuple)
+        self.assertEqual(res[1], ([3], [4]))
+
+    # getData test
+    # \brief It tests modifying decoded inputs in place
+    def test_getData_encoded(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        hformat = '<IHHIIHHHHHHHHIIIIIIII'
+        value = numpy.arange(6, dtype="uint16").reshape(2, 3)
+        EncodedSource.image = struct.pack(
+            hformat, 0x44544159, 2, struct.calcsize(hformat), 0, 1, 0, 2,
+            3, 2, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 0, 0) + value.tobytes()
+        dp = DataSourcePool()
+        dp.append(EncodedSource, "ENCODED")
+        ds = PyEvalSource()
+        self.assertEqual(ds.setup(
+            "<datasource><datasource type='ENCODED' name='img'/>"
+            "<result>ds.img *= 2\nds.result = ds.img</result>"
+            "</datasource>"), None)
+        self.assertEqual(ds.setDataSources(dp), None)
+        for _ in range(2):
+            self.assertEqual(ds.getData()["value"].tolist(),
+                             (value * 2).tolist())
+        self.assertTrue(EncodedSource.image.endswith(value.tobytes()))
+
+    # getData test
+    # \brief It tests fetching inputs in parallel
+    def test_getData_inputs_threads(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        dp = DataSourcePool()
+        dp.append(DelayedSource, "DELAYED")
+        dp.append(FailingSource, "FAILING")
+        inputs = ["inp%s" % i for i in range(4)]
+        ds = PyEvalSource()
+        self.assertEqual(ds.setup(
+            "<datasource>%s<result>ds.result = %s</result></datasource>" % (
+                "".join("<datasource type='DELAYED' name='%s'/>" % name
+                        for name in inputs),
+                " + ".join("ds.%s" % name for name in inputs))),
+            None)
+        self.assertEqual(ds.setDataSources(dp), None)
+        st = time.time()
+        dt = ds.getData()
+        self.assertTrue(time.time() - st < 0.2 * len(inputs) / 2.)
+        self.checkData(dt, "SCALAR", 3 * len(inputs), "DevLong64", [])
+
+        ds = PyEvalSource()
+        self.assertEqual(ds.setup(
+            "<datasource><datasource type='DELAYED' name='inp1'/>"
+            "<datasource type='FAILING' name='inp2'/>"
+            "<result>ds.result = ds.inp1 + ds.inp2</result></datasource>"),
+            None)
+        self.assertEqual(ds.setDataSources(dp), None)
+        self.myAssertRaise(ValueError, ds.getData)
+
+        # worker threads are shared and bounded
+        workers = nxswriter.PyEvalSource.WORKERS
+        started = workers.threads
+        self.assertTrue(0 < started <= workers.size)
+        inputs = ["inp%s" % i for i in range(workers.size + 4)]
+        ds = PyEvalSource()
+        self.assertEqual(ds.setup(
+            "<datasource>%s<result>ds.result = %s</result></datasource>" % (
+                "".join("<datasource type='DELAYED' name='%s'/>" % name
+                        for name in inputs),
+                " + ".join("ds.%s" % name for name in inputs))),
+            None)
+        self.assertEqual(ds.setDataSources(dp), None)
+        for _ in range(3):
+            dt = ds.getData()
+            self.checkData(dt, "SCALAR", 3 * len(inputs), "DevLong64", [])
+        self.assertEqual(workers.threads, workers.size)
+
+    # InputWorkers test
+    # \brief It tests running fetchers by worker threads
+    def test_inputWorkers(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        workers = nxswriter.PyEvalSource.InputWorkers(2)
+        self.assertEqual(workers.size, 2)
+        self.assertEqual(workers.threads, 0)
+        fetchers = [nxswriter.PyEvalSource.InputFetcher(FailingSource())]
+        workers.run(fetchers)
+        self.assertEqual(workers.threads, 0)
+        self.assertTrue(isinstance(fetchers[0].exception, ValueError))
+
+        fetchers = [nxswriter.PyEvalSource.InputFetcher(DelayedSource())
+                    for _ in range(6)]
+        for fetcher in fetchers:
+            fetcher.source.setup(None)
+        st = time.time()
+        workers.run(fetchers)
+        # the calling thread with two workers
+        self.assertTrue(time.time() - st < 0.2 * len(fetchers) * 0.75)
+        self.assertEqual(workers.threads, 2)
+        self.assertEqual([fetcher.value for fetcher in fetchers], [3] * 6)
+
     # getData test
     # \brief It tests default settings
     def test_getData_default(self):
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+# \package test nexdatas
+# \file ShapeCache_test.py
+# unittests for cache of discovered shapes
+#
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+from nxswriter.ShapeCache import ShapeCache, SHAPES
+
+
+# test fixture
+class ShapeCacheTest(unittest.TestCase):
+
+    # constructor
+    # \param methodName name of the test method
+    def __init__(self, methodName):
+        unittest.TestCase.__init__(self, methodName)
+
+    # test starter
+    # \brief Common set up
+    def setUp(self):
+        print("\nsetting up...")
+        self._dir = tempfile.mkdtemp()
+
+    # test closer
+    # \brief Common tear down
+    def tearDown(self):
+        print("tearing down ...")
+        shutil.rmtree(self._dir)
+
+    # constructor test
+    # \brief It tests default settings
+    def test_constructor(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        el = ShapeCache()
+        self.assertEqual(el.directory, None)
+        self.assertEqual(len(el), 0)
+        self.assertEqual(ShapeCache.filename, "shapes.json")
+        self.assertTrue(isinstance(SHAPES, ShapeCache))
+        self.assertEqual(ShapeCache.key(["TANGO", "dev", 1]),
+                         repr(("TANGO", "dev", 1)))
+
+        el.set(("TANGO", "dev"), [3, 4])
+        self.assertEqual(el.get(("TANGO", "dev")), None)
+        self.assertEqual(len(el), 0)
+
+    # get and set test
+    # \brief It tests storing and removing shapes
+    def test_get_set(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        directory = os.path.join(self._dir, "shapes")
+        el = ShapeCache(directory)
+        self.assertEqual(el.directory, directory)
+        self.assertEqual(el.get(("TANGO", "dev")), None)
+
+        el.set(("TANGO", "dev"), [3, 4])
+        el.set(("dim", "DB", "query"), "12")
+        self.assertEqual(el.get(("TANGO", "dev")), [3, 4])
+        self.assertEqual(el.get(("dim", "DB", "query")), "12")
+        self.assertEqual(len(el), 2)
+        self.assertTrue(
+            not os.path.exists(os.path.join(directory, ShapeCache.filename)))
+        el.dump()
+        self.assertTrue(
+            os.path.isfile(os.path.join(directory, ShapeCache.filename)))
+        self.assertEqual(os.listdir(directory), [ShapeCache.filename])
+
+        el2 = ShapeCache(directory)
+        self.assertEqual(el2.get(("TANGO", "dev")), [3, 4])
+        self.assertEqual(el2.get(("dim", "DB", "query")), "12")
+
+        el2.discard(("TANGO", "dev"))
+        self.assertEqual(el2.get(("TANGO", "dev")), None)
+        el2.discard(("TANGO", "dev"))
+        el2.dump()
+        el.directory = directory
+        self.assertEqual(el.get(("TANGO", "dev")), None)
+        self.assertEqual(el.get(("dim", "DB", "query")), "12")
+
+        el.clear()
+        self.assertEqual(len(el), 0)
+        self.assertEqual(ShapeCache(directory).get(
+            ("dim", "DB", "query")), None)
+
+        with open(os.path.join(directory, ShapeCache.filename), "w") as fl:
+            fl.write("broken")
+        el3 = ShapeCache(directory)
+        self.assertEqual(len(el3), 0)
+        el3.set(("TANGO", "dev"), [5])
+        el3.directory = None
+        self.assertEqual(ShapeCache(directory).get(("TANGO", "dev")), [5])
+
+    # dump test
+    # \brief It tests storing shapes once per dump
+    def test_dump(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        directory = os.path.join(self._dir, "shapes")
+        fname = os.path.join(directory, ShapeCache.filename)
+        el = ShapeCache(directory)
+        el.dump()
+        self.assertTrue(not os.path.exists(fname))
+        for i in range(10):
+            el.set(("TANGO", "dev%s" % i), [i])
+        self.assertTrue(not os.path.exists(fname))
+        el.dump()
+        self.assertEqual(len(ShapeCache(directory)), 10)
+
+        mtime = os.stat(fname).st_mtime
+        os.utime(fname, (mtime - 100, mtime - 100))
+        el.set(("TANGO", "dev1"), [1])
+        el.dump()
+        self.assertEqual(os.stat(fname).st_mtime, mtime - 100)
+
+        el.discard(("TANGO", "dev1"))
+        self.assertEqual(len(ShapeCache(directory)), 10)
+        el.dump()
+        self.assertEqual(len(ShapeCache(directory)), 9)
+        self.assertEqual(os.listdir(directory), [ShapeCache.filename])
+
+
+if __name__ == '__main__':
+    unittest.main()
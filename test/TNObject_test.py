@@ -222,6 +222,50 @@ class ElementTest(unittest.TestCase):
         ch = el3.child(nxtype=mtype2)
         self.assertEqual(ch, None)
 
+    # index test
+    # \brief It tests child indexes and path memo
+    def test_child_index(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+        root = TNObject()
+        self.assertEqual(root.paths, {})
+        nn = self.__rnd.randint(2, 100)
+        els = [TNObject("name%s" % i, "NXtype%s" % (i % 2), root)
+               for i in range(nn)]
+        self.assertEqual(root.children, els)
+        for i in range(nn):
+            self.assertEqual(root.child("name%s" % i), els[i])
+            self.assertEqual(root.child(" name%s " % i), els[i])
+        self.assertEqual(root.child(nxtype="NXtype0"), els[0])
+        self.assertEqual(root.child(nxtype="NXtype1"), els[1])
+        self.assertEqual(root.child("name%s" % nn), None)
+
+        dup = TNObject("name0", "NXtype1", root)
+        self.assertEqual(root.child("name0"), els[0])
+        self.assertEqual(root.child(nxtype="NXtype1"), els[1])
+
+        sub = TNObject("sub", "NXsub", els[1])
+        root.paths["/name1"] = "/name1"
+        els[0].name = "renamed"
+        self.assertEqual(root.paths, {})
+        self.assertEqual(root.child("name0"), dup)
+        self.assertEqual(root.child("renamed"), els[0])
+        els[1].nxtype = "NXnew"
+        self.assertEqual(root.child(nxtype="NXtype1"),
+                         els[3] if nn > 3 else dup)
+        self.assertEqual(root.child(nxtype="NXnew"), els[1])
+
+        root.paths["/name1"] = "/name1"
+        sub.name = "sub2"
+        self.assertEqual(root.paths, {})
+        self.assertEqual(els[1].child("sub2"), sub)
+        self.assertEqual(els[1].child("sub"), None)
+
+        other = TNObject("other", "NXother")
+        root.children.append(other)
+        self.assertEqual(root.child("other"), other)
+        self.assertEqual(root.child(nxtype="NXother"), other)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -402,6 +402,27 @@ class TangoSourceTest(unittest.TestCase):
         self.assertEqual(ds.member.memberType, atype)
         self.assertEqual(ds.member.encoding, encoding)
 
+    # identity test
+    # \brief It tests if identities do not depend on datasource names
+    def test_identity(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        dname = 'writer'
+        device = 'stestp09/testss/s1r228'
+        xml = "<datasource> <record name='%s'/> " \
+            "<device name='%s' member ='attribute'/> </datasource>" % (
+                dname, device)
+
+        ds1 = TangoSource(name="writer1")
+        ds2 = TangoSource(name="writer2")
+        self.assertEqual(ds1.identity(), None)
+        ds1.setup(xml)
+        ds2.setup(xml)
+        self.assertTrue(ds1.identity() is not None)
+        self.assertEqual(ds1.identity(), ds2.identity())
+        self.assertTrue("writer1" not in ds1.identity())
+
     # setup test
     # \brief It tests default settings
     def test_setup_client_default(self):
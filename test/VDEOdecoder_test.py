@@ -258,6 +258,35 @@ class VDEOdecoderTest(unittest.TestCase):
                 for j in range(len(res[i])):
                     self.assertEqual(res[i][j], data[k][2][i][j])
 
+    # decode test
+    # \brief It tests decoding of images with swapped byte order
+    def test_decode_swapped(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        modes = {'uint8': 0, 'uint16': 1, 'uint32': 2, 'uint64': 3}
+        lendian = ord(struct.pack('=H', 1).decode()[-1])
+        for k in modes:
+            mlen = [self.__rnd.randint(1, 80), self.__rnd.randint(1, 64)]
+            image = numpy.array(
+                [[self.__rnd.randint(0, 255) for p in range(mlen[1])]
+                 for row in range(mlen[0])], dtype=k)
+            hsize = struct.calcsize('!IHHqiiHHHH')
+            for endian in [lendian, 1 - lendian]:
+                header = struct.pack(
+                    '!IHHqiiHHHH', 0x5644454f, 1, modes[k], -1,
+                    mlen[1], mlen[0], endian, hsize, 0, 0)
+                ibuffer = image.tobytes() if endian == lendian \
+                    else image.byteswap().tobytes()
+
+                dc = VDEOdecoder()
+                dc.load(["VIDEO_IMAGE", header + ibuffer])
+                res = dc.decode()
+                self.assertEqual(res.dtype.name, k)
+                self.assertTrue(res.dtype.isnative)
+                self.assertEqual(list(res.shape), mlen)
+                self.assertTrue(numpy.array_equal(res, image))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python
+#   This file is part of nexdatas - Tango Server for NeXus data writer
+#
+#    Copyright (C) 2012-2017 DESY, Jan Kotanski <jkotan@mail.desy.de>
+#
+#    nexdatas is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    nexdatas is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with nexdatas.  If not, see <http://www.gnu.org/licenses/>.
+# \package test nexdatas
+# \file VirtualSteps_test.py
+# unittests for split files with a virtual master file
+#
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+import h5py
+
+from nxstools import filewriter as FileWriter
+from nxstools import h5pywriter as H5PYWriter
+
+from nxswriter.FElement import FElement
+from nxswriter.VirtualSteps import VirtualStepFiles
+from nxswriter.TangoDataWriter import TangoDataWriter
+
+
+# test fixture
+class VirtualStepsTest(unittest.TestCase):
+
+    # constructor
+    # \param methodName name of the test method
+    def __init__(self, methodName):
+        unittest.TestCase.__init__(self, methodName)
+
+        self._xml = """<?xml version='1.0'?>
+<definition>
+  <group type="NXentry" name="entry1">
+    <group type="NXinstrument" name="instrument">
+      <group type="NXdetector" name="detector">
+        <field units="m" type="NX_FLOAT" name="counter1">
+          <strategy mode="STEP"/>
+          <datasource type="CLIENT">
+            <record name="exp_c01"/>
+          </datasource>
+        </field>
+        <field units="" type="NX_INT32" name="mca">
+          <dimensions rank="1">
+            <dim value="3" index="1"/>
+          </dimensions>
+          <strategy mode="STEP" trigger="mcatrigger"/>
+          <datasource type="CLIENT">
+            <record name="mca"/>
+          </datasource>
+        </field>
+        <field type="NX_CHAR" name="name">
+          <strategy mode="FINAL"/>
+          <datasource type="CLIENT">
+            <record name="name"/>
+          </datasource>
+        </field>
+      </group>
+    </group>
+  </group>
+</definition>
+"""
+
+    # test starter
+    # \brief Common set up
+    def setUp(self):
+        print("\nsetting up...")
+        self._dir = tempfile.mkdtemp()
+        FileWriter.writer = H5PYWriter
+
+    # test closer
+    # \brief Common tear down
+    def tearDown(self):
+        print("tearing down ...")
+        shutil.rmtree(self._dir)
+
+    # split files test
+    # \brief It tests creating split files and virtual fields
+    def test_next_close(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        fname = os.path.join(self._dir, "master.h5")
+        nxfile = FileWriter.create_file(fname, overwrite=True)
+        root = nxfile.root()
+        self.assertTrue(VirtualStepFiles.accepts(root))
+        self.assertTrue(not VirtualStepFiles.accepts(None))
+        group = root.create_group("entry", "NXentry")
+        field = group.create_field("counter", "int64", [0], [1])
+        field.attributes.create("units", "string")[...] = "mm"
+        el = FElement("field", {}, None, field)
+        gel = FElement("group", {}, None, group)
+
+        vs = VirtualStepFiles([el, gel], writer=H5PYWriter)
+        self.assertEqual(vs.filenames, [])
+        names = [os.path.join(self._dir, "master_%05d.h5" % i)
+                 for i in range(1, 4)]
+        values = [[1, 2], [3]]
+        for name, vals in zip(names, values):
+            vs.next(name)
+            self.assertTrue(el.h5Object is not field)
+            self.assertEqual(el.h5Object.h5object.name, "/entry/counter")
+            self.assertTrue(gel.h5Object is group)
+            el.h5Object.grow(0, len(vals))
+            el.h5Object[...] = vals
+            vs.flush()
+        vs.next(names[2])
+        self.assertEqual(vs.filenames, names)
+        vs.remove()
+        self.assertEqual(vs.filenames, names[:2])
+        self.assertTrue(not os.path.isfile(names[2]))
+        self.assertEqual(field.shape, (0,))
+        vs.close()
+        self.assertTrue(el.h5Object is field)
+        self.assertTrue(field.h5object.is_virtual)
+        self.assertEqual(field.read().tolist(), [1, 2, 3])
+        self.assertEqual(field.attributes["units"][...], "mm")
+        nxfile.close()
+
+        with h5py.File(names[1], "r") as fl:
+            self.assertEqual(list(fl.keys()), ["entry"])
+            self.assertEqual(fl["entry"].attrs["NX_class"], "NXentry")
+            self.assertEqual(fl["entry/counter"][...].tolist(), [3])
+
+    # prepare test
+    # \brief It tests creating split files in the background
+    def test_prepare_next(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        fname = os.path.join(self._dir, "master.h5")
+        nxfile = FileWriter.create_file(fname, overwrite=True)
+        root = nxfile.root()
+        group = root.create_group("entry", "NXentry")
+        field = group.create_field("counter", "int64", [0], [1])
+        el = FElement("field", {}, None, field)
+
+        vs = VirtualStepFiles([el], writer=H5PYWriter)
+        self.assertEqual(vs.size, 0)
+        names = [os.path.join(self._dir, "master_%05d.h5" % i)
+                 for i in range(1, 5)]
+        vs.next(names[0])
+        self.assertTrue(vs.size > 0)
+        vs.prepare(names[1])
+        vs.next(names[1])
+        self.assertEqual(el.h5Object.h5object.name, "/entry/counter")
+        el.h5Object.grow(0, 1)
+        el.h5Object[...] = [7]
+        vs.prepare(names[2])
+        vs.next(names[3])
+        self.assertTrue(not os.path.isfile(names[2]))
+        vs.prepare(names[2])
+        vs.close()
+        self.assertTrue(not os.path.isfile(names[2]))
+        self.assertEqual(vs.filenames, [names[0], names[1], names[3]])
+        self.assertEqual(field.read().tolist(), [7])
+        nxfile.close()
+
+    # writer test
+    # \brief It tests size and time rollover of split files
+    def test_rollover(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        fname = os.path.join(self._dir, "scan.h5")
+        for virtual in [False, True]:
+            for bytesperfile, secondsperfile, splits in [
+                    (1, 0, 3), (0, 1e-6, 3), (0, 1000., 1),
+                    (10 ** 9, 0, 1)]:
+                tdw = TangoDataWriter()
+                tdw.writer = "h5py"
+                tdw.fileName = fname
+                tdw.virtualmaster = virtual
+                tdw.bytesperfile = bytesperfile
+                tdw.secondsperfile = secondsperfile
+                tdw.openFile()
+                tdw.xmlsettings = self._xml
+                tdw.openEntry()
+                for i in range(3):
+                    tdw.record(
+                        '{"data": {"exp_c01": %s, "mca": [%s, 1, 2]}, '
+                        '"triggers": ["mcatrigger"]}' % (i, i))
+                tdw.jsonrecord = '{"data": {"name": "final"}}'
+                tdw.closeEntry()
+                tdw.closeFile()
+
+                names = ["scan_%05d.h5" % (i + 1) for i in range(splits)]
+                if virtual:
+                    names.insert(0, "scan.h5")
+                self.assertEqual(sorted(os.listdir(self._dir)), names)
+                counters = []
+                for name in names[1:] if virtual else names:
+                    with h5py.File(
+                            os.path.join(self._dir, name), "r") as fl:
+                        det = fl["entry1/instrument/detector"]
+                        counters.extend(det["counter1"][...].tolist())
+                        if not virtual:
+                            self.assertEqual(det["name"][()], b"final")
+                self.assertEqual(counters, [0., 1., 2.])
+                for name in os.listdir(self._dir):
+                    os.remove(os.path.join(self._dir, name))
+
+    # writer test
+    # \brief It tests FINAL fields copied into split files
+    def test_final_copies(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        fname = os.path.join(self._dir, "scan.h5")
+        xml = self._xml.replace(
+            '<group type="NXdetector" name="detector">',
+            '<group type="NXdetector" name="detector">'
+            '<attribute name="scan_id" type="NX_INT64">'
+            '<strategy mode="FINAL"/>'
+            '<datasource type="CLIENT"><record name="scan_id"/>'
+            '</datasource></attribute>'
+            '<field type="NX_INT32" name="spectrum">'
+            '<dimensions rank="1"/><strategy mode="FINAL"/>'
+            '<datasource type="CLIENT"><record name="spectrum"/>'
+            '</datasource></field>'
+            '<field type="NX_FLOAT64" name="missing">'
+            '<strategy mode="FINAL"/>'
+            '<datasource type="CLIENT"><record name="missing"/>'
+            '</datasource></field>')
+        tdw = TangoDataWriter()
+        tdw.writer = "h5py"
+        tdw.fileName = fname
+        tdw.stepsperfile = 1
+        tdw.canfail = True
+        tdw.openFile()
+        tdw.xmlsettings = xml
+        tdw.openEntry()
+        for i in range(3):
+            tdw.record(
+                '{"data": {"exp_c01": %s, "mca": [%s, 1, 2]}, '
+                '"triggers": ["mcatrigger"]}' % (i, i))
+        tdw.jsonrecord = \
+            '{"data": {"name": "a long final name", "scan_id": 12, ' \
+            '"spectrum": [1, 2, 3, 4]}}'
+        tdw.closeEntry()
+        self.assertEqual(tdw.currentfileid, 1)
+        names = ["scan_%05d.h5" % (i + 1) for i in range(3)]
+        # only the first split file is still open by the writer
+        modes = []
+        for name in names:
+            fl = h5py.File(os.path.join(self._dir, name), "r")
+            modes.append(fl.mode)
+            if name != names[0]:
+                fl.close()
+        self.assertEqual(modes, ["r+", "r", "r"])
+        tdw.closeFile()
+
+        self.assertEqual(sorted(os.listdir(self._dir)), names)
+        for i, name in enumerate(names):
+            fullname = os.path.join(self._dir, name)
+            with h5py.File(fullname, "r") as fl:
+                self.assertEqual(fl.attrs["file_name"], fullname)
+                det = fl["entry1/instrument/detector"]
+                self.assertEqual(det["counter1"][...].tolist(), [float(i)])
+                self.assertEqual(det["name"][()], b"a long final name")
+                self.assertEqual(
+                    det["name"].attrs["nexdatas_strategy"], "FINAL")
+                self.assertEqual(det.attrs["scan_id"], 12)
+                self.assertEqual(det["spectrum"][...].tolist(), [1, 2, 3, 4])
+                self.assertEqual(
+                    det["spectrum"].attrs["type"], "NX_INT32")
+                self.assertEqual(
+                    det["missing"].attrs["nexdatas_canfail"], "FAILED")
+
+    # writer test
+    # \brief It tests a plain entry written after a split one
+    def test_split_then_plain(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        for virtual in [False, True]:
+            tdw = TangoDataWriter()
+            tdw.writer = "h5py"
+            tdw.virtualmaster = virtual
+            for fname, steps in [("a.h5", 2), ("b.h5", 0)]:
+                tdw.fileName = os.path.join(self._dir, fname)
+                tdw.stepsperfile = steps
+                tdw.openFile()
+                tdw.xmlsettings = self._xml
+                tdw.openEntry()
+                for i in range(3):
+                    tdw.record(
+                        '{"data": {"exp_c01": %s, "mca": [%s, 1, 2]}, '
+                        '"triggers": ["mcatrigger"]}' % (i, i))
+                tdw.jsonrecord = '{"data": {"name": "final"}}'
+                tdw.closeEntry()
+                tdw.closeFile()
+
+            names = ["a_00001.h5", "a_00002.h5", "b.h5"]
+            if virtual:
+                names.insert(0, "a.h5")
+            self.assertEqual(sorted(os.listdir(self._dir)), names)
+            with h5py.File(os.path.join(self._dir, "b.h5"), "r") as fl:
+                det = fl["entry1/instrument/detector"]
+                self.assertEqual(det["counter1"][...].tolist(),
+                                 [0., 1., 2.])
+                self.assertEqual(det["name"][()], b"final")
+                self.assertTrue(not det["counter1"].is_virtual)
+            for name in os.listdir(self._dir):
+                os.remove(os.path.join(self._dir, name))
+
+    # writer test
+    # \brief It tests the virtual master file of the writer
+    def test_virtualmaster(self):
+        fun = sys._getframe().f_code.co_name
+        print("Run: %s.%s() " % (self.__class__.__name__, fun))
+
+        fname = os.path.join(self._dir, "scan.h5")
+        for records in [5, 4, 0]:
+            tdw = TangoDataWriter()
+            tdw.writer = "h5py"
+            tdw.fileName = fname
+            tdw.stepsperfile = 2
+            self.assertEqual(tdw.virtualmaster, False)
+            tdw.virtualmaster = True
+            tdw.openFile()
+            tdw.xmlsettings = self._xml
+            tdw.openEntry()
+            for i in range(records):
+                tdw.record(
+                    '{"data": {"exp_c01": %s, "mca": [%s, 1, 2]}, '
+                    '"triggers": ["mcatrigger"]}' % (i, i))
+            tdw.jsonrecord = '{"data": {"name": "final"}}'
+            tdw.closeEntry()
+            tdw.closeFile()
+
+            splits = (records + 1) // 2
+            self.assertEqual(
+                sorted(os.listdir(self._dir)),
+                ["scan.h5"] + ["scan_%05d.h5" % (i + 1)
+                               for i in range(splits)])
+            cwd = os.getcwd()
+            os.chdir("/")
+            try:
+                with h5py.File(fname, "r") as fl:
+                    det = fl["entry1/instrument/detector"]
+                    self.assertEqual(det["name"][()], b"final")
+                    self.assertEqual(
+                        det["counter1"][...].tolist(),
+                        [float(i) for i in range(records)])
+                    self.assertEqual(
+                        det["mca"][...].tolist(),
+                        [[i, 1, 2] for i in range(records)])
+                    self.assertEqual(
+                        det["counter1"].attrs["units"], "m")
+                    self.assertEqual(det["counter1"].is_virtual,
+                                     bool(records))
+            finally:
+                os.chdir(cwd)
+            if records:
+                with h5py.File(
+                        os.path.join(self._dir, "scan_00002.h5"), "r") as fl:
+                    det = fl["entry1/instrument/detector"]
+                    self.assertEqual(sorted(det.keys()), ["counter1", "mca"])
+                    self.assertEqual(det["counter1"][...].tolist(), [2., 3.])
+            for name in os.listdir(self._dir):
+                os.remove(os.path.join(self._dir, name))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -62,6 +62,7 @@ import ClientSource_test
 import PyEvalSource_test
 import DBaseSource_test
 import DataSourcePool_test
+import ConnectionPool_test
 import DataSourceFactory_test
 import UTF8decoder_test
 import UINT32decoder_test
@@ -72,6 +73,11 @@ import ElementThread_test
 import ThreadPool_test
 import FetchNameHandler_test
 import InnerXMLParser_test
+import EntryPlan_test
+import ShapeCache_test
+import EntryTemplate_test
+import VirtualSteps_test
+import FlushPolicy_test
 import TNObject_test
 import StreamSet_test
 import Element_test
@@ -86,6 +92,7 @@ if H5PY_AVAILABLE:
     import FElementWithAttrH5PY_test
     import EStrategyH5PY_test
     import EFieldH5PY_test
+    import ChunkCompressorH5PY_test
     import EFieldReshapeH5PY_test
     import EGroupH5PY_test
     import EAttributeH5PY_test
@@ -313,6 +320,8 @@ def main():
         unittest.defaultTestLoader.loadTestsFromModule(DBaseSource_test))
     suite.addTests(
         unittest.defaultTestLoader.loadTestsFromModule(DataSourcePool_test))
+    suite.addTests(
+        unittest.defaultTestLoader.loadTestsFromModule(ConnectionPool_test))
     suite.addTests(
         unittest.defaultTestLoader.loadTestsFromModule(DataSourceFactory_test))
     suite.addTests(
@@ -333,6 +342,16 @@ def main():
         unittest.defaultTestLoader.loadTestsFromModule(FetchNameHandler_test))
     suite.addTests(
         unittest.defaultTestLoader.loadTestsFromModule(InnerXMLParser_test))
+    suite.addTests(
+        unittest.defaultTestLoader.loadTestsFromModule(EntryPlan_test))
+    suite.addTests(
+        unittest.defaultTestLoader.loadTestsFromModule(ShapeCache_test))
+    suite.addTests(
+        unittest.defaultTestLoader.loadTestsFromModule(EntryTemplate_test))
+    suite.addTests(
+        unittest.defaultTestLoader.loadTestsFromModule(VirtualSteps_test))
+    suite.addTests(
+        unittest.defaultTestLoader.loadTestsFromModule(FlushPolicy_test))
     suite.addTests(
         unittest.defaultTestLoader.loadTestsFromModule(TNObject_test))
 
@@ -350,6 +369,9 @@ def main():
                 FElementWithAttrH5PY_test))
         suite.addTests(
             unittest.defaultTestLoader.loadTestsFromModule(EFieldH5PY_test))
+        suite.addTests(
+            unittest.defaultTestLoader.loadTestsFromModule(
+                ChunkCompressorH5PY_test))
         suite.addTests(
             unittest.defaultTestLoader.loadTestsFromModule(
                 EFieldReshapeH5PY_test))